@@ -0,0 +1,165 @@
+# Import libraries
+from BatchRunner import DEFAULT_SCENARIO, run_scenario
+import multiprocessing
+import numpy as np
+import threading
+import argparse
+import json
+import os
+
+# Tracking costs that can be minimized (columns of BatchRunner's summary, lower is better)
+COSTS = ["rms_position", "iae_position", "max_position", "final_position", "rms_contour", "max_contour"]
+
+# Cost of one scenario run with the given gain (module level so that worker processes can run it)
+def evaluate_gain(task):
+    scenario, gain, cost = task
+    scenario = dict(scenario)
+    scenario["kp_value"] = gain if np.ndim(gain) == 0 else list(gain)
+    value = run_scenario(scenario).get(cost)
+    return float(value) if value is not None and np.isfinite(value) else np.inf
+
+# Automatic tuning of the path following gain: minimizes a tracking cost of a BatchRunner
+# scenario (with its saturation limits) over a scalar kp or a diagonal K = (kx, ky, kt).
+# The scalar search evaluates a logarithmic grid of gains in parallel and refines it around
+# the best one; the diagonal search then starts from the best scalar gain and moves one
+# axis at a time (all the moves of an iteration evaluated in parallel), halving the step
+# when no move improves the cost. Gains are rounded to 4 significant digits and every
+# evaluated point is memoized, so repeated and overlapping candidates are not simulated again.
+# cancel() (from any thread) stops the search after the batch of simulations in progress.
+class AutoTune:
+    def __init__(self, scenario=None, cost="rms_position", bounds=(0.05, 5.0), workers=None):
+        if cost not in COSTS:
+            raise ValueError(f"Unknown cost: {cost}")
+        self.scenario = dict(DEFAULT_SCENARIO)
+        self.scenario.update(scenario or {})
+        unknown = set(self.scenario) - set(DEFAULT_SCENARIO)
+        if unknown:
+            raise ValueError(f"Unknown scenario parameters: {', '.join(sorted(unknown))}")
+        if cost in ("rms_contour", "max_contour"):
+            self.scenario["tracking"] = "progress"
+        self.cost = cost
+        self.bounds = bounds
+        self.workers = workers or os.cpu_count()
+        self.cache = {} # Rounded gain (float or tuple) -> cost
+        self.evaluations = 0 # Simulated runs (cache misses)
+        self.requests = 0 # Requested evaluations, including cache hits
+        self.pool = None
+        self.cancel_event = threading.Event()
+
+    # Stop a running search; tune() then returns None
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    # Round a gain (scalar or per axis) to 4 significant digits, inside the bounds
+    def key(self, gain):
+        low, high = self.bounds
+        if np.ndim(gain) == 0:
+            return float(f"{min(max(float(gain), low), high):.4g}")
+        return tuple(float(f"{min(max(float(value), low), high):.4g}") for value in gain)
+
+    # Costs of a list of gains; only the ones not evaluated before are simulated
+    def evaluate(self, gains):
+        keys = [self.key(gain) for gain in gains]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.cache))
+        self.requests += len(keys)
+        if self.cancelled(): # Nothing more is simulated; the search stops at its next check
+            return [self.cache.get(key, np.inf) for key in keys]
+        if missing:
+            tasks = [(self.scenario, key, self.cost) for key in missing]
+            if self.pool is not None and len(tasks) > 1:
+                costs = self.pool.map(evaluate_gain, tasks)
+            else:
+                costs = [evaluate_gain(task) for task in tasks]
+            self.cache.update(zip(missing, costs))
+            self.evaluations += len(missing)
+        return [self.cache[key] for key in keys]
+
+    # Best scalar kp: grid of `points` gains evenly spaced in log scale, refined `rounds`
+    # times between the neighbours of the best one
+    def tune_scalar(self, points=12, rounds=3):
+        low, high = np.log(self.bounds[0]), np.log(self.bounds[1])
+        for _ in range(rounds + 1):
+            if self.cancelled():
+                break
+            grid = np.exp(np.linspace(low, high, points))
+            costs = self.evaluate(grid)
+            best = int(np.argmin(costs))
+            low = np.log(grid[max(best - 1, 0)])
+            high = np.log(grid[min(best + 1, points - 1)])
+        if self.cancelled():
+            return None, np.inf
+        best_gain = min((key for key in self.cache if np.ndim(key) == 0), key=lambda key: self.cache[key])
+        return best_gain, self.cache[best_gain]
+
+    # Best diagonal K starting from a scalar gain: pattern search in log scale
+    def tune_diagonal(self, start, step=0.5, min_step=0.02, max_iterations=50):
+        current = self.key((start, start, start))
+        current_cost = self.evaluate([current])[0]
+        for _ in range(max_iterations):
+            if step < min_step or self.cancelled():
+                break
+            moves = []
+            for axis in range(3):
+                for sign in (1, -1):
+                    gain = list(current)
+                    gain[axis] *= np.exp(sign*step)
+                    moves.append(self.key(gain))
+            costs = self.evaluate(moves)
+            best = int(np.argmin(costs))
+            if costs[best] < current_cost:
+                current, current_cost = moves[best], costs[best]
+            else:
+                step *= 0.5
+        return current, current_cost
+
+    # Run the search; returns the best gain, its cost and the number of simulations (None if cancelled)
+    def tune(self, diagonal=False, points=12, rounds=3):
+        # Workers are started with spawn: the GUI calls this from a thread, and forking a
+        # process with running threads (Tk, the simulation) is not safe
+        if self.workers > 1:
+            self.pool = multiprocessing.get_context("spawn").Pool(self.workers)
+        try:
+            gain, cost = self.tune_scalar(points, rounds)
+            if diagonal and not self.cancelled():
+                gain, cost = self.tune_diagonal(gain)
+        finally:
+            if self.pool is not None:
+                if self.cancelled():
+                    self.pool.terminate()
+                else:
+                    self.pool.close()
+                self.pool.join()
+                self.pool = None
+        if self.cancelled():
+            return None
+
+        return {"kp_value": gain if np.ndim(gain) == 0 else list(gain),
+                "cost": cost,
+                "cost_name": self.cost,
+                "evaluations": self.evaluations,
+                "cache_hits": self.requests - self.evaluations}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the path following gain that minimizes a tracking cost.")
+    parser.add_argument("scenario_file", nargs="?", help="JSON object with the scenario parameters (same as BatchRunner)")
+    parser.add_argument("-c", "--cost", choices=COSTS, default="rms_position", help="tracking cost to minimize")
+    parser.add_argument("-d", "--diagonal", action="store_true", help="tune one gain per axis (kx, ky, kt)")
+    parser.add_argument("--bounds", type=float, nargs=2, default=[0.05, 5.0], metavar=("MIN", "MAX"), help="range of the gains")
+    parser.add_argument("--points", type=int, default=12, help="gains per grid of the scalar search")
+    parser.add_argument("--rounds", type=int, default=3, help="refinements of the scalar grid")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    scenario = {}
+    if args.scenario_file:
+        with open(args.scenario_file) as f:
+            scenario = json.load(f)
+
+    auto_tune = AutoTune(scenario, args.cost, tuple(args.bounds), args.workers)
+    print(json.dumps(auto_tune.tune(args.diagonal, args.points, args.rounds), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Import libraries
+from SimulationEngine import run_path_following, tracking_metrics
+from multiprocessing import Pool
+import numpy as np
+import itertools
+import argparse
+import json
+import csv
+import os
+import sys
+
+# Default parameters of a scenario (same defaults as PathFollowing.main)
+DEFAULT_SCENARIO = {"init_pos": [2.0, 2.0, 0.0],
+                    "kp_value": 0.4,
+                    "sample_time": 40.0,
+                    "steps": 0.1,
+                    "figure": "lemniscata",
+                    "vx_max": None,
+                    "vy_max": None,
+                    "w_max": None,
+                    "total_time": None,
+                    "tracking": "time",
+                    "wheel_max": None,
+                    "integrator": "exact",
+                    "substeps": 1,
+                    "log_every": 1}
+
+# Columns of the summary table
+PARAMETER_COLUMNS = ["figure", "sample_time", "steps", "kp_value", "x0", "y0", "theta0", "vx_max", "vy_max", "w_max", "wheel_max", "tracking", "integrator", "substeps"]
+METRIC_COLUMNS = ["samples", "rms_x", "rms_y", "rms_theta", "rms_position", "max_position", "final_position", "iae_position", "saturated",
+                  "max_wheel_speed", "rms_contour", "max_contour"]
+
+# Expand a scenario file into the list of scenarios to simulate.
+# The file is a JSON object with an optional "base" dict of fixed parameters,
+# an optional "sweep" dict of parameter -> list of values (cartesian product)
+# and an optional "scenarios" list of explicit parameter dicts
+def load_scenarios(file_path):
+    with open(file_path) as f:
+        spec = json.load(f)
+
+    base = dict(DEFAULT_SCENARIO)
+    base.update(spec.get("base", {}))
+
+    scenarios = []
+    sweep = spec.get("sweep", {})
+    if sweep or not spec.get("scenarios"):
+        names = list(sweep)
+        for values in itertools.product(*(sweep[name] for name in names)):
+            scenario = dict(base)
+            scenario.update(zip(names, values))
+            scenarios.append(scenario)
+
+    for explicit in spec.get("scenarios", []):
+        scenario = dict(base)
+        scenario.update(explicit)
+        scenarios.append(scenario)
+
+    for scenario in scenarios:
+        unknown = set(scenario) - set(DEFAULT_SCENARIO)
+        if unknown:
+            raise ValueError(f"Unknown scenario parameters: {', '.join(sorted(unknown))}")
+
+    return scenarios
+
+# Simulate one scenario and return its row of the summary table
+def run_scenario(scenario):
+    # Saturation is enabled as soon as one limit is given; missing limits are left free
+    limits = [scenario[name] for name in ("vx_max", "vy_max", "w_max")]
+    saturate = any(limit is not None for limit in limits)
+    vx_max, vy_max, w_max = [np.inf if limit is None else float(limit) for limit in limits]
+
+    result = run_path_following(init_pos=scenario["init_pos"],
+                                kp_value=scenario["kp_value"],
+                                sample_time=scenario["sample_time"],
+                                steps=scenario["steps"],
+                                saturate=saturate,
+                                vx_max=vx_max,
+                                vy_max=vy_max,
+                                w_max=w_max,
+                                figure=scenario["figure"],
+                                total_time=scenario["total_time"],
+                                tracking=scenario["tracking"],
+                                wheel_max=scenario["wheel_max"],
+                                integrator=scenario["integrator"],
+                                substeps=scenario["substeps"],
+                                log_every=scenario["log_every"])
+
+    row = {"figure": scenario["figure"],
+           "sample_time": scenario["sample_time"],
+           "steps": scenario["steps"],
+           "kp_value": scenario["kp_value"],
+           "x0": scenario["init_pos"][0],
+           "y0": scenario["init_pos"][1],
+           "theta0": scenario["init_pos"][2],
+           "vx_max": scenario["vx_max"],
+           "vy_max": scenario["vy_max"],
+           "w_max": scenario["w_max"],
+           "wheel_max": scenario["wheel_max"],
+           "tracking": scenario["tracking"],
+           "integrator": scenario["integrator"],
+           "substeps": scenario["substeps"]}
+    row.update(tracking_metrics(result))
+
+    # Fraction of steps where at least one velocity component or wheel hit its limit
+    saturated = np.zeros(len(result["time"]), dtype=bool)
+    if saturate:
+        saturated |= (np.abs(result["velocities"]) >= np.array([vx_max, vy_max, w_max]) - 1e-12).any(axis=1)
+    if scenario["wheel_max"] is not None:
+        saturated |= (np.abs(result["wheel_speeds"]) >= scenario["wheel_max"]*(1 - 1e-9)).any(axis=1)
+    row["saturated"] = float(np.mean(saturated))
+    return row
+
+# Run all scenarios in a process pool, keeping the order of the scenario file
+def run_batch(scenarios, workers=None):
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+
+    chunksize = max(1, len(scenarios) // (4 * workers))
+    with Pool(workers) as pool:
+        return pool.map(run_scenario, scenarios, chunksize=chunksize)
+
+# Write the summary table as CSV
+def write_summary(rows, output):
+    writer = csv.DictWriter(output, fieldnames=PARAMETER_COLUMNS + METRIC_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({name: (f"{value:.6g}" if isinstance(value, float) else value) for name, value in row.items()})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run path following scenarios in parallel and summarize their tracking metrics.")
+    parser.add_argument("scenario_file", help="JSON file with the scenarios to simulate")
+    parser.add_argument("-o", "--output", help="CSV file for the summary table (default: standard output)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenario_file)
+    rows = run_batch(scenarios, args.workers)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_summary(rows, f)
+    else:
+        write_summary(rows, sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# Import libraries
+import numpy as np
+import platform
+import argparse
+import time
+import json
+import sys
+import os
+
+# Benchmarks of the simulation hot loops, measured separately and end-to-end.
+# Every benchmark is a function returning (callable, operations per call); the callable
+# is timed several times and the per-operation time of the fastest repeat is reported.
+# Inputs are fixed (seeded), so results are comparable between runs on the same machine.
+
+BENCHMARKS = {}
+
+# Register a benchmark function under a name
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+# Time a callable: `repeat` repeats, each of `number` calls
+def measure(function, ops, repeat=5, number=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / (number * ops))
+    return {"best_us": min(times) * 1e6,
+            "median_us": float(np.median(times)) * 1e6,
+            "ops": ops * number}
+
+# ---------------------------------------------------------------- Kinematics
+
+def motion_step(integrator):
+    from RobotMotion import RobotMotion
+    robot_motion = RobotMotion(integrator)
+    robot_motion.get_init_state([2.0, 2.0, 0.3], 0.01)
+    n = 2000
+
+    def run():
+        for _ in range(n):
+            robot_motion.step(0.7, -0.3, 0.4)
+    return run, n
+
+@benchmark("robot_motion.step[exact]")
+def bench_motion_step_exact():
+    return motion_step("exact")
+
+@benchmark("robot_motion.step[euler]")
+def bench_motion_step_euler():
+    return motion_step("euler")
+
+@benchmark("robot_motion.step[rk4]")
+def bench_motion_step_rk4():
+    return motion_step("rk4")
+
+@benchmark("robot_motion.step[rk45]")
+def bench_motion_step_rk45():
+    return motion_step("rk45")
+
+@benchmark("robot_motion.step[odeint]")
+def bench_motion_step_odeint():
+    return motion_step("odeint")
+
+# ---------------------------------------------------------------- Control
+
+@benchmark("robot_control.calculate_velocity")
+def bench_robot_control():
+    from RobotControl import RobotControl
+    robot_control = RobotControl()
+    states = np.random.default_rng(0).normal(size=(2000, 3))
+
+    def run():
+        for state in states:
+            robot_control.calculate_velocity(state, (10.0, 10.0, 0.5), 0.4)
+    return run, len(states)
+
+@benchmark("robot_control_p.calculate_velocity")
+def bench_robot_control_p():
+    from RobotControlP import RobotControlP
+    robot_control = RobotControlP()
+    states = np.random.default_rng(0).normal(size=(2000, 3))
+
+    def run():
+        for state in states:
+            robot_control.calculate_velocity(state, (10.0, 10.0, 0.0), (0.5, 0.2, 0.0), 0.4)
+    return run, len(states)
+
+@benchmark("robot_control_p.calculate_velocities[N=10000]")
+def bench_robot_control_p_batch():
+    from RobotControlP import RobotControlP
+    robot_control = RobotControlP()
+    rng = np.random.default_rng(0)
+    states = rng.normal(size=(10000, 3))
+    desired = rng.normal(size=(10000, 3))
+    desired_d = rng.normal(size=(10000, 3))
+
+    def run():
+        robot_control.calculate_velocities(states, desired, desired_d, 0.4)
+    return run, len(states)
+
+@benchmark("robot_control_p.calculate_desired_state")
+def bench_desired_state():
+    from RobotControlP import RobotControlP
+    robot_control = RobotControlP()
+    robot_control.set_path("lemniscata", 40, 0.01)
+    times = np.arange(2000) * 0.01
+
+    def run():
+        for t in times:
+            robot_control.calculate_desired_state(t)
+    return run, len(times)
+
+# ---------------------------------------------------------------- Trajectories
+
+# Circle of radius 8 as waypoints or a dense route, to compare with the built-in shapes
+def circle_points(n):
+    phase = np.linspace(0, 2*np.pi, n + 1)[:-1]
+    return np.c_[8*np.cos(phase) + 10, 8*np.sin(phase) + 10]
+
+def trajectory_evaluate(trajectory):
+    times = np.random.default_rng(0).uniform(0, 200, 10000)
+    trajectory.build_tables()
+
+    def run():
+        trajectory.evaluate(times)
+        trajectory.curvature(times)
+    return run, len(times)
+
+@benchmark("trajectory.evaluate[lemniscata,N=10000]")
+def bench_trajectory_lemniscate():
+    from Trajectory import lemniscate
+    return trajectory_evaluate(lemniscate(40))
+
+@benchmark("trajectory.evaluate[spline,N=10000]")
+def bench_trajectory_spline():
+    from Trajectory import WaypointSpline
+    return trajectory_evaluate(WaypointSpline(circle_points(40), 40))
+
+@benchmark("trajectory.evaluate[sampled,N=10000]")
+def bench_trajectory_sampled():
+    from Trajectory import SampledTrajectory
+    return trajectory_evaluate(SampledTrajectory(circle_points(100000), 40))
+
+# Projection of noisy positions along a circle route of n segments, following the path
+# (local walk) or searching the whole path every time (k-d tree)
+def path_projection(n, follow):
+    from PathProjector import PathProjector
+    points = circle_points(n)
+    projector = PathProjector(np.vstack([points, points[:1]]), closed=True)
+    phase = np.linspace(0, 2*np.pi, 2000)
+    radius = 8 + np.random.default_rng(0).normal(0, 0.05, len(phase))
+    positions = np.c_[radius*np.cos(phase) + 10, radius*np.sin(phase) + 10]
+
+    def run():
+        s = 0.0 if follow else None
+        for position in positions:
+            s = projector.project(position, s if follow else None)[0]
+    return run, len(positions)
+
+@benchmark("path_projector.project[local,segments=50000]")
+def bench_projection_local():
+    return path_projection(50000, True)
+
+@benchmark("path_projector.project[global,segments=50000]")
+def bench_projection_global():
+    return path_projection(50000, False)
+
+# ---------------------------------------------------------------- Plots and drawing
+
+def plot_add_data(history, errors):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from PlotVelocities import PlotVelocities
+    from PlotErrors import PlotErrors
+
+    fig, ax = plt.subplots()
+    graph = PlotErrors(ax) if errors else PlotVelocities(ax)
+    buffer = graph.buffer
+
+    # Prefill the history directly, then time add_data on top of it
+    for i in range(history):
+        buffer.append(i * 0.01, 1.0, -1.0, 0.5)
+    n = 200
+    start = history * 0.01
+
+    def run():
+        for i in range(n):
+            t = start + i * 0.01
+            if errors:
+                graph.add_data(0.0, 0.0, 0.0, (1.0, -1.0, 0.5), t)
+            else:
+                graph.add_data(1.0, -1.0, 0.5, t)
+    return run, n
+
+for history in (1000, 10000, 100000):
+    benchmark(f"plot_velocities.add_data[history={history}]")(lambda history=history: plot_add_data(history, False))
+    benchmark(f"plot_errors.add_data[history={history}]")(lambda history=history: plot_add_data(history, True))
+
+@benchmark("robot_simulation.draw_robot[agg]")
+def bench_draw_robot():
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from RobotSimulation import RobotSimulation
+
+    fig = Figure(figsize=(6, 4), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(0, 30)
+    ax.set_ylim(0, 20)
+    robot_simulation = RobotSimulation(ax, delta=30, escala=0.5)
+    canvas.draw()
+    background = canvas.copy_from_bbox(ax.bbox)
+    n = 100
+
+    # Move the robot and rasterize it over the cached background
+    def run():
+        for i in range(n):
+            robot_simulation.draw_robot([10 + 0.01 * i, 10, 0.01 * i])
+            canvas.restore_region(background)
+            for artist in robot_simulation.artists:
+                ax.draw_artist(artist)
+    return run, n
+
+@benchmark("video_renderer.draw_frame[agg]")
+def bench_video_frame():
+    from SimulationEngine import run_path_following
+    from VideoRenderer import VideoRenderer
+
+    result = run_path_following(init_pos=[2.0, 2.0, 0.0], kp_value=0.4, sample_time=40.0, steps=0.01, figure="lemniscata")
+    renderer = VideoRenderer(result, fps=10)
+    n = 50
+
+    # Draw frames spread over the whole run (longer histories are decimated)
+    def run():
+        for number in np.linspace(0, len(renderer.frames) - 1, n).astype(int):
+            renderer.draw_frame(number)
+            renderer.image()
+    return run, n
+
+# ---------------------------------------------------------------- End to end
+
+def headless_run(figure, tracking="time"):
+    from SimulationEngine import run_path_following
+
+    def run():
+        run_path_following(init_pos=[2.0, 2.0, 0.0], kp_value=0.4, sample_time=40.0, steps=0.01, figure=figure, tracking=tracking)
+    return run, 4000
+
+@benchmark("headless.path_following[lemniscata]")
+def bench_headless_lemniscata():
+    return headless_run("lemniscata")
+
+@benchmark("headless.path_following[circle]")
+def bench_headless_circle():
+    return headless_run("circle")
+
+@benchmark("headless.path_following[lemniscata,progress]")
+def bench_headless_progress():
+    return headless_run("lemniscata", "progress")
+
+@benchmark("monte_carlo.run[N=1000,steps=400]")
+def bench_monte_carlo():
+    from MonteCarlo import MonteCarlo
+
+    def run():
+        monte_carlo = MonteCarlo("path_following", 1000, seed=0)
+        monte_carlo.setup(steps=0.01)
+        monte_carlo.run(4.0)
+    return run, 400
+
+# ---------------------------------------------------------------- Runner
+
+# Baseline kept under version control, next to this file
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Run the selected benchmarks and return the results document
+def run_benchmarks(names, repeat=5):
+    results = {}
+    for name in names:
+        function, ops = BENCHMARKS[name]()
+        function() # Warm up (imports, caches)
+        results[name] = measure(function, ops, repeat)
+        print(f"{name:<50}{results[name]['best_us']:12.3f} us/op", file=sys.stderr)
+
+    return {"meta": {"python": platform.python_version(),
+                     "numpy": np.__version__,
+                     "machine": platform.machine(),
+                     "platform": platform.platform(),
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results}
+
+# Compare results with a baseline; returns the names that got slower than the tolerance allows
+def compare(results, baseline, tolerance=0.2):
+    regressions = []
+    print(f"{'benchmark':<50}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, current in results["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:<50}{'-':>12}{current['best_us']:12.3f}{'new':>8}")
+            continue
+        reference = baseline["results"][name]["best_us"]
+        ratio = current["best_us"] / reference
+        flag = "  SLOWER" if ratio > 1 + tolerance else ""
+        print(f"{name:<50}{reference:12.3f}{current['best_us']:12.3f}{ratio:8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark kinematics, control, plotting, drawing and headless runs.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("-b", "--baseline", default=BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="repeats per benchmark (the best one is reported)")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2, help="allowed slowdown vs the baseline (0.2 = 20%%)")
+    parser.add_argument("-l", "--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(names, args.repeat)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Warning: no baseline at {args.baseline}, nothing compared (store one with --update-baseline)", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("platform") != results["meta"]["platform"]:
+        print(f"Warning: the baseline was measured on {baseline['meta'].get('platform')}; "
+              f"timings from another machine are only roughly comparable", file=sys.stderr)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
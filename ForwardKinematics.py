@@ -1,10 +1,12 @@
 # Import libraries
 from RobotMotion import RobotMotion
 from RobotSimulation import RobotSimulation
+from TrailBuffer import TrailBuffer
+from FrameTimer import FrameTimer
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.animation as animation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import signal
@@ -15,24 +17,33 @@ class ForwardKinematics:
     def __init__(self):
         pass
     
-    def init_simulation(self, on_back_callback=None): 
+    def init_simulation(self, on_back_callback=None, master=None):
         self.on_back_callback = on_back_callback
         self.vx = 0.0
         self.vy = 0.0
         self.w = 0.0
-        self.path = []  # List to store the robot's path
+        self.path = TrailBuffer(tolerance=1e-3)  # Buffer to store the robot's path (simplified within 1 mm)
         self.line = None  # To store the path line
         self.initial_point = None  # To store the initial point
         self.ani = None
 
-        # Create the Forward Kinematics window
-        self.root = tk.Tk()
+        # Create the Forward Kinematics window. The simulation is built in its own frame: inside
+        # master (the menu's window) when given, otherwise in a new window. The frame is destroyed when going back
+        self.owns_root = master is None
+        self.root = tk.Tk() if self.owns_root else master
         self.root.title("Forward Kinematics window")
-        self.root.attributes('-zoomed', True) # Maximize the window
+        if self.owns_root:
+            self.root.attributes('-zoomed', True) # Maximize the window
+        self.window = tk.Frame(self.root)
+        self.window.pack(fill=tk.BOTH, expand=True)
+        self.blit_rendering = tk.BooleanVar(value=False)
+        self.show_timings = tk.BooleanVar(value=False)
         self.create_interface()
 
         # Initialize axis
-        self.fig, self.ax = plt.subplots() 
+        # Figure not registered in pyplot, so it is released with the window
+        self.fig = Figure()
+        self.ax = self.fig.subplots()
         self.ax.set_xlim(0, 20)
         self.ax.set_ylim(0, 20)
         self.ax.set_aspect('equal')
@@ -49,6 +60,11 @@ class ForwardKinematics:
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+        # Per-stage frame timing and its overlay
+        self.frame_timer = FrameTimer(["integration", "robot", "canvas"])
+        self.frame_timer.instrument_canvas(self.canvas)
+        self.timing_text = self.ax.text(0.01, 0.99, '', transform=self.ax.transAxes, va='top', ha='left', family='monospace', fontsize=7, bbox=dict(facecolor='white', alpha=0.8))
+
         # Add a legend to the plot
         self.legend_labels = ['Initial Point', 'Path']
         self.initial_point, = self.ax.plot([], [], 'ro', label='Initial Point')
@@ -57,7 +73,11 @@ class ForwardKinematics:
 
     # Initialize the animation
     def init(self):
-        return self.robot_simulation.artists
+        return self.dynamic_artists()
+
+    # Artists that change on every frame (the only ones redrawn when blitting)
+    def dynamic_artists(self):
+        return self.robot_simulation.artists + [self.line, self.text_box, self.timing_text]
 
     # Main function to run the simulation
     def main(self,
@@ -79,26 +99,41 @@ class ForwardKinematics:
         self.initial_point.set_data(init_pos[0], init_pos[1])
         
         # Start animation
-        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False)
+        # Blit rendering redraws only the dynamic artists over a cached background
+        self.blit = self.blit_rendering.get()
+        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False, blit=self.blit)
         self.canvas.draw()
 
     # Update animation
     def update(self, frame):
+        # Close the timing of the previous frame (including its canvas draw)
+        self.frame_timer.end_frame()
+
         if self.robot_motion.time_elapsed < self.total_time:
+            self.frame_timer.start("integration")
             self.robot_motion.step(self.vx, self.vy, self.w)
+            self.frame_timer.stop("integration")
+
+            self.frame_timer.start("robot")
             x, y, theta = self.robot_motion.position()
             self.robot_simulation.draw_robot([x, y, theta])
             self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
 
             # Append the current position to the path
-            self.path.append((x, y))
+            self.path.append(x, y)
 
             # Draw the path as a blue dashed line
-            if self.path:
-                self.path_x, self.path_y = zip(*self.path)  # Unzip the path into x and y coordinates
-                self.line.set_data(self.path_x, self.path_y)  # Update the line data
+            self.line.set_data(self.path.x(), self.path.y())  # Update the line data
+            self.frame_timer.stop("robot")
+
+        # Live timing overlay (refreshed every 25 frames)
+        if self.show_timings.get():
+            if self.frame_timer.frames % 25 == 0:
+                self.timing_text.set_text(self.frame_timer.summary())
+        elif self.timing_text.get_text():
+            self.timing_text.set_text('')
 
-        return self.robot_simulation.artists
+        return self.dynamic_artists()
 
     # Run the simulation
     def run_simulation(self):
@@ -107,8 +142,9 @@ class ForwardKinematics:
                 self.ani.event_source.stop()
                 self.ani._stop()
             
-            # Clear the path
-            self.path = []
+            # Clear the path and the timings
+            self.path.clear()
+            self.frame_timer.clear()
             
             # Remove the old path line if it exists
             if self.line:
@@ -144,14 +180,21 @@ class ForwardKinematics:
         except ValueError:
             messagebox.showerror("Error", "Enter the value of all parameters.")
 
+    # Export the recorded frame timings to CSV or JSON
+    def export_timings(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")])
+        if file_path:
+            self.frame_timer.export(file_path)
+            messagebox.showinfo("Export Successful", "Timings exported successfully.")
+
     # Simulation Interface
     def create_interface(self):
         # Forward Kinematics frame to hold everything
-        self.interface_frame = tk.Frame(self.root)
+        self.interface_frame = tk.Frame(self.window)
         self.interface_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
         # Initialize the frame with buttons
-        self.plot_frame = tk.Frame(self.root)
+        self.plot_frame = tk.Frame(self.window)
         self.plot_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
         # Entry fields and labels for simulation parameters
@@ -197,9 +240,21 @@ class ForwardKinematics:
         back_button = tk.Button(self.interface_frame, text="Back", command=self.back)
         back_button.grid(row=9, column=0)
 
-        # Set up handling of window close event
-        self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
+        # Fast rendering option
+        blit_check = tk.Checkbutton(self.interface_frame, text="Fast Rendering (blit)", variable=self.blit_rendering)
+        blit_check.grid(row=9, column=1)
+
+        # Frame timing overlay and export
+        timings_check = tk.Checkbutton(self.interface_frame, text="Show Timings", variable=self.show_timings)
+        timings_check.grid(row=9, column=2)
+
+        timings_button = tk.Button(self.interface_frame, text="Export Timings", command=self.export_timings)
+        timings_button.grid(row=9, column=3)
+
+        # Set up handling of window close event (the menu handles it when embedded)
+        if self.owns_root:
+            self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
+            signal.signal(signal.SIGINT, self.signal_handler)
 
     # Function to handle Ctrl+C signal
     def signal_handler(self, sig, frame):
@@ -218,9 +273,22 @@ class ForwardKinematics:
 
     def back(self):
         if self.on_back_callback != None:
-            self.root.destroy() # Close the simulation windows
+            self.close_simulation()
             self.on_back_callback()
 
+    # Stop the simulation and release its window, figure and canvas
+    def close_simulation(self):
+        if self.ani is not None and self.ani.event_source is not None:
+            self.ani.event_source.stop()
+            self.ani._stop()
+        self.ani = None
+        self.canvas.get_tk_widget().destroy()
+        self.fig.clear()
+        if self.owns_root:
+            self.root.destroy()
+        else:
+            self.window.destroy()
+
 if __name__ == "__main__":
     robot_animation = ForwardKinematics()
     robot_animation.init_simulation()
@@ -0,0 +1,106 @@
+# Import libraries
+import numpy as np
+from collections import deque
+import threading
+import time
+import json
+import csv
+
+# Stages timed in the simulation windows
+STAGES = ["reference", "control", "integration", "robot", "plots", "canvas"]
+
+# Per-frame, per-stage timing of the simulation hot path.
+# Time spent in a stage is accumulated during a frame (start/stop, add, or the
+# wrapped canvas methods) and closed by end_frame(). The last `window` frames are
+# kept for live percentiles and up to `max_records` frames for export.
+# add() and end_frame() are thread safe, so the simulation worker can report its stages
+class FrameTimer:
+    def __init__(self, stages=STAGES, window=500, max_records=100000):
+        self.stages = list(stages)
+        self.history = {stage: deque(maxlen=window) for stage in self.stages}
+        self.records = deque(maxlen=max_records)
+        self.current = dict.fromkeys(self.stages, 0.0)
+        self.starts = {}
+        self.frames = 0
+        self.lock = threading.Lock()
+
+    # Time a stage of the current frame
+    def start(self, stage):
+        self.starts[stage] = time.perf_counter()
+
+    def stop(self, stage):
+        self.add(stage, time.perf_counter() - self.starts.pop(stage))
+
+    # Add a measured duration (s) to a stage of the current frame
+    def add(self, stage, seconds):
+        with self.lock:
+            self.current[stage] += seconds
+
+    # Close the current frame and start a new one
+    def end_frame(self):
+        with self.lock:
+            frame = self.current
+            self.current = dict.fromkeys(self.stages, 0.0)
+        for stage in self.stages:
+            self.history[stage].append(frame[stage])
+        self.records.append(tuple(frame[stage] for stage in self.stages))
+        self.frames += 1
+
+    # Measure the time spent rendering as the "canvas" stage: full draws, blits,
+    # background save/restore and the per-artist draws done when blitting
+    def instrument_canvas(self, canvas, stage="canvas"):
+        for name in ("draw", "blit", "copy_from_bbox", "restore_region"):
+            self.instrument(canvas, name, stage)
+        for ax in canvas.figure.axes:
+            self.instrument(ax, "draw_artist", stage)
+
+    # Replace obj.name by a wrapper that adds its run time to a stage
+    def instrument(self, obj, name, stage):
+        method = getattr(obj, name)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        setattr(obj, name, timed)
+
+    # Percentiles (ms) of one stage over the recent frames
+    def percentiles(self, stage, q=(50, 95, 99)):
+        values = np.fromiter(self.history[stage], dtype='float')
+        if len(values) == 0:
+            return [0.0] * len(q)
+        return list(np.percentile(values, q) * 1000)
+
+    # Text table with the live percentiles, used by the GUI overlay
+    def summary(self):
+        lines = [f"{'stage':<12}{'p50':>7}{'p95':>7}{'p99':>7} ms"]
+        for stage in self.stages:
+            p50, p95, p99 = self.percentiles(stage)
+            lines.append(f"{stage:<12}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        return "\n".join(lines)
+
+    # Export the recorded frames (ms per stage) to CSV, or to JSON if the file ends with .json
+    def export(self, file_path):
+        if file_path.endswith(".json"):
+            data = {"stages": self.stages,
+                    "frames_ms": [[value * 1000 for value in record] for record in self.records],
+                    "percentiles_ms": {stage: dict(zip(("p50", "p95", "p99"), self.percentiles(stage))) for stage in self.stages}}
+            with open(file_path, 'w') as f:
+                json.dump(data, f)
+        else:
+            with open(file_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['Frame'] + [f'{stage} (ms)' for stage in self.stages])
+                for i, record in enumerate(self.records):
+                    writer.writerow([i] + [value * 1000 for value in record])
+
+    # Forget all recorded frames
+    def clear(self):
+        with self.lock:
+            self.current = dict.fromkeys(self.stages, 0.0)
+        for stage in self.stages:
+            self.history[stage].clear()
+        self.records.clear()
+        self.starts.clear()
+        self.frames = 0
@@ -0,0 +1,35 @@
+# Import libraries
+from collections import deque
+
+# Sliding-window detector that tells whether every sample received during the
+# last `window` seconds is within `tolerance` of zero.
+# It keeps the samples of the window in a deque together with a running count of
+# the ones out of tolerance, so each new sample costs O(1) amortized
+class IdleDetector:
+    def __init__(self, window=0.5, tolerance=1e-2):
+        self.window = window
+        self.tolerance = tolerance
+        self.samples = deque() # (time, out of tolerance) pairs inside the window
+        self.out_count = 0
+
+    # Add one sample and return True if the whole window is near zero
+    def add(self, t, *values):
+        out = not all(abs(value) <= self.tolerance for value in values)
+        self.samples.append((t, out))
+        self.out_count += out
+
+        # Drop the samples that left the window
+        while t - self.samples[0][0] > self.window:
+            _, old_out = self.samples.popleft()
+            self.out_count -= old_out
+
+        return self.out_count == 0
+
+    # Return True if every sample in the current window is near zero
+    def is_idle(self):
+        return self.out_count == 0
+
+    # Forget all samples
+    def clear(self):
+        self.samples.clear()
+        self.out_count = 0
@@ -0,0 +1,234 @@
+# Import libraries
+import math
+import time
+import argparse
+import numpy as np
+
+# Integrators of the motion model over one step with constant body velocities (vx, vy, w):
+#   dx/dt = vx cos(theta) - vy sin(theta),  dy/dt = vx sin(theta) + vy cos(theta),  dtheta/dt = w
+# Every integrator has step(state, vx, vy, w, dt) -> new state (a NumPy array) and counts the
+# evaluations of the model it needs (evaluations, steps), which is its cost independent of
+# the machine. measure_integrators compares their achieved local error with the exact arc.
+
+# Right-hand side of the motion model
+def motion_model(theta, vx, vy, w):
+    c = math.cos(theta)
+    s = math.sin(theta)
+    return vx*c - vy*s, vx*s + vy*c, w
+
+# Exact solution when vx, vy and w are constant over dt. The body velocity is rotated by
+# the mean heading of the step and scaled by sinc(w*dt/2), which is the closed form of the
+# arc and stays finite when w -> 0. Also steps many robots at once: states of shape (N, 3)
+# with vx, vy and w of shape (N,) give new states of shape (N, 3)
+def exact_arc(state, vx, vy, w, dt):
+    if np.ndim(state) > 1:
+        vx = np.asarray(vx)
+        vy = np.asarray(vy)
+        w = np.asarray(w)
+        half = 0.5 * w * dt
+        theta_mid = state[..., 2] + half
+        small = np.abs(half) <= 1e-9
+        scale = dt * np.where(small, 1.0 - half * half / 6.0, np.sin(half) / np.where(small, 1.0, half))
+        c = np.cos(theta_mid)
+        s = np.sin(theta_mid)
+        return np.stack([state[..., 0] + scale * (vx * c - vy * s),
+                         state[..., 1] + scale * (vx * s + vy * c),
+                         state[..., 2] + w * dt], axis=-1)
+    x, y, theta = state
+    half = 0.5 * w * dt
+    theta_mid = theta + half
+    scale = dt * (math.sin(half) / half if abs(half) > 1e-9 else 1.0 - half * half / 6.0)
+    c = math.cos(theta_mid)
+    s = math.sin(theta_mid)
+    return np.array([x + scale * (vx * c - vy * s),
+                     y + scale * (vx * s + vy * c),
+                     theta + w * dt])
+
+class Integrator:
+    name = None
+    order = None # Order of accuracy (local error ~ dt^(order + 1)); None if exact or adaptive
+
+    def __init__(self):
+        self.evaluations = 0 # Evaluations of the motion model
+        self.steps = 0
+
+    def step(self, state, vx, vy, w, dt):
+        raise NotImplementedError
+
+# Explicit (forward) Euler: one evaluation, first order
+class EulerIntegrator(Integrator):
+    name = "euler"
+    order = 1
+
+    def step(self, state, vx, vy, w, dt):
+        x, y, theta = state
+        dx, dy, dtheta = motion_model(theta, vx, vy, w)
+        self.evaluations += 1
+        self.steps += 1
+        return np.array([x + dt*dx, y + dt*dy, theta + dt*dtheta])
+
+# Classic Runge-Kutta: four evaluations, fourth order
+class RK4Integrator(Integrator):
+    name = "rk4"
+    order = 4
+
+    def step(self, state, vx, vy, w, dt):
+        x, y, theta = state
+        k1 = motion_model(theta, vx, vy, w)
+        k2 = motion_model(theta + 0.5*dt*k1[2], vx, vy, w)
+        k3 = motion_model(theta + 0.5*dt*k2[2], vx, vy, w)
+        k4 = motion_model(theta + dt*k3[2], vx, vy, w)
+        self.evaluations += 4
+        self.steps += 1
+        return np.array([x + dt*(k1[0] + 2*k2[0] + 2*k3[0] + k4[0])/6,
+                         y + dt*(k1[1] + 2*k2[1] + 2*k3[1] + k4[1])/6,
+                         theta + dt*(k1[2] + 2*k2[2] + 2*k3[2] + k4[2])/6])
+
+# Closed-form arc (exact for constant velocities); counted as one evaluation
+class ExactIntegrator(Integrator):
+    name = "exact"
+
+    def step(self, state, vx, vy, w, dt):
+        self.evaluations += 1
+        self.steps += 1
+        return exact_arc(state, vx, vy, w, dt)
+
+# Adaptive Dormand-Prince 5(4): dt is covered with as many substeps as needed to keep the
+# estimated position error of each substep below tolerance (m). The last estimate is kept
+# in self.error_estimate
+class RK45Integrator(Integrator):
+    name = "rk45"
+
+    # Butcher tableau (the last row of A is the 5th order solution, E the error weights).
+    # The model does not depend on time, so the stage times are not needed
+    A = ((),
+         (1/5,),
+         (3/40, 9/40),
+         (44/45, -56/15, 32/9),
+         (19372/6561, -25360/2187, 64448/6561, -212/729),
+         (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+         (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84))
+    E = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+    def __init__(self, tolerance=1e-6):
+        super().__init__()
+        self.tolerance = tolerance
+        self.substep = None # Substep length carried over between calls
+        self.error_estimate = 0.0
+
+    def step(self, state, vx, vy, w, dt):
+        x, y, theta = (float(value) for value in state)
+        t = 0.0
+        h = min(self.substep or dt, dt)
+        self.error_estimate = 0.0
+        k1 = motion_model(theta, vx, vy, w)
+        self.evaluations += 1
+        while t < dt:
+            h = min(h, dt - t)
+            k = [k1]
+            for i in range(1, 7):
+                theta_i = theta + h*sum(a*ki[2] for a, ki in zip(self.A[i], k))
+                k.append(motion_model(theta_i, vx, vy, w))
+            self.evaluations += 6
+            error_x = h*sum(e*ki[0] for e, ki in zip(self.E, k))
+            error_y = h*sum(e*ki[1] for e, ki in zip(self.E, k))
+            error = math.hypot(error_x, error_y)
+
+            if error <= self.tolerance or h <= 1e-12*dt:
+                x += h*sum(b*ki[0] for b, ki in zip(self.A[6], k))
+                y += h*sum(b*ki[1] for b, ki in zip(self.A[6], k))
+                theta += h*sum(b*ki[2] for b, ki in zip(self.A[6], k))
+                t += h
+                self.error_estimate += error
+                k1 = k[6] # The last stage is the first one of the next substep (FSAL)
+
+            # New substep from the error (5th order controller with a safety factor)
+            factor = 0.9*(self.tolerance/error)**0.2 if error > 0 else 5.0
+            h *= min(5.0, max(0.2, factor))
+        self.substep = h
+        self.steps += 1
+        return np.array([x, y, theta])
+
+# scipy's odeint over the two-point span [0, dt] (kept for validation; heavy setup per step)
+class OdeintIntegrator(Integrator):
+    name = "odeint"
+
+    def __init__(self, tolerance=None):
+        super().__init__()
+        self.tolerance = tolerance
+
+    def step(self, state, vx, vy, w, dt):
+        import scipy.integrate as integrate # Imported on first use: scipy is slow to load
+
+        def dstate_dt(state, t):
+            self.evaluations += 1
+            return motion_model(state[2], vx, vy, w)
+        options = {} if self.tolerance is None else {"atol": self.tolerance, "rtol": self.tolerance}
+        self.steps += 1
+        return integrate.odeint(dstate_dt, state, [0, dt], **options)[1]
+
+INTEGRATORS = {integrator.name: integrator for integrator in
+               (EulerIntegrator, RK4Integrator, ExactIntegrator, RK45Integrator, OdeintIntegrator)}
+
+# Build an integrator by name; tolerance applies to the adaptive ones (rk45, odeint)
+def make_integrator(name, tolerance=None):
+    if name not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator: {name}")
+    if name in ("rk45", "odeint") and tolerance is not None:
+        return INTEGRATORS[name](tolerance)
+    return INTEGRATORS[name]()
+
+# Achieved local error and cost per step of each integrator for steps of length dt.
+# The steps start from random headings with random velocities up to `velocities` (vx, vy, w)
+# and are compared with the exact arc. Returns one dict per integrator
+def measure_integrators(dt, velocities=(1.5, 1.5, 2.0), names=None, samples=500, tolerance=None, seed=0):
+    rng = np.random.default_rng(seed)
+    twists = rng.uniform(-1, 1, (samples, 3))*np.asarray(velocities, dtype='float')
+    states = np.column_stack([np.zeros((samples, 2)), rng.uniform(-np.pi, np.pi, samples)])
+    exact = exact_arc(states, twists[:, 0], twists[:, 1], twists[:, 2], dt)
+
+    reports = []
+    for name in names or INTEGRATORS:
+        integrator = make_integrator(name, tolerance)
+        start = time.perf_counter()
+        results = [integrator.step(state, *twist, dt) for state, twist in zip(states, twists)]
+        elapsed = time.perf_counter() - start
+        errors = np.array([math.hypot(result[0] - reference[0], result[1] - reference[1])
+                           for result, reference in zip(results, exact)])
+        reports.append({"integrator": name,
+                        "max_error": float(errors.max()),
+                        "mean_error": float(errors.mean()),
+                        "evaluations_per_step": integrator.evaluations / samples,
+                        "us_per_step": elapsed / samples * 1e6})
+    return reports
+
+# Cheapest integrator (by time per step) whose worst local position error stays within
+# `tolerance` metres for steps of dt; returns its report, or None if none meets the budget.
+# reports from measure_integrators are measured here if not given
+def select_integrator(dt, tolerance, velocities=(1.5, 1.5, 2.0), names=None, reports=None):
+    if reports is None:
+        reports = measure_integrators(dt, velocities, names, tolerance=tolerance)
+    candidates = [report for report in reports if report["max_error"] <= tolerance]
+    return min(candidates, key=lambda report: report["us_per_step"]) if candidates else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the integrators of the motion model and pick the cheapest one within an accuracy budget.")
+    parser.add_argument("--dt", type=float, default=0.1, help="step length (s)")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="position error allowed per step (m)")
+    parser.add_argument("--velocities", type=float, nargs=3, default=[1.5, 1.5, 2.0], metavar=("VX", "VY", "W"), help="largest velocities of the robot")
+    args = parser.parse_args(argv)
+
+    reports = measure_integrators(args.dt, args.velocities, tolerance=args.tolerance)
+    print(f"{'integrator':<12}{'max error (m)':>16}{'mean error (m)':>16}{'evals/step':>12}{'us/step':>10}")
+    for report in reports:
+        print(f"{report['integrator']:<12}{report['max_error']:>16.3e}{report['mean_error']:>16.3e}"
+              f"{report['evaluations_per_step']:>12.1f}{report['us_per_step']:>10.2f}")
+
+    best = select_integrator(args.dt, args.tolerance, args.velocities, reports=reports)
+    if best is not None:
+        print(f"Cheapest within {args.tolerance:g} m per step: {best['integrator']}")
+    else:
+        print(f"No integrator keeps the error within {args.tolerance:g} m per step")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
-from RobotMotion import RobotMotion
+from SimulationEngine import SimulationEngine
+from RobotControl import parse_kp
+from SimulationThread import SimulationThread, decimate
+from FrameTimer import FrameTimer
 from RobotSimulation import RobotSimulation
-from RobotControl import RobotControl
+from TrailBuffer import TrailBuffer
 from PlotVelocities import PlotVelocities
 from PlotErrors import PlotErrors
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.animation as animation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
@@ -17,24 +20,34 @@ class InverseKinematics:
     def __init__(self):
         pass
 
-    def init_simulation(self, on_back_callback=None):
+    def init_simulation(self, on_back_callback=None, master=None):
         self.on_back_callback = on_back_callback
         self.vx = 0.0
         self.vy = 0.0
         self.w = 0.0
-        self.path = []  # List to store the robot's path
+        self.path = TrailBuffer(tolerance=1e-3)  # Buffer to store the robot's path (simplified within 1 mm)
         self.line = None  # To store the path line
         self.initial_point = None  # To store the initial point
         self.ani = None
 
         # Create the Inverse Kinematics window
-        self.root = tk.Tk()
+        # The simulation is built in its own frame: inside master (the menu's window) when
+        # given, otherwise in a new window. The frame is destroyed when going back
+        self.owns_root = master is None
+        self.root = tk.Tk() if self.owns_root else master
         self.root.title("Inverse Kinematics Simulation")
-        self.root.attributes('-zoomed', True)  # Maximize the window
+        if self.owns_root:
+            self.root.attributes('-zoomed', True) # Maximize the window
+        self.window = tk.Frame(self.root)
+        self.window.pack(fill=tk.BOTH, expand=True)
+        self.blit_rendering = tk.BooleanVar(value=False)
+        self.show_timings = tk.BooleanVar(value=False)
         self.create_interface()
 
         # Initialize axis
-        self.fig, (self.ax, self.ax2, self.ax3) = plt.subplots(3, 1, figsize=(10, 5), gridspec_kw={'height_ratios': [2, 1, 1]})
+        # Figure not registered in pyplot, so it is released with the window
+        self.fig = Figure(figsize=(10, 5))
+        (self.ax, self.ax2, self.ax3) = self.fig.subplots(3, 1, gridspec_kw={'height_ratios': [2, 1, 1]})
         self.ax.set_xlabel("x (m)")
         self.ax.set_ylabel("y (m)")
         self.ax.set_xlim(0, 30)
@@ -48,14 +61,23 @@ class InverseKinematics:
 
         # Initialize several objects
         self.robot_simulation = RobotSimulation(self.ax, delta=30, escala=0.5)
-        self.robot_motion = RobotMotion()
-        self.robot_control = RobotControl()
+        self.engine = SimulationEngine("inverse_kinematics")
+        self.robot_motion = self.engine.robot_motion
+        self.robot_control = self.engine.robot_control
+        self.simulation_thread = SimulationThread(self.engine)
+        self.max_samples_per_frame = 20 # Simulated samples plotted per frame (the rest are decimated)
         self.velocity_graph = PlotVelocities(self.ax2)
         self.error_graph = PlotErrors(self.ax3)
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+        # Per-stage frame timing and its overlay
+        self.frame_timer = FrameTimer()
+        self.frame_timer.instrument_canvas(self.canvas)
+        self.engine.timer = self.frame_timer
+        self.timing_text = self.ax.text(0.01, 0.99, '', transform=self.ax.transAxes, va='top', ha='left', family='monospace', fontsize=7, bbox=dict(facecolor='white', alpha=0.8))
+
         # Add a legend to the plot
         self.legend_labels = ['Initial Point', 'Path']
         self.initial_point, = self.ax.plot([], [], 'ro', label='Initial Point')
@@ -63,55 +85,109 @@ class InverseKinematics:
         self.ax.legend()
 
     def init(self):
-        return self.robot_simulation.artists
+        return self.dynamic_artists()
+
+    # Artists that change on every frame (the only ones redrawn when blitting)
+    def dynamic_artists(self):
+        return self.robot_simulation.artists + [self.line, self.text_box, self.timing_text] + self.velocity_graph.artists + self.error_graph.artists
 
     # Main function to run the simulation
-    def main(self, steps, init_pos=[2.0, 2.0, 0.0], final_pose=[0.0, 0.0, 0.0], kp_value=0.4):
+    def main(self, steps, init_pos=[2.0, 2.0, 0.0], final_pose=[0.0, 0.0, 0.0], kp_value=0.4, time_scale=1.0):
         self.final_pose = final_pose
         self.steps = steps
         self.kp_value = kp_value
-        self.robot_motion.get_init_state(init_pos, self.steps)
+        self.engine.setup(init_pos, self.steps, self.kp_value, final_pose=self.final_pose)
+
+        # Simulate on a worker thread at a fixed timestep, time_scale times faster than real time
+        self.simulation_thread.time_scale = time_scale
+        self.simulation_thread.start()
 
         # Plot the initial point
         self.initial_point.set_data(init_pos[0], init_pos[1])
 
         # Start animation
-        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False)
+        # Blit rendering redraws only the dynamic artists over a cached background
+        self.blit = self.blit_rendering.get()
+        self.velocity_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.error_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False, blit=self.blit)
         self.canvas.draw()
 
     # Update animation
     def update(self, frame):
-        x, y, theta = self.robot_motion.position()
-        current_state = [x, y, theta]
-        vx, vy, w = self.robot_control.calculate_velocity(current_state, self.final_pose,self.kp_value)
-        self.robot_motion.step(vx, vy, w)
-        x, y, theta = self.robot_motion.position()
-        self.robot_simulation.draw_robot([x, y, theta])
-
-        self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
-
-        self.velocity_graph.add_data(vx, vy, w, self.robot_motion.time_elapsed)
-        self.error_graph.add_data(x, y, theta, self.final_pose, self.robot_motion.time_elapsed)
-
-        # Append the current position to the path
-        self.path.append((x, y))
-
-        # Draw the path as a blue dashed line
-        if self.path:
-            self.path_x, self.path_y = zip(*self.path)  # Unzip the path into x and y coordinates
-            self.line.set_data(self.path_x, self.path_y)  # Update the line data
+        # Close the timing of the previous frame (including its canvas draw)
+        self.frame_timer.end_frame()
+
+        # Samples simulated by the worker thread since the previous frame (decimated for plotting)
+        samples = self.simulation_thread.take()
+        self.frame_timer.start("plots")
+        for t, x, y, theta, vx, vy, w, desired_state in decimate(samples, self.max_samples_per_frame):
+            self.velocity_graph.add_data(vx, vy, w, t, redraw=False)
+            self.error_graph.add_data(x, y, theta, desired_state, t, redraw=False)
+
+            # Append the position to the path
+            self.path.append(x, y)
+        if samples:
+            self.velocity_graph.redraw()
+            self.error_graph.redraw()
+        self.frame_timer.stop("plots")
+
+        if samples:
+            # Draw the robot at the latest simulated pose
+            self.frame_timer.start("robot")
+            t, x, y, theta = samples[-1][:4]
+            self.robot_simulation.draw_robot([x, y, theta])
+
+            self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
+
+            # Draw the path as a blue dashed line
+            self.line.set_data(self.path.x(), self.path.y())  # Update the line data
+            self.frame_timer.stop("robot")
+
+        # Live timing overlay (refreshed every 25 frames)
+        if self.show_timings.get():
+            if self.frame_timer.frames % 25 == 0:
+                self.timing_text.set_text(self.frame_timer.summary())
+        elif self.timing_text.get_text():
+            self.timing_text.set_text('')
+
+        # Axis rescales invalidate the cached background
+        if self.blit and (self.velocity_graph.limits_changed or self.error_graph.limits_changed):
+            self.refresh_background()
+
+        return self.dynamic_artists()
+
+    # Redraw the static background (grid, reference path, legends and axes) after an axis rescale
+    def refresh_background(self):
+        self.velocity_graph.limits_changed = False
+        self.error_graph.limits_changed = False
+        self.canvas.draw()
 
-        return self.robot_simulation.artists
+    # Read the speed multiplier (x real time); None, after showing an error, unless it is positive
+    def read_speed(self):
+        try:
+            speed = float(self.speed_entry.get() or 1.0)
+            if speed <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "The speed must be a positive number.")
+            return None
+        return speed
 
     # Run the simulation
     def run_simulation(self):
+        time_scale = self.read_speed()
+        if time_scale is None:
+            return
         try:
             if self.ani is not None:
                 self.ani.event_source.stop()
                 self.ani._stop()
+            self.simulation_thread.stop()
+            self.frame_timer.clear()
 
             # Clear the path
-            self.path = []
+            self.path.clear()
 
             # Remove the old path line if it exists
             if self.line:
@@ -139,21 +215,26 @@ class InverseKinematics:
             final_pose = [xf, yf, anglef]
 
             samples = float(self.samples_entry.get())
-            kp_value = float(self.kp_entry.get())
-            if kp_value > 1.0:
-                kp_value = 1.0
-            self.main(samples, init_pos, final_pose,kp_value)
+            kp_value = parse_kp(self.kp_entry.get())
+            self.main(samples, init_pos, final_pose,kp_value,time_scale)
         except ValueError:
             messagebox.showerror("Error", "Enter the value of all parameters.")
 
+    # Export the recorded frame timings to CSV or JSON
+    def export_timings(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")])
+        if file_path:
+            self.frame_timer.export(file_path)
+            messagebox.showinfo("Export Successful", "Timings exported successfully.")
+
     # Simulation Interface
     def create_interface(self):
         # Inverse Kinematics frame to hold everything
-        self.interface_frame = tk.Frame(self.root)
+        self.interface_frame = tk.Frame(self.window)
         self.interface_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
         # Initialize the frame with buttons
-        self.plot_frame = tk.Frame(self.root)
+        self.plot_frame = tk.Frame(self.window)
         self.plot_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
         # Entry fields and labels for simulation parameters
@@ -185,23 +266,39 @@ class InverseKinematics:
         self.samples_entry = tk.Entry(self.interface_frame)
         self.samples_entry.grid(row=6, column=1)
 
-        tk.Label(self.interface_frame, text="kp Value (from 0 to 1):").grid(row=7, column=0)
+        tk.Label(self.interface_frame, text="kp Value (or kx, ky, kt):").grid(row=7, column=0)
         self.kp_entry = tk.Entry(self.interface_frame)
         self.kp_entry.grid(row=7, column=1)
 
+        tk.Label(self.interface_frame, text="Speed (x real time, default 1):").grid(row=8, column=0)
+        self.speed_entry = tk.Entry(self.interface_frame)
+        self.speed_entry.grid(row=8, column=1)
+
         # Buttons to run and exit the simulation, and back to the previous interface
         run_button = tk.Button(self.interface_frame, text="Run", command=self.run_simulation)
-        run_button.grid(row=8, column=1)
+        run_button.grid(row=9, column=1)
 
         exit_button = tk.Button(self.interface_frame, text="Exit", command=self.exit_program)
-        exit_button.grid(row=8, column=2)
+        exit_button.grid(row=9, column=2)
 
         back_button = tk.Button(self.interface_frame, text="Back", command=self.back)
-        back_button.grid(row=9, column=0)
+        back_button.grid(row=10, column=0)
+
+        # Fast rendering option
+        blit_check = tk.Checkbutton(self.interface_frame, text="Fast Rendering (blit)", variable=self.blit_rendering)
+        blit_check.grid(row=10, column=1)
 
-        # Set up handling of window close event
-        self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
+        # Frame timing overlay and export
+        timings_check = tk.Checkbutton(self.interface_frame, text="Show Timings", variable=self.show_timings)
+        timings_check.grid(row=10, column=2)
+
+        timings_button = tk.Button(self.interface_frame, text="Export Timings", command=self.export_timings)
+        timings_button.grid(row=10, column=3)
+
+        # Set up handling of window close event (the menu handles it when embedded)
+        if self.owns_root:
+            self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
+            signal.signal(signal.SIGINT, self.signal_handler)
 
     # Function to handle Ctrl+C signal
     def signal_handler(self, sig, frame):
@@ -220,9 +317,23 @@ class InverseKinematics:
 
     def back(self):
         if self.on_back_callback != None:
-            self.root.destroy()  # Close the simulation windows
+            self.close_simulation()
             self.on_back_callback()
 
+    # Stop the simulation and release its window, figure and canvas
+    def close_simulation(self):
+        if self.ani is not None and self.ani.event_source is not None:
+            self.ani.event_source.stop()
+            self.ani._stop()
+        self.ani = None
+        self.simulation_thread.stop()
+        self.canvas.get_tk_widget().destroy()
+        self.fig.clear()
+        if self.owns_root:
+            self.root.destroy()
+        else:
+            self.window.destroy()
+
 if __name__ == "__main__":
     robot_animation = InverseKinematics()
     robot_animation.init_simulation()
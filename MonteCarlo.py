@@ -0,0 +1,210 @@
+# Import libraries
+from Integrators import exact_arc
+from RobotControl import RobotControl
+from RobotControlP import RobotControlP
+from WheelKinematics import WheelKinematics
+import numpy as np
+import argparse
+import json
+import csv
+import sys
+
+# Statistics reported for every per-robot metric
+PERCENTILES = (5, 50, 95)
+METRICS = ["rms_position", "max_position", "final_position", "final_theta", "settling_time"]
+
+# Monte Carlo robustness analysis: N copies of a path following or inverse kinematics
+# scenario simulated together as an (N, 3) state array. Each copy starts from a randomized
+# pose and gets its own actuator noise (added to the commanded velocities) and measurement
+# noise (added to the pose seen by the controller). The random numbers come from one seeded
+# generator, so a seed always reproduces the same run.
+# Path following tracks the time-indexed reference (the same for every copy, read from
+# the cached path table); progress tracking projects each robot separately and is not vectorized.
+class MonteCarlo:
+    def __init__(self, mode="path_following", n=1000, seed=0): # mode: "path_following" or "inverse_kinematics"
+        self.mode = mode
+        self.n = n
+        self.seed = seed
+        self.wheel_kinematics = WheelKinematics()
+
+        if self.mode == "path_following":
+            self.robot_control = RobotControlP()
+        elif self.mode == "inverse_kinematics":
+            self.robot_control = RobotControl()
+        else:
+            raise ValueError(f"Unknown simulation mode: {self.mode}")
+
+    # Set the scenario (same parameters as SimulationEngine.setup) and the noise levels.
+    #   init_spread: standard deviation of the initial x, y (m) and theta (rad)
+    #   actuator_noise: standard deviation of the noise on vx, vy (m/s) and w (rad/s)
+    #   measurement_noise: standard deviation of the noise on the measured x, y (m) and theta (rad)
+    def setup(self,
+              init_pos=[2.0, 2.0, 0.0],
+              steps=0.1,
+              kp_value=0.4,
+              figure="lemniscata",
+              sample_time=40.0,
+              final_pose=[0.0, 0.0, 0.0],
+              saturate=False,
+              vx_max=None,
+              vy_max=None,
+              w_max=None,
+              wheel_max=None,
+              init_spread=(0.5, 0.5, 0.1),
+              actuator_noise=(0.02, 0.02, 0.02),
+              measurement_noise=(0.01, 0.01, 0.005)):
+
+        self.steps = steps
+        self.kp_value = kp_value
+        self.figure = figure
+        self.sample_time = sample_time
+        self.final_pose = np.asarray(final_pose, dtype='float')
+        self.saturate = saturate
+        self.limits = np.array([np.inf if limit is None else limit for limit in (vx_max, vy_max, w_max)], dtype='float')
+        self.wheel_max = wheel_max
+        self.actuator_noise = np.asarray(actuator_noise, dtype='float')
+        self.measurement_noise = np.asarray(measurement_noise, dtype='float')
+
+        if self.mode == "path_following":
+            self.robot_control.set_path(self.figure, self.sample_time, self.steps)
+
+        self.rng = np.random.default_rng(self.seed)
+        self.init_states = np.asarray(init_pos, dtype='float') + self.rng.normal(size=(self.n, 3))*np.asarray(init_spread, dtype='float')
+
+    # Desired state and its derivative at time t (the same for every copy)
+    def desired(self, t):
+        if self.mode == "path_following":
+            return self.robot_control.calculate_desired_state(t)
+        return self.final_pose, np.zeros(3)
+
+    # Gaussian noise of the given standard deviations for n copies (none drawn if all are 0)
+    def noise(self, n, sigma):
+        if not np.any(sigma):
+            return 0.0
+        return self.rng.normal(size=(n, 3))*sigma
+
+    # Simulate all copies for total_time seconds. A copy has settled once its position error
+    # stays below settle_tolerance (m) until the end; settling_time is NaN for the others.
+    # Returns per-copy metrics and, per time step, the mean and percentiles of the position error
+    def run(self, total_time, settle_tolerance=0.05):
+        n_steps = int(round(total_time / self.steps))
+        states = self.init_states.copy()
+        n = len(states)
+
+        sum_squares = np.zeros(n)
+        max_error = np.zeros(n)
+        last_outside = np.full(n, -np.inf) # Last time the error was above the tolerance
+        time = np.empty(n_steps)
+        envelope = np.empty((n_steps, 1 + len(PERCENTILES)))
+        desired_state, _ = self.desired(0.0)
+        error = np.hypot(desired_state[0] - states[:, 0], desired_state[1] - states[:, 1])
+
+        t = 0.0
+        for i in range(n_steps):
+            desired_state, desired_state_d = self.desired(t)
+            measured = states + self.noise(n, self.measurement_noise)
+            if self.mode == "path_following":
+                velocities = self.robot_control.calculate_velocities(measured, desired_state, desired_state_d, self.kp_value)
+            else:
+                velocities = self.robot_control.calculate_velocities(measured, desired_state, self.kp_value)
+
+            # Saturate the commanded velocities, then add the actuator noise
+            if self.saturate:
+                velocities = np.clip(velocities, -self.limits, self.limits)
+            if self.wheel_max is not None:
+                velocities, _ = self.wheel_kinematics.saturate_many(velocities, self.wheel_max)
+            velocities += self.noise(n, self.actuator_noise)
+
+            states = exact_arc(states, velocities[:, 0], velocities[:, 1], velocities[:, 2], self.steps)
+            t = (i + 1)*self.steps
+
+            # Error of the true pose against the reference used by the step (as SimulationEngine)
+            error = np.hypot(desired_state[0] - states[:, 0], desired_state[1] - states[:, 1])
+            sum_squares += error*error
+            np.maximum(max_error, error, out=max_error)
+            last_outside[error >= settle_tolerance] = t
+
+            time[i] = t
+            envelope[i, 0] = error.mean()
+            envelope[i, 1:] = np.percentile(error, PERCENTILES)
+
+        settled = last_outside < t
+        settling_time = np.where(settled, np.maximum(last_outside, 0.0), np.nan)
+        theta_error = desired_state[2] - states[:, 2]
+
+        return {"time": time,
+                "init_states": self.init_states,
+                "final_states": states,
+                "rms_position": np.sqrt(sum_squares / max(n_steps, 1)),
+                "max_position": max_error,
+                "final_position": error,
+                "final_theta": np.abs(np.arctan2(np.sin(theta_error), np.cos(theta_error))),
+                "settling_time": settling_time,
+                "settled": settled,
+                "error_mean": envelope[:, 0],
+                "error_percentiles": envelope[:, 1:]}
+
+# Distribution statistics of the per-copy metrics of a run (NaN settling times are left out)
+def summarize(result):
+    summary = {"copies": len(result["settled"]),
+               "settled_fraction": float(np.mean(result["settled"]))}
+    for name in METRICS:
+        values = result[name][np.isfinite(result[name])]
+        if len(values) == 0:
+            summary[name] = None
+            continue
+        statistics = {"mean": float(values.mean()), "std": float(values.std()),
+                      "min": float(values.min()), "max": float(values.max())}
+        for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            statistics[f"p{percentile}"] = float(value)
+        summary[name] = statistics
+    return summary
+
+# Write one row per copy (initial pose and metrics) as CSV
+def write_copies(result, output):
+    writer = csv.writer(output)
+    writer.writerow(["x0", "y0", "theta0"] + METRICS)
+    for i in range(len(result["settled"])):
+        writer.writerow([f"{value:.6g}" for value in list(result["init_states"][i]) + [result[name][i] for name in METRICS]])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many randomized copies of a scenario at once and summarize the tracking error and settling time.")
+    parser.add_argument("--mode", choices=["path_following", "inverse_kinematics"], default="path_following")
+    parser.add_argument("-n", "--copies", type=int, default=1000, help="number of simulated copies")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the random generator")
+    parser.add_argument("--init-pos", type=float, nargs=3, default=[2.0, 2.0, 0.0], metavar=("X", "Y", "THETA"))
+    parser.add_argument("--final-pose", type=float, nargs=3, default=[0.0, 0.0, 0.0], metavar=("X", "Y", "THETA"), help="target of inverse kinematics")
+    parser.add_argument("--kp", type=float, default=0.4, help="controller gain")
+    parser.add_argument("--steps", type=float, default=0.1, help="time step (s)")
+    parser.add_argument("--figure", default="lemniscata", help="built-in path or CSV route file")
+    parser.add_argument("--sample-time", type=float, default=40.0, help="period of the path (s)")
+    parser.add_argument("--total-time", type=float, default=None, help="simulated time (default: one lap, or 60 s for inverse kinematics)")
+    parser.add_argument("--limits", type=float, nargs=3, default=None, metavar=("VX", "VY", "W"), help="saturate the velocities")
+    parser.add_argument("--wheel-max", type=float, default=None, help="saturate the wheel speeds (rad/s)")
+    parser.add_argument("--init-spread", type=float, nargs=3, default=[0.5, 0.5, 0.1], metavar=("X", "Y", "THETA"))
+    parser.add_argument("--actuator-noise", type=float, nargs=3, default=[0.02, 0.02, 0.02], metavar=("VX", "VY", "W"))
+    parser.add_argument("--measurement-noise", type=float, nargs=3, default=[0.01, 0.01, 0.005], metavar=("X", "Y", "THETA"))
+    parser.add_argument("--tolerance", type=float, default=0.05, help="position error that counts as settled (m)")
+    parser.add_argument("-o", "--output", help="CSV file with the metrics of every copy")
+    args = parser.parse_args(argv)
+
+    monte_carlo = MonteCarlo(args.mode, args.copies, args.seed)
+    limits = args.limits or [None, None, None]
+    monte_carlo.setup(args.init_pos, args.steps, args.kp, args.figure, args.sample_time, args.final_pose,
+                      saturate=args.limits is not None, vx_max=limits[0], vy_max=limits[1], w_max=limits[2], wheel_max=args.wheel_max,
+                      init_spread=args.init_spread, actuator_noise=args.actuator_noise,
+                      measurement_noise=args.measurement_noise)
+
+    total_time = args.total_time
+    if total_time is None:
+        total_time = args.sample_time if args.mode == "path_following" else 60.0
+    result = monte_carlo.run(total_time, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_copies(result, f)
+    json.dump(summarize(result), sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
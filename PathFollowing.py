@@ -1,17 +1,26 @@
 # Import libraries
-from RobotMotion import RobotMotion
+from SimulationEngine import SimulationEngine
+from RobotControl import parse_kp
+from SimulationThread import SimulationThread, decimate
+from FrameTimer import FrameTimer
+from RunLog import RunLogWriter, RunLogReader
 from RobotSimulation import RobotSimulation
-from RobotControlP import RobotControlP
+from TrailBuffer import TrailBuffer
 from PlotVelocities import PlotVelocities
 from PlotErrors import PlotErrors
+from PlotWheelSpeeds import PlotWheelSpeeds
+from AutoTune import AutoTune
+from Telemetry import TelemetryServer
 import tkinter as tk
 from tkinter import messagebox, filedialog
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.animation as animation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import signal
-import csv
+import threading
+import tempfile
+import shutil
 import sys
 import os
 
@@ -19,30 +28,45 @@ class PathFollowing:
     def __init__(self):
         pass
 
-    def init_simulation(self, on_back_callback=None):
+    def init_simulation(self, on_back_callback=None, master=None):
         self.on_back_callback = on_back_callback
         self.vx = 0.0
         self.vy = 0.0
         self.w = 0.0
-        self.path = []  # List to store the robot's path
+        self.path = TrailBuffer(tolerance=1e-3)  # Buffer to store the robot's path (simplified within 1 mm)
         self.line = None  # To store the path line
         self.initial_point = None  # To store the initial point
         self.ani = None
         
-        self.root = tk.Tk()
+        # The simulation is built in its own frame: inside master (the menu's window) when
+        # given, otherwise in a new window. The frame is destroyed when going back
+        self.owns_root = master is None
+        self.root = tk.Tk() if self.owns_root else master
         self.root.title("Path Following Simulation")
-        self.root.attributes('-zoomed', True) # Maximize the window
+        if self.owns_root:
+            self.root.attributes('-zoomed', True) # Maximize the window
+        self.window = tk.Frame(self.root)
+        self.window.pack(fill=tk.BOTH, expand=True)
 
         # Create the Path Following window
         self.figure = "lemniscata"
         self.figure_interface = tk.StringVar(value="lemniscata")
 
         self.saturate_velocities = tk.BooleanVar(value=False)
+        self.track_progress = tk.BooleanVar(value=False)
+        self.tune_diagonal = tk.BooleanVar(value=False)
+        self.tune_thread = None
+        self.tune_search = None # AutoTune running on tune_thread
+        self.tune_after = None # Pending poll of the tuning thread (root.after id)
+        self.blit_rendering = tk.BooleanVar(value=False)
+        self.show_timings = tk.BooleanVar(value=False)
 
         self.create_interface()
 
         # Initialize axis 
-        self.fig, (self.ax, self.ax2, self.ax3) = plt.subplots(3, 1, figsize=(10, 5), gridspec_kw={'height_ratios': [2, 1, 1]})
+        # Figure not registered in pyplot, so it is released with the window
+        self.fig = Figure(figsize=(10, 5))
+        (self.ax, self.ax2, self.ax3, self.ax4) = self.fig.subplots(4, 1, gridspec_kw={'height_ratios': [2, 1, 1, 1]})
         self.ax.set_xlabel("x (m)")
         self.ax.set_ylabel("y (m)")
         self.ax.set_xlim(0, 30)
@@ -56,14 +80,29 @@ class PathFollowing:
 
         # Initialize several objects
         self.robot_simulation = RobotSimulation(self.ax, delta=30, escala=0.5)
-        self.robot_motion = RobotMotion()
-        self.robot_control = RobotControlP()
+        self.engine = SimulationEngine("path_following")
+        self.robot_motion = self.engine.robot_motion
+        self.robot_control = self.engine.robot_control
+        self.simulation_thread = SimulationThread(self.engine)
+        self.max_samples_per_frame = 20 # Simulated samples plotted per frame (the rest are decimated)
+
+        # Every step of the current run is streamed to this log; exports are derived from it
+        self.run_log = None
+        self.telemetry = None # Telemetry server, while publishing
+        self.log_path = os.path.join(tempfile.gettempdir(), f"omni_path_following_{os.getpid()}.rlog")
         self.velocity_graph = PlotVelocities(self.ax2)
         self.error_graph = PlotErrors(self.ax3)
+        self.wheel_graph = PlotWheelSpeeds(self.ax4)
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+        # Per-stage frame timing and its overlay
+        self.frame_timer = FrameTimer()
+        self.frame_timer.instrument_canvas(self.canvas)
+        self.engine.timer = self.frame_timer
+        self.timing_text = self.ax.text(0.01, 0.99, '', transform=self.ax.transAxes, va='top', ha='left', family='monospace', fontsize=7, bbox=dict(facecolor='white', alpha=0.8))
+
         # Add a legend to the plot
         self.legend_labels = ['Initial Point', 'Path']
         self.initial_point, = self.ax.plot([], [], 'ro', label='Initial Point')
@@ -71,7 +110,11 @@ class PathFollowing:
         self.ax.legend()
 
     def init(self):
-        return self.robot_simulation.artists
+        return self.dynamic_artists()
+
+    # Artists that change on every frame (the only ones redrawn when blitting)
+    def dynamic_artists(self):
+        return self.robot_simulation.artists + [self.line, self.text_box, self.timing_text] + self.velocity_graph.artists + self.error_graph.artists + self.wheel_graph.artists
        
     # Main function to run the simulation
     def main(self,
@@ -82,7 +125,13 @@ class PathFollowing:
              saturate=False,
              vx_max=None,
              vy_max=None,
-             w_max=None):
+             w_max=None,
+             time_scale=1.0,
+             tracking="time",
+             wheel_max=None,
+             substeps=1,
+             log_every=1,
+             telemetry_port=None):
         
         self.kp_value = kp_value
         self.sample_time = sample_time
@@ -91,58 +140,125 @@ class PathFollowing:
         self.vx_max = vx_max
         self.vy_max = vy_max
         self.w_max = w_max
+        self.tracking = tracking
+        self.wheel_max = wheel_max
+        self.substeps = substeps
+        self.log_every = log_every
 
         self.robot_control.draw_path(self.ax,self.figure,self.sample_time)
-        self.robot_motion.get_init_state(init_pos, self.steps)  
+        self.engine.setup(init_pos, self.steps, self.kp_value, self.figure, self.sample_time,
+                          saturate=self.saturate, vx_max=self.vx_max, vy_max=self.vy_max, w_max=self.w_max,
+                          tracking=self.tracking, wheel_max=self.wheel_max, substeps=self.substeps, log_every=self.log_every)
+        self.wheel_graph.set_limit(self.wheel_max)
+
+        # Stream every step (pose, desired pose, velocities and errors) to the run log
+        self.close_run_log()
+        metadata = {"mode": "path_following", "figure": self.figure, "sample_time": self.sample_time, "steps": self.steps,
+                    "kp_value": self.kp_value, "tracking": self.tracking, "wheel_max": self.wheel_max,
+                    "substeps": self.substeps, "log_every": self.log_every}
+        self.run_log = RunLogWriter(self.log_path, metadata=metadata)
+        self.engine.listeners = [self.run_log.record]
+
+        # Optionally publish every step to telemetry subscribers as well (never blocks the simulation)
+        self.start_telemetry(telemetry_port)
+        if self.telemetry is not None:
+            self.telemetry.set_metadata(metadata)
+            self.engine.listeners.append(self.telemetry.record)
+
+        # Simulate on a worker thread at a fixed timestep, time_scale times faster than real time
+        self.simulation_thread.time_scale = time_scale
+        self.simulation_thread.start()
 
         # Plot the initial point
         self.initial_point.set_data(init_pos[0], init_pos[1])
 
         # Start animation     
-        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False)
+        # Blit rendering redraws only the dynamic artists over a cached background
+        self.blit = self.blit_rendering.get()
+        self.velocity_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.error_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.wheel_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=10, repeat=False, blit=self.blit)
         self.canvas.draw()
 
     # Update animation
     def update(self, frame):
-        x,y,theta = self.robot_motion.position()
-        current_state = [x,y,theta]
-        desired_state, desired_state_d = self.robot_control.calculate_desired_state(self.robot_motion.time_elapsed)
-        vx, vy, w = self.robot_control.calculate_velocity(current_state,desired_state,desired_state_d,self.kp_value)
-        
-        # Saturate velocities if required
-        if self.saturate:
-            vx = np.clip(vx, -self.vx_max, self.vx_max)
-            vy = np.clip(vy, -self.vy_max, self.vy_max)
-            w = np.clip(w, -self.w_max, self.w_max)
-        
-        self.robot_motion.step(vx, vy, w)
-        x, y, theta = self.robot_motion.position()
-        self.robot_simulation.draw_robot([x, y, theta])
-       
-        self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
-
-        self.velocity_graph.add_data(vx, vy, w, self.robot_motion.time_elapsed)
-        self.error_graph.add_data(x,y,theta,desired_state,self.robot_motion.time_elapsed)
-
-        # Append the current position to the path
-        self.path.append((x, y))
-
-        # Draw the path as a blue dashed line
-        if self.path:
-            self.path_x, self.path_y = zip(*self.path)  # Unzip the path into x and y coordinates
-            self.line.set_data(self.path_x, self.path_y)  # Update the line data
+        # Close the timing of the previous frame (including its canvas draw)
+        self.frame_timer.end_frame()
+
+        # Samples simulated by the worker thread since the previous frame (decimated for plotting)
+        samples = self.simulation_thread.take()
+        self.frame_timer.start("plots")
+        for t, x, y, theta, vx, vy, w, desired_state in decimate(samples, self.max_samples_per_frame):
+            self.velocity_graph.add_data(vx, vy, w, t, redraw=False)
+            self.error_graph.add_data(x, y, theta, desired_state, t, redraw=False)
+            self.wheel_graph.add_data(*self.engine.wheel_kinematics.wheel_speed(vx, vy, w), t, redraw=False)
+
+            # Append the position to the path
+            self.path.append(x, y)
+        if samples:
+            self.velocity_graph.redraw()
+            self.error_graph.redraw()
+            self.wheel_graph.redraw()
+        self.frame_timer.stop("plots")
+
+        if samples:
+            # Draw the robot at the latest simulated pose
+            self.frame_timer.start("robot")
+            t, x, y, theta = samples[-1][:4]
+            self.robot_simulation.draw_robot([x, y, theta])
+
+            self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
+
+            # Draw the path as a blue dashed line
+            self.line.set_data(self.path.x(), self.path.y())  # Update the line data
+            self.frame_timer.stop("robot")
+
+        # Live timing overlay (refreshed every 25 frames)
+        if self.show_timings.get():
+            if self.frame_timer.frames % 25 == 0:
+                self.timing_text.set_text(self.frame_timer.summary())
+        elif self.timing_text.get_text():
+            self.timing_text.set_text('')
+
+        # Axis rescales invalidate the cached background
+        if self.blit and (self.velocity_graph.limits_changed or self.error_graph.limits_changed or self.wheel_graph.limits_changed):
+            self.refresh_background()
+
+        return self.dynamic_artists()
+
+    # Redraw the static background (grid, reference path, legends and axes) after an axis rescale
+    def refresh_background(self):
+        self.velocity_graph.limits_changed = False
+        self.error_graph.limits_changed = False
+        self.wheel_graph.limits_changed = False
+        self.canvas.draw()
 
-        return self.robot_simulation.artists
+    # Read the speed multiplier (x real time); None, after showing an error, unless it is positive
+    def read_speed(self):
+        try:
+            speed = float(self.speed_entry.get() or 1.0)
+            if speed <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "The speed must be a positive number.")
+            return None
+        return speed
 
     # Run the simulation
     def run_simulation(self):
+        time_scale = self.read_speed()
+        if time_scale is None:
+            return
         try:
             if self.ani is not None:
                 self.ani.event_source.stop()
                 self.ani._stop()
+            self.simulation_thread.stop()
+            self.frame_timer.clear()
 
             # Clear the path
-            self.path = []
+            self.path.clear()
 
             # Remove the old path line if it exists
             if self.line:
@@ -156,59 +272,167 @@ class PathFollowing:
             self.robot_motion.reset()
             self.velocity_graph.reset_graph()
             self.error_graph.reset_graph()
-            x = float(self.x_entry.get())
-            y = float(self.y_entry.get())
-            angulo = float(self.angle_entry.get())
-            angulo = angulo * (np.pi / 180)
-            init_pos = [x, y, angulo]
-
-            kp_value = float(self.kp_entry.get())
-            if kp_value > 1.0:
-                kp_value = 1.0
-
-            sample_time = float(self.sample_time_entry.get())
-            time_steps = float(self.time_steps_entry.get())
-            self.figure = str(self.figure_interface.get())
-
-            saturate = self.saturate_velocities.get()
-            vx_max = float(self.vx_max_entry.get()) if saturate else None
-            vy_max = float(self.vy_max_entry.get()) if saturate else None
-            w_max = float(self.w_max_entry.get()) if saturate else None
-
-            self.main(init_pos,kp_value,sample_time,time_steps,saturate,vx_max, vy_max, w_max)
+            self.wheel_graph.reset_graph()
+            parameters = self.read_parameters()
+            kp_value = self.read_kp()
+            self.figure = parameters["figure"]
+
+            telemetry_port = int(self.telemetry_entry.get()) if self.telemetry_entry.get() else None
+            self.main(parameters["init_pos"], kp_value, parameters["sample_time"], parameters["steps"], parameters["saturate"],
+                      parameters["vx_max"], parameters["vy_max"], parameters["w_max"], time_scale, parameters["tracking"],
+                      parameters["wheel_max"], parameters["substeps"], parameters["log_every"], telemetry_port)
         except ValueError:
             messagebox.showerror("Error", "Enter the value of all parameters.")
 
-    # Export data to CSV
+    # Read the scenario entered in the interface (everything but kp); raises ValueError if a field is missing
+    def read_parameters(self):
+        x = float(self.x_entry.get())
+        y = float(self.y_entry.get())
+        angulo = float(self.angle_entry.get())
+        angulo = angulo * (np.pi / 180)
+
+        saturate = self.saturate_velocities.get()
+        return {"init_pos": [x, y, angulo],
+                "sample_time": float(self.sample_time_entry.get()),
+                "steps": float(self.time_steps_entry.get()),
+                "figure": str(self.figure_interface.get()),
+                "saturate": saturate,
+                "vx_max": float(self.vx_max_entry.get()) if saturate else None,
+                "vy_max": float(self.vy_max_entry.get()) if saturate else None,
+                "w_max": float(self.w_max_entry.get()) if saturate else None,
+                "wheel_max": float(self.wheel_max_entry.get()) if saturate and self.wheel_max_entry.get() else None,
+                "tracking": "progress" if self.track_progress.get() else "time",
+                "substeps": int(self.substeps_entry.get() or 1),
+                "log_every": int(self.log_every_entry.get() or 1)}
+
+    # Read kp: one gain, or one per axis ("kx, ky, kt"). Gains must be positive
+    def read_kp(self):
+        return parse_kp(self.kp_entry.get())
+
+    # Stop a gain search in progress (its result is dropped)
+    def cancel_auto_tune(self):
+        if self.tune_after is not None:
+            self.root.after_cancel(self.tune_after)
+            self.tune_after = None
+        if self.tune_search is not None:
+            self.tune_search.cancel()
+        self.tune_search = None
+        self.tune_thread = None
+
+    # Search the kp that minimizes the RMS position error of the entered scenario. The search
+    # runs headless simulations on a worker thread (and processes); the result fills the kp field
+    def auto_tune(self):
+        if self.tune_thread is not None:
+            return
+        try:
+            parameters = self.read_parameters()
+        except ValueError:
+            messagebox.showerror("Error", "Enter the value of all parameters.")
+            return
+
+        # Same scenario as a run of one lap (see BatchRunner); missing limits are left free
+        scenario = {name: parameters[name] for name in ("init_pos", "sample_time", "steps", "figure", "vx_max", "vy_max",
+                                                         "w_max", "wheel_max", "tracking", "substeps")}
+        auto_tune = AutoTune(scenario)
+        diagonal = self.tune_diagonal.get()
+        self.tune_result = None
+        self.tune_search = auto_tune
+        self.tune_thread = threading.Thread(target=lambda: setattr(self, "tune_result", auto_tune.tune(diagonal)), daemon=True)
+        self.tune_thread.start()
+        self.tune_button.config(text="Tuning...", state=tk.DISABLED)
+        self.tune_after = self.root.after(200, self.check_auto_tune)
+
+    # Poll the tuning thread from the Tk loop
+    def check_auto_tune(self):
+        self.tune_after = None
+        if self.tune_thread is None or not self.tune_button.winfo_exists():
+            return
+        if self.tune_thread.is_alive():
+            self.tune_after = self.root.after(200, self.check_auto_tune)
+            return
+        self.tune_thread = None
+        self.tune_search = None
+        self.tune_button.config(text="Auto-Tune kp", state=tk.NORMAL)
+        result = self.tune_result
+        if result is None:
+            messagebox.showerror("Error", "The gain search failed.")
+            return
+
+        kp_value = result["kp_value"]
+        self.kp_entry.delete(0, tk.END)
+        self.kp_entry.insert(0, f"{kp_value:g}" if np.ndim(kp_value) == 0 else ", ".join(f"{gain:g}" for gain in kp_value))
+        messagebox.showinfo("Auto-Tune", f"kp = {self.kp_entry.get()}\nRMS position error: {result['cost']:.4f} m\n"
+                                         f"{result['evaluations']} simulations ({result['cache_hits']} reused)")
+
+    # Export data to CSV (derived from the run log) or save the binary run log itself
     def export_data(self):
         try:
-            file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+            if self.run_log is None:
+                messagebox.showwarning("Export Cancelled", "Run a simulation before exporting data.")
+                return
+            file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("Run logs", "*.rlog")])
             if file_path:
-                with open(file_path, 'w', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    writer.writerow(['Time', 'Vx', 'Vy', 'W', 'X Error', 'Y Error', 'Theta Error'])
-                    for t, vx, vy, w, x_err, y_err, t_err in zip(self.velocity_graph.time_steps, 
-                                                                 self.velocity_graph.velocities['vx'], 
-                                                                 self.velocity_graph.velocities['vy'], 
-                                                                 self.velocity_graph.velocities['w'], 
-                                                                 self.error_graph.errors['xerror'], 
-                                                                 self.error_graph.errors['yerror'], 
-                                                                 self.error_graph.errors['terror']):
-                        writer.writerow([t, vx, vy, w, x_err, y_err, t_err])
+                self.run_log.flush()
+                if file_path.endswith(".rlog"):
+                    shutil.copyfile(self.log_path, file_path)
+                else:
+                    run_log = RunLogReader(self.log_path)
+                    run_log.to_csv(file_path)
+                    run_log.close()
                 messagebox.showinfo("Export Successful", "Data exported successfully.")
             else:
                 messagebox.showwarning("Export Cancelled", "No file selected for export.")
         except Exception as e:
             messagebox.showerror("Export Error", f"An error occurred while exporting data: {str(e)}")
 
+    # Export the recorded frame timings to CSV or JSON
+    def export_timings(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")])
+        if file_path:
+            self.frame_timer.export(file_path)
+            messagebox.showinfo("Export Successful", "Timings exported successfully.")
+
+    # Follow a path read from a CSV file of x, y points (closed if the last point repeats the first one)
+    def load_path(self):
+        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if file_path:
+            self.figure_interface.set(file_path)
+
+    # Serve telemetry on port (kept across runs on the same port); None stops it
+    def start_telemetry(self, port):
+        if self.telemetry is not None and self.telemetry_port == port:
+            return
+        self.stop_telemetry()
+        if port is None:
+            return
+        telemetry = TelemetryServer(port=port)
+        try:
+            telemetry.start()
+        except OSError as e:
+            messagebox.showerror("Telemetry Error", f"Telemetry could not be served on port {port}: {str(e)}")
+            return
+        self.telemetry = telemetry
+        self.telemetry_port = port
+
+    def stop_telemetry(self):
+        if self.telemetry is not None:
+            self.telemetry.stop()
+            self.telemetry = None
+
+    # Close the run log of the previous run
+    def close_run_log(self):
+        if self.run_log is not None:
+            self.run_log.close()
+            self.run_log = None
+
     # Simulation Interface
     def create_interface(self):
         # Path Following frame to hold everything
-        self.interface_frame = tk.Frame(self.root)
+        self.interface_frame = tk.Frame(self.window)
         self.interface_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
         # Initialize the frame with buttons
-        self.plot_frame = tk.Frame(self.root)
+        self.plot_frame = tk.Frame(self.window)
         self.plot_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
         # Entry fields and labels for simulation parameters
@@ -232,16 +456,28 @@ class PathFollowing:
         self.time_steps_entry = tk.Entry(self.interface_frame)
         self.time_steps_entry.grid(row=4, column=1)
 
-        tk.Label(self.interface_frame, text="kp Value (from 0 to 1):").grid(row=5, column=0)
+        tk.Label(self.interface_frame, text="kp Value (or kx, ky, kt):").grid(row=5, column=0)
         self.kp_entry = tk.Entry(self.interface_frame)
         self.kp_entry.grid(row=5, column=1)
 
+        # The time step is the control period; the plant can be integrated in finer substeps
+        # and the run log can keep one step in every few
+        tk.Label(self.interface_frame, text="Plant Substeps (default 1):").grid(row=4, column=2)
+        self.substeps_entry = tk.Entry(self.interface_frame)
+        self.substeps_entry.grid(row=4, column=3)
+
+        tk.Label(self.interface_frame, text="Log Every (steps, default 1):").grid(row=5, column=2)
+        self.log_every_entry = tk.Entry(self.interface_frame)
+        self.log_every_entry.grid(row=5, column=3)
+
         # Select buttons to choose between "lemniscata" and "circle"
         tk.Label(self.interface_frame, text="Path Type:").grid(row=6, column=0)
         lemniscata_radio = tk.Radiobutton(self.interface_frame, text="Lemniscata", variable=self.figure_interface, value="lemniscata")
         lemniscata_radio.grid(row=6, column=1, sticky="w")
         circle_radio = tk.Radiobutton(self.interface_frame, text="Circle", variable=self.figure_interface, value="circle")
         circle_radio.grid(row=6, column=1, sticky="e")
+        load_path_button = tk.Button(self.interface_frame, text="Load Path...", command=self.load_path)
+        load_path_button.grid(row=6, column=2)
 
         # Saturation selection
         tk.Label(self.interface_frame, text="Saturate Velocities:").grid(row=7, column=0)
@@ -250,11 +486,20 @@ class PathFollowing:
         saturate_no = tk.Radiobutton(self.interface_frame, text="No", variable=self.saturate_velocities, value=False, command=self.toggle_saturation_fields)
         saturate_no.grid(row=7, column=1, sticky="e")
 
+        # Track the nearest point of the path instead of the point at the current time
+        progress_check = tk.Checkbutton(self.interface_frame, text="Track Path Progress", variable=self.track_progress)
+        progress_check.grid(row=7, column=2)
+
         # Saturation fields
         tk.Label(self.interface_frame, text="Max Velocity X (m/s):").grid(row=8, column=0)
         self.vx_max_entry = tk.Entry(self.interface_frame)
         self.vx_max_entry.grid(row=8, column=1)
         
+        # Live telemetry of every step over a local TCP port (see Telemetry.py)
+        tk.Label(self.interface_frame, text="Telemetry Port (empty: off):").grid(row=9, column=2)
+        self.telemetry_entry = tk.Entry(self.interface_frame)
+        self.telemetry_entry.grid(row=9, column=3)
+
         tk.Label(self.interface_frame, text="Max Velocity Y (m/s):").grid(row=9, column=0)
         self.vy_max_entry = tk.Entry(self.interface_frame)
         self.vy_max_entry.grid(row=9, column=1)
@@ -263,36 +508,66 @@ class PathFollowing:
         self.w_max_entry = tk.Entry(self.interface_frame)
         self.w_max_entry.grid(row=10, column=1)
 
+        # Optional limit of every wheel (the motors saturate per wheel)
+        tk.Label(self.interface_frame, text="Max Wheel Speed (rad/s):").grid(row=8, column=2)
+        self.wheel_max_entry = tk.Entry(self.interface_frame)
+        self.wheel_max_entry.grid(row=8, column=3)
+
+        tk.Label(self.interface_frame, text="Speed (x real time, default 1):").grid(row=11, column=0)
+        self.speed_entry = tk.Entry(self.interface_frame)
+        self.speed_entry.grid(row=11, column=1)
+
         # Hide saturation fields initially
         self.toggle_saturation_fields()
 
         # Buttons to run, export data, and exit the simulation, and back to the previous interface
         run_button = tk.Button(self.interface_frame, text="Run", command=self.run_simulation)
-        run_button.grid(row=11, column=1)
+        run_button.grid(row=12, column=1)
+
+        # Gain search (one gain, or one per axis)
+        self.tune_button = tk.Button(self.interface_frame, text="Auto-Tune kp", command=self.auto_tune)
+        self.tune_button.grid(row=12, column=0)
+
+        diagonal_check = tk.Checkbutton(self.interface_frame, text="Per-axis Gains", variable=self.tune_diagonal)
+        diagonal_check.grid(row=14, column=0)
 
         export_button = tk.Button(self.interface_frame, text="Export Data", command=self.export_data)
-        export_button.grid(row=11, column=2)
+        export_button.grid(row=12, column=2)
 
         exit_button = tk.Button(self.interface_frame, text="Exit", command=self.exit_program)
-        exit_button.grid(row=11, column=3)
+        exit_button.grid(row=12, column=3)
 
         # Back botton
         back_button = tk.Button(self.interface_frame, text="Back", command=self.back)
-        back_button.grid(row=12, column=0)
+        back_button.grid(row=13, column=0)
+
+        # Fast rendering option
+        blit_check = tk.Checkbutton(self.interface_frame, text="Fast Rendering (blit)", variable=self.blit_rendering)
+        blit_check.grid(row=13, column=1)
+
+        # Frame timing overlay and export
+        timings_check = tk.Checkbutton(self.interface_frame, text="Show Timings", variable=self.show_timings)
+        timings_check.grid(row=13, column=2)
+
+        timings_button = tk.Button(self.interface_frame, text="Export Timings", command=self.export_timings)
+        timings_button.grid(row=13, column=3)
 
-        # Set up handling of window close event
-        self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
+        # Set up handling of window close event (the menu handles it when embedded)
+        if self.owns_root:
+            self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
+            signal.signal(signal.SIGINT, self.signal_handler)
 
     def toggle_saturation_fields(self):
         if self.saturate_velocities.get():
             self.vx_max_entry.grid()
             self.vy_max_entry.grid()
             self.w_max_entry.grid()
+            self.wheel_max_entry.grid()
         else:
             self.vx_max_entry.grid_remove()
             self.vy_max_entry.grid_remove()
             self.w_max_entry.grid_remove()
+            self.wheel_max_entry.grid_remove()
     
     # Function to handle Ctrl+C signal
     def signal_handler(self, sig, frame):
@@ -311,9 +586,28 @@ class PathFollowing:
 
     def back(self):
         if self.on_back_callback != None:
-            self.root.destroy()  # Close the simulation windows
+            self.close_simulation()
             self.on_back_callback()
 
+    # Stop the simulation and release its window, figure and canvas
+    def close_simulation(self):
+        if self.ani is not None and self.ani.event_source is not None:
+            self.ani.event_source.stop()
+            self.ani._stop()
+        self.ani = None
+        self.simulation_thread.stop()
+        self.cancel_auto_tune()
+        self.close_run_log()
+        self.stop_telemetry()
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self.canvas.get_tk_widget().destroy()
+        self.fig.clear()
+        if self.owns_root:
+            self.root.destroy()
+        else:
+            self.window.destroy()
+
 if __name__ == "__main__":
     robot_animation = PathFollowing()
     robot_animation.init_simulation()
@@ -0,0 +1,146 @@
+# Import libraries
+import numpy as np
+
+# Projection of positions onto a polyline path: the nearest point of the path, its arc
+# length (path progress) and the signed distance to it (contour error, positive on the
+# left of the direction of travel).
+# A k-d tree indexes points placed along the segments at most `spacing` apart. The nearest
+# indexed point bounds the distance to the path, so only the segments with indexed points
+# inside that bound (plus half the spacing) are projected exactly: the result is the
+# exact nearest point at the cost of a few tree queries instead of a scan of every segment.
+# While tracking, project(position, hint) walks from the previous progress to the nearest
+# local minimum of the distance, a block of segments at a time and never farther than
+# `window` metres of arc length, which keeps the projection on the right branch where a
+# path crosses itself (e.g. the center of the lemniscate).
+#   points: (N, 2) vertices; a closed path ends with a copy of its first vertex
+class PathProjector:
+    def __init__(self, points, closed=False, spacing=None, block=32):
+        from scipy.spatial import cKDTree # Imported on first use: scipy is slow to load
+        self.points = np.asarray(points, dtype='float')[:, :2]
+        self.closed = closed
+        self.starts = self.points[:-1]
+        segments = np.diff(self.points, axis=0)
+        self.lengths = np.hypot(segments[:, 0], segments[:, 1])
+        self.tangents = segments/np.maximum(self.lengths, 1e-12)[:, None]
+        self.s = np.concatenate([[0.0], np.cumsum(self.lengths)]) # Arc length at each vertex
+        self.spacing = spacing if spacing is not None else max(float(np.median(self.lengths)), 1e-9)
+        self.block = block # Segments searched on each side of the current one per walk step
+
+        # Segments for the walk, as flat arrays. A closed path is repeated three times (laps
+        # -1, 0 and +1) so that any window around a progress in [0, length) is a plain slice
+        laps = 3 if closed else 1
+        first_lap = -1 if closed else 0
+        self.walk_x = np.tile(self.starts[:, 0], laps)
+        self.walk_y = np.tile(self.starts[:, 1], laps)
+        self.walk_tx = np.tile(self.tangents[:, 0], laps)
+        self.walk_ty = np.tile(self.tangents[:, 1], laps)
+        self.walk_lengths = np.tile(self.lengths, laps)
+        self.walk_s = np.concatenate([self.s[:-1] + lap*self.s[-1] for lap in range(first_lap, first_lap + laps)] + [[self.s[-1]*(first_lap + laps)]])
+
+        # Index points: every segment start plus intermediate points on the long segments
+        counts = np.maximum(np.ceil(self.lengths/self.spacing).astype(np.int64), 1)
+        segment = np.repeat(np.arange(len(self.lengths)), counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        fraction = (np.arange(len(segment)) - first)/counts[segment]
+        samples = self.starts[segment] + fraction[:, None]*segments[segment]
+        if not closed:
+            samples = np.vstack([samples, self.points[-1:]])
+            segment = np.append(segment, len(self.lengths) - 1)
+        self.sample_segment = segment
+        self.tree = cKDTree(samples)
+
+    # Length of the path (m)
+    def length(self):
+        return float(self.s[-1])
+
+    # Position along (m) and distance to each of the given segments
+    def distances(self, position, segments):
+        offset = position - self.starts[segments]
+        along = np.clip(np.sum(offset*self.tangents[segments], axis=1), 0.0, self.lengths[segments])
+        closest = self.starts[segments] + along[:, None]*self.tangents[segments]
+        return along, np.hypot(*(position - closest).T)
+
+    # Exact projection onto some segments; returns (segment, fraction, distance) of the nearest one
+    def project_segments(self, position, segments):
+        along, distance = self.distances(position, segments)
+        best = int(np.argmin(distance))
+        return self.result(int(segments[best]), along[best], distance[best])
+
+    def result(self, segment, along, distance):
+        fraction = along/self.lengths[segment] if self.lengths[segment] > 0 else 0.0
+        return segment, float(fraction), float(distance)
+
+    # Nearest point over the whole path (k-d tree)
+    def nearest(self, position):
+        distance, _ = self.tree.query(position)
+        candidates = self.sample_segment[self.tree.query_ball_point(position, distance + 0.5*self.spacing + 1e-12)]
+        # An index point at a segment start is also the end of the previous segment
+        previous = candidates - 1
+        if self.closed:
+            previous %= len(self.lengths)
+        segments = np.unique(np.concatenate([candidates, previous[previous >= 0]]))
+        return self.project_segments(position, segments)
+
+    # Position along (m) and distance to the walk segments lo to hi - 1 (a slice, no copies)
+    def walk_distances(self, position, lo, hi):
+        tx = self.walk_tx[lo:hi]
+        ty = self.walk_ty[lo:hi]
+        ox = position[0] - self.walk_x[lo:hi]
+        oy = position[1] - self.walk_y[lo:hi]
+        along = np.minimum(np.maximum(ox*tx + oy*ty, 0.0), self.walk_lengths[lo:hi])
+        dx = ox - along*tx
+        dy = oy - along*ty
+        return along, dx*dx + dy*dy
+
+    # Nearest local minimum of the distance, walking from the segment at arc length s and
+    # staying within `window` of arc length from it
+    def nearest_local(self, position, s, window):
+        window = min(window, self.s[-1]) if self.closed else window
+        low = max(int(np.searchsorted(self.walk_s, s - window, side='right')) - 1, 0)
+        high = min(int(np.searchsorted(self.walk_s, s + window, side='left')), len(self.walk_lengths))
+        high = max(high, low + 1)
+        center = min(max(int(np.searchsorted(self.walk_s, s, side='right')) - 1, low), high - 1)
+        block = self.block
+        best = None
+        while True:
+            lo = max(center - block, low)
+            hi = min(center + block + 1, high)
+            along, distance2 = self.walk_distances(position, lo, hi)
+            k = int(np.argmin(distance2))
+            if best is not None and distance2[k] >= best[1]:
+                break # No improvement: the previous block held the minimum
+            best = (lo + k, distance2[k], along[k])
+
+            # Keep walking only if the minimum is on an edge of the block that the window does not cut
+            if not ((k == 0 and lo > low) or (k == hi - lo - 1 and hi < high)):
+                break
+            center = lo + k
+
+        index, distance2, along = best
+        return self.result(index % len(self.lengths), along, np.sqrt(distance2))
+
+    # Project a position: returns (s, contour_error, segment, fraction).
+    # With a hint (previous s) only the neighbourhood of the hint is searched
+    def project(self, position, hint=None, window=None):
+        position = np.asarray(position, dtype='float')[:2]
+        if hint is None:
+            segment, fraction, distance = self.nearest(position)
+        else:
+            if self.closed:
+                hint = hint % self.s[-1]
+            segment, fraction, distance = self.nearest_local(position, hint, window if window is not None else 0.05*self.s[-1])
+
+        # Sign of the contour error: left (+) or right (-) of the direction of travel
+        tangent = self.tangents[segment]
+        offset = position - self.starts[segment]
+        side = tangent[0]*offset[1] - tangent[1]*offset[0]
+        s = self.s[segment] + fraction*self.lengths[segment]
+        return s, distance if side >= 0 else -distance, segment, fraction
+
+    # Point of the path at arc length s
+    def point(self, s):
+        s = np.asarray(s, dtype='float')
+        if self.closed:
+            s = np.mod(s, self.s[-1])
+        return np.stack([np.interp(s, self.s, self.points[:, 0]),
+                         np.interp(s, self.s, self.points[:, 1])], axis=-1)
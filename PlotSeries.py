@@ -0,0 +1,99 @@
+# Import libraries
+from TimeSeriesBuffer import TimeSeriesBuffer
+from IdleDetector import IdleDetector
+
+# Time plot of three series (the velocity, error and wheel speed plots build on it).
+# Samples are kept in a TimeSeriesBuffer and the lines get about one sample per pixel of
+# the axes, so a redraw costs the same however long the run. Samples are skipped while
+# the three values stay close to zero (see IdleDetector)
+class PlotSeries:
+    def __init__(self, ax, names, labels, ylim, ylabel, idle_window=0.5, idle_tolerance=1e-2, legend_loc=None):
+        # Initialize axis
+        self.ax = ax
+        self.ylim = ylim # Initial y limits, kept until the values leave them
+        self.ax.set_xlim(0, 12)
+        self.ax.set_ylim(*ylim)
+
+        self.names = list(names)
+        self.buffer = TimeSeriesBuffer(self.names)
+        self.idle_detector = IdleDetector(idle_window, idle_tolerance)
+
+        # One line per series
+        self.lines = [self.ax.plot([], [], label=label)[0] for label in labels]
+        self.artists = list(self.lines) # Dynamic artists (redrawn on every frame when blitting)
+
+        # Axis limits. xlim_growth > 1 extends the time axis in chunks instead of on every frame
+        self.xmax = 12
+        self.xlim_growth = 1.0
+        self.limits_changed = False
+
+        # Set up plot
+        if legend_loc is None:
+            self.ax.legend()
+        else:
+            self.ax.legend(loc=legend_loc)
+        self.ax.set_xlabel("Time (s)")
+        self.ax.set_ylabel(ylabel)
+        self.ax.grid()
+
+    # Buffer one sample unless the plot is idle. With redraw=False the sample is only
+    # buffered; call redraw() once after adding a batch
+    def add_sample(self, t, a, b, c, redraw=True):
+        if self.idle_detector.add(t, a, b, c):
+            return
+        self.buffer.append(t, a, b, c)
+        if redraw:
+            self.redraw()
+
+    # Update the plot lines and limits with the buffered samples
+    def redraw(self):
+        if len(self.buffer) == 0:
+            return
+
+        # Update plot lines with new data (about one sample per pixel of the axes, however long the run)
+        time_steps, *values = self.buffer.decimated(self.names, self.max_points())
+        for line, value in zip(self.lines, values):
+            line.set_data(time_steps, value)
+
+        # Adjust plot limits based on time and values
+        t = time_steps[-1]
+        if (t > 12) and (t > self.xmax):
+            self.xmax = t*self.xlim_growth
+            self.set_xlim(0, self.xmax)
+        self.update_ylim()
+
+    # Extend the y axis past the initial limits when the values leave them
+    def update_ylim(self):
+        bottom, top = self.ylim
+        max_value = self.buffer.max_value()
+        min_value = self.buffer.min_value()
+        if max_value > top:
+            self.set_ylim(bottom, (max_value+0.2))
+        elif min_value < bottom:
+            self.set_ylim((min_value-0.2), top)
+
+    # Samples drawn per line: the width of the axes in pixels
+    def max_points(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    # Change the axis limits only if they differ, flagging the change so that a
+    # blitted animation knows it has to refresh its cached background
+    def set_xlim(self, left, right):
+        if self.ax.get_xlim() != (left, right):
+            self.ax.set_xlim(left, right)
+            self.limits_changed = True
+
+    def set_ylim(self, bottom, top):
+        if self.ax.get_ylim() != (bottom, top):
+            self.ax.set_ylim(bottom, top)
+            self.limits_changed = True
+
+    # Function to reset the plot
+    def reset_graph(self):
+        self.xmax = 12
+        self.set_xlim(0, 12)
+        self.set_ylim(*self.ylim)
+        self.buffer.clear()
+        for line in self.lines:
+            line.set_data([], [])
+        self.idle_detector.clear()
@@ -0,0 +1,40 @@
+# Import libraries
+from PlotSeries import PlotSeries
+
+class PlotWheelSpeeds(PlotSeries):
+    def __init__(self, ax, idle_window=0.5, idle_tolerance=1e-2):
+        super().__init__(ax, ["w1", "w2", "w3"], ["wheel 1 (rad/s)", "wheel 2 (rad/s)", "wheel 3 (rad/s)"], (-20, 20), "Wheel speeds",
+                         idle_window, idle_tolerance, legend_loc='upper right')
+
+        # Lines of the wheel speed limit
+        self.limit = None
+        self.limit_lines = [self.ax.axhline(sign*20, color='red', linestyle=':', visible=False) for sign in (1, -1)]
+        self.ymax = 20
+
+    # Show the wheel speed limit as two dotted lines (None hides them)
+    def set_limit(self, wheel_max):
+        self.limit = wheel_max
+        for sign, line in zip((1, -1), self.limit_lines):
+            if wheel_max is not None:
+                line.set_ydata([sign*wheel_max, sign*wheel_max])
+            line.set_visible(wheel_max is not None)
+        if wheel_max is not None and wheel_max + 1 > self.ymax:
+            self.ymax = wheel_max + 1
+            self.set_ylim(-self.ymax, self.ymax)
+
+    # With redraw=False the sample is only buffered; call redraw() after adding a batch
+    def add_data(self, w1, w2, w3, t, redraw=True):
+        self.add_sample(t, w1, w2, w3, redraw)
+
+    # Wheel speeds stay symmetric around 0
+    def update_ylim(self):
+        peak = max(self.buffer.max_value(), -self.buffer.min_value())
+        if peak > self.ymax:
+            self.ymax = peak + 1
+            self.set_ylim(-self.ymax, self.ymax)
+
+    # Function to reset the plot
+    def reset_graph(self):
+        self.ymax = 20 if self.limit is None else max(20, self.limit + 1)
+        self.ylim = (-self.ymax, self.ymax)
+        super().reset_graph()
@@ -0,0 +1,378 @@
+# Import libraries
+from RunLog import open_run_log
+from RobotSimulation import RobotSimulation
+from TrailBuffer import TrailBuffer
+from PlotVelocities import PlotVelocities
+from PlotErrors import PlotErrors
+from PlotWheelSpeeds import PlotWheelSpeeds
+from WheelKinematics import WheelKinematics
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import numpy as np
+from matplotlib.figure import Figure
+import matplotlib.animation as animation
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import signal
+import time
+import sys
+import os
+
+# Plays back a recorded run (binary run log or CSV export) in the simulation view.
+# Playback time follows wall-clock time times the speed; the records played since the
+# previous frame are decimated for plotting. Seeking jumps straight to a time through
+# the log's time index and rebuilds the plots from a decimated overview of the past
+class Replay:
+    def __init__(self):
+        pass
+
+    def init_simulation(self, on_back_callback=None, master=None):
+        self.on_back_callback = on_back_callback
+        self.path = TrailBuffer(tolerance=1e-3)  # Buffer to store the robot's path (simplified within 1 mm)
+        self.ani = None
+        self.log = None
+        self.index = 0 # Number of records already played
+        self.play_time = 0.0
+        self.playing = False
+        self.dragging = False # The seek slider is being dragged
+        self.interval = 10 # Animation frame interval (ms)
+        self.max_samples_per_frame = 20 # Records plotted per frame (the rest are decimated)
+        self.history_samples = 2000 # Records used to rebuild the plots after seeking
+
+        # The replay is built in its own frame: inside master (the menu's window) when
+        # given, otherwise in a new window. The frame is destroyed when going back
+        self.owns_root = master is None
+        self.root = tk.Tk() if self.owns_root else master
+        self.root.title("Replay")
+        if self.owns_root:
+            self.root.attributes('-zoomed', True) # Maximize the window
+        self.window = tk.Frame(self.root)
+        self.window.pack(fill=tk.BOTH, expand=True)
+
+        self.skip_frames = tk.BooleanVar(value=True)
+        self.blit_rendering = tk.BooleanVar(value=False)
+        self.seek_time = tk.DoubleVar(value=0.0)
+
+        self.create_interface()
+
+        # Initialize axis
+        # Figure not registered in pyplot, so it is released with the window
+        self.fig = Figure(figsize=(10, 5))
+        (self.ax, self.ax2, self.ax3, self.ax4) = self.fig.subplots(4, 1, gridspec_kw={'height_ratios': [2, 1, 1, 1]})
+        self.ax.set_xlabel("x (m)")
+        self.ax.set_ylabel("y (m)")
+        self.ax.set_xlim(0, 30)
+        self.ax.set_ylim(0, 20)
+        self.ax.set_aspect('equal')
+        self.ax.grid()
+
+        # Create a text box to display robot coordinates
+        self.text_position = (0.75, 0.75)
+        self.text_box = self.ax.text(self.text_position[0], self.text_position[1], '', bbox=dict(facecolor='white', alpha=0.9))
+
+        # Initialize several objects
+        self.robot_simulation = RobotSimulation(self.ax, delta=30, escala=0.5)
+        self.velocity_graph = PlotVelocities(self.ax2)
+        self.error_graph = PlotErrors(self.ax3)
+        self.wheel_graph = PlotWheelSpeeds(self.ax4)
+        self.wheel_kinematics = WheelKinematics() # Wheel speeds of logs recorded without them
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        # Add a legend to the plot
+        self.reference, = self.ax.plot([], [], 'g:', label='Reference')
+        self.line, = self.ax.plot([], [], 'b--', label='Path')
+        self.ax.legend()
+
+    def init(self):
+        return self.dynamic_artists()
+
+    # Artists that change on every frame (the only ones redrawn when blitting)
+    def dynamic_artists(self):
+        return self.robot_simulation.artists + [self.line, self.text_box] + self.velocity_graph.artists + self.error_graph.artists + self.wheel_graph.artists
+
+    # Load a recorded run and show its first record. The new log is opened and checked
+    # first, so the current run stays loaded if it cannot be read
+    def load(self, file_path):
+        log = open_run_log(file_path)
+        missing = [name for name in ("t", "x", "y", "theta") if name not in log.fields]
+        if missing or len(log) == 0:
+            log.close()
+            raise ValueError(f"The log has no robot pose ({', '.join(missing) or 'no records'})")
+
+        if self.ani is not None:
+            self.ani.event_source.stop()
+            self.ani._stop()
+            self.ani = None
+        if self.log is not None:
+            self.log.close()
+        self.log = log
+        self.start_time = float(self.log[0]["t"])
+        self.end_time = float(self.log[len(self.log) - 1]["t"])
+        self.file_label.config(text=os.path.basename(file_path))
+        self.seek_scale.config(from_=self.start_time, to=self.end_time, resolution=max((self.end_time - self.start_time) / 1000, 1e-3))
+
+        # Reference path and axis limits from a decimated overview of the whole run
+        overview = self.log[self.overview_indices(len(self.log))]
+        x, y = overview["x"], overview["y"]
+        if "xd" in self.log.fields and "yd" in self.log.fields:
+            self.reference.set_data(overview["xd"], overview["yd"])
+            x = np.concatenate([x, overview["xd"]])
+            y = np.concatenate([y, overview["yd"]])
+        else:
+            self.reference.set_data([], [])
+        self.wheel_graph.set_limit(self.log.metadata.get("wheel_max"))
+        margin = 2.0
+        self.ax.set_xlim(np.nanmin(x) - margin, np.nanmax(x) + margin)
+        self.ax.set_ylim(np.nanmin(y) - margin, np.nanmax(y) + margin)
+
+        self.playing = False
+        self.play_button.config(text="Play")
+        self.seek(self.start_time)
+
+        # Start animation
+        # Blit rendering redraws only the dynamic artists over a cached background
+        self.blit = self.blit_rendering.get()
+        self.velocity_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.error_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.wheel_graph.xlim_growth = 1.25 if self.blit else 1.0
+        self.ani = animation.FuncAnimation(self.fig, self.update, init_func=self.init, interval=self.interval, repeat=False, blit=self.blit)
+        self.canvas.draw()
+
+    # At most history_samples evenly spaced indices of the first n records, always including the last one
+    def overview_indices(self, n):
+        if n <= self.history_samples:
+            return np.arange(n)
+        return np.unique(np.linspace(0, n - 1, self.history_samples).astype(np.int64))
+
+    # Value of a field for the given records (NaN if the log does not have it)
+    def field(self, records, name):
+        if name in self.log.fields:
+            return records[name]
+        return np.full(len(records), np.nan)
+
+    # Add records to the plots (redrawn once per batch) and to the trail
+    def add_records(self, records):
+        t = records["t"]
+        x, y, theta = records["x"], records["y"], records["theta"]
+        vx, vy, w = (self.field(records, name) for name in ("vx", "vy", "w"))
+        xerror, yerror, terror = (self.field(records, name) for name in ("xerror", "yerror", "terror"))
+        if "w1" in self.log.fields:
+            w1, w2, w3 = records["w1"], records["w2"], records["w3"]
+        else:
+            w1, w2, w3 = self.wheel_kinematics.wheel_speeds(np.stack([vx, vy, w], axis=-1)).T
+        for i in range(len(records)):
+            self.velocity_graph.add_data(vx[i], vy[i], w[i], t[i], redraw=False)
+            self.error_graph.add_data(x[i], y[i], theta[i], (x[i] + xerror[i], y[i] + yerror[i], theta[i] + terror[i]), t[i], redraw=False)
+            self.wheel_graph.add_data(w1[i], w2[i], w3[i], t[i], redraw=False)
+            self.path.append(x[i], y[i])
+        self.velocity_graph.redraw()
+        self.error_graph.redraw()
+        self.wheel_graph.redraw()
+
+    # Draw the robot at a record
+    def show_record(self, record):
+        x, y, theta = float(record["x"]), float(record["y"]), float(record["theta"])
+        self.robot_simulation.draw_robot([x, y, theta])
+        self.text_box.set_text(f'Robot Coordinates: ({x:.2f}, {y:.2f})')
+        self.line.set_data(self.path.x(), self.path.y())
+        self.time_label.config(text=f"t = {self.play_time:.2f} / {self.end_time:.2f} s")
+
+    # Jump to a time: the plots and trail are rebuilt from a decimated overview of the log up to t
+    def seek(self, t):
+        self.index = self.log.time_index(t) + 1
+        self.play_time = float(self.log[self.index - 1]["t"])
+        self.velocity_graph.reset_graph()
+        self.error_graph.reset_graph()
+        self.wheel_graph.reset_graph()
+        self.path.clear()
+        self.add_records(self.log[self.overview_indices(self.index)])
+        self.show_record(self.log[self.index - 1])
+        self.seek_time.set(self.play_time)
+        self.restart_clock()
+
+    # Playback time is measured from here
+    def restart_clock(self):
+        self.clock_start = time.perf_counter()
+        self.clock_time = self.play_time
+
+    # Update animation
+    def update(self, frame):
+        if self.playing:
+            # Playback time: wall clock times the speed, or a fixed advance per frame if frames are not skipped
+            if self.skip_frames.get():
+                self.play_time = self.clock_time + (time.perf_counter() - self.clock_start) * self.speed
+            else:
+                self.play_time += self.interval / 1000 * self.speed
+                self.restart_clock()
+
+            # Records played since the previous frame (decimated for plotting)
+            target = self.log.time_index(self.play_time) + 1
+            if target > self.index:
+                stride = -(-(target - self.index) // self.max_samples_per_frame) # ceil division
+                indices = np.arange(target - 1, self.index - 1, -stride)[::-1]
+                records = self.log[indices]
+                self.add_records(records)
+                self.index = target
+                self.show_record(records[-1])
+            else:
+                self.time_label.config(text=f"t = {self.play_time:.2f} / {self.end_time:.2f} s")
+            if not self.dragging:
+                self.seek_time.set(min(self.play_time, self.end_time))
+
+            # Stop at the end of the log
+            if self.index >= len(self.log):
+                self.playing = False
+                self.play_button.config(text="Play")
+
+        # Axis rescales invalidate the cached background
+        if self.blit and (self.velocity_graph.limits_changed or self.error_graph.limits_changed or self.wheel_graph.limits_changed):
+            self.refresh_background()
+
+        return self.dynamic_artists()
+
+    # Redraw the static background (grid, reference path, legends and axes) after an axis rescale
+    def refresh_background(self):
+        self.velocity_graph.limits_changed = False
+        self.error_graph.limits_changed = False
+        self.wheel_graph.limits_changed = False
+        self.canvas.draw()
+
+    # Read the speed multiplier
+    def read_speed(self):
+        try:
+            speed = float(self.speed_entry.get() or 1.0)
+            if speed <= 0:
+                raise ValueError
+            self.speed = speed
+            self.restart_clock()
+        except ValueError:
+            messagebox.showerror("Error", "The speed must be a positive number.")
+            return False
+        return True
+
+    # Play or pause
+    def toggle_play(self):
+        if self.log is None:
+            messagebox.showwarning("No Log", "Open a recorded run first.")
+            return
+        if self.playing:
+            self.playing = False
+            self.play_button.config(text="Play")
+        elif self.read_speed():
+            if self.index >= len(self.log):
+                self.seek(self.start_time) # Replay from the start
+            self.restart_clock()
+            self.playing = True
+            self.play_button.config(text="Pause")
+
+    # Seek to the time selected on the slider
+    def seek_to_slider(self):
+        self.dragging = False
+        if self.log is not None:
+            self.seek(self.seek_time.get())
+
+    # Choose a recorded run
+    def open_log(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Run logs", "*.rlog *.csv"), ("All files", "*.*")])
+        if file_path:
+            try:
+                self.load(file_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Open Error", f"The run could not be loaded: {str(e)}")
+
+    # Replay Interface
+    def create_interface(self):
+        # Replay frame to hold everything
+        self.interface_frame = tk.Frame(self.window)
+        self.interface_frame.pack(side=tk.LEFT, padx=10, pady=10)
+
+        # Initialize the frame with the plots and the seek slider
+        self.plot_frame = tk.Frame(self.window)
+        self.plot_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+
+        self.seek_scale = tk.Scale(self.plot_frame, variable=self.seek_time, orient=tk.HORIZONTAL, showvalue=0)
+        self.seek_scale.pack(side=tk.BOTTOM, fill=tk.X)
+        self.seek_scale.bind("<ButtonPress-1>", lambda e: setattr(self, "dragging", True))
+        self.seek_scale.bind("<ButtonRelease-1>", lambda e: self.seek_to_slider())
+
+        # Log selection
+        open_button = tk.Button(self.interface_frame, text="Open Log", command=self.open_log)
+        open_button.grid(row=0, column=0)
+        self.file_label = tk.Label(self.interface_frame, text="No log loaded")
+        self.file_label.grid(row=0, column=1)
+
+        # Playback options
+        tk.Label(self.interface_frame, text="Speed (x real time, default 1):").grid(row=1, column=0)
+        self.speed_entry = tk.Entry(self.interface_frame)
+        self.speed_entry.grid(row=1, column=1)
+        self.speed_entry.bind("<Return>", lambda e: self.read_speed())
+
+        skip_check = tk.Checkbutton(self.interface_frame, text="Skip frames to keep up", variable=self.skip_frames)
+        skip_check.grid(row=2, column=1)
+
+        self.time_label = tk.Label(self.interface_frame, text="t = 0.00 s")
+        self.time_label.grid(row=3, column=1)
+
+        # Buttons to play, exit, and back to the previous interface
+        self.play_button = tk.Button(self.interface_frame, text="Play", command=self.toggle_play)
+        self.play_button.grid(row=4, column=1)
+
+        exit_button = tk.Button(self.interface_frame, text="Exit", command=self.exit_program)
+        exit_button.grid(row=4, column=2)
+
+        # Back botton
+        back_button = tk.Button(self.interface_frame, text="Back", command=self.back)
+        back_button.grid(row=5, column=0)
+
+        # Fast rendering option (applied when a log is opened)
+        blit_check = tk.Checkbutton(self.interface_frame, text="Fast Rendering (blit)", variable=self.blit_rendering)
+        blit_check.grid(row=5, column=1)
+
+        # Set up handling of window close event (the menu handles it when embedded)
+        if self.owns_root:
+            self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
+            signal.signal(signal.SIGINT, self.signal_handler)
+
+    # Function to handle Ctrl+C signal
+    def signal_handler(self, sig, frame):
+        print("Ctrl+C pressed. Exiting...")
+        self.exit_handler()
+
+    # Function to handle program exit
+    def exit_handler(self):
+        print("Exiting...")
+        self.root.quit()
+        sys.exit()
+
+    def exit_program(self):
+        self.root.destroy()
+        os._exit(0)
+
+    def back(self):
+        if self.on_back_callback != None:
+            self.close_simulation()
+            self.on_back_callback()
+
+    # Stop the replay and release its log, window, figure and canvas
+    def close_simulation(self):
+        if self.ani is not None and self.ani.event_source is not None:
+            self.ani.event_source.stop()
+            self.ani._stop()
+        self.ani = None
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        self.canvas.get_tk_widget().destroy()
+        self.fig.clear()
+        if self.owns_root:
+            self.root.destroy()
+        else:
+            self.window.destroy()
+
+if __name__ == "__main__":
+    robot_animation = Replay()
+    robot_animation.init_simulation()
+    if len(sys.argv) > 1:
+        robot_animation.load(sys.argv[1])
+    robot_animation.root.mainloop()
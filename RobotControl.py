@@ -1,34 +1,49 @@
 # Import libraries
+import math
 import numpy as np
 
+# Gain typed in the interfaces: one gain, or one per axis ("kx, ky, kt"). Gains must be positive
+def parse_kp(text):
+    gains = [float(value) for value in text.split(',')]
+    if len(gains) not in (1, 3) or min(gains) <= 0:
+        raise ValueError("kp must be one positive gain or three (kx, ky, kt)")
+    return gains[0] if len(gains) == 1 else gains
+
 class RobotControl: 
     def __init__(self,):
         pass
      
+    # Control law for a single state: qpRef = J^-1 K error.
+    # J is a pure rotation, so J^-1 = J^T and no pseudo-inverse is needed.
+    # kp can be a scalar or one gain per axis (diagonal K)
     def calculate_velocity(self,current_state, desired_state,kp=0.4):
-        # Convert current_state and desired_state to NumPy arrays
-        current_state = np.asarray(current_state, dtype='float')
-        desired_state = np.asarray(desired_state, dtype='float')
-
-        # Jacobian matrix
-        J = np.array([[np.cos(current_state[2]), -np.sin(current_state[2]), 0],
-                      [np.sin(current_state[2]),  np.cos(current_state[2]), 0],
-                      [ 0                      ,  0                       , 1]])
-
-        # Control gain matrix
-        K = kp*np.array([[1, 0, 0],
-                           [0,  1, 0],
-                           [0,  0, 1]])
-        
-        # Calculate error between desired_state and current_state
-        error = desired_state - current_state
-        
-        # Control Law
-        qpRef = np.linalg.pinv(J)@K@error
-
-        # Extract velocity components
-        vx = qpRef[0]
-        vy = qpRef[1]
-        w = qpRef[2]
-
-        return vx, vy, w
\ No newline at end of file
+        x, y, theta = current_state
+        kx, ky, kt = (kp, kp, kp) if np.ndim(kp) == 0 else kp
+
+        # Calculate K times the error between desired_state and current_state
+        ux = kx*(desired_state[0] - x)
+        uy = ky*(desired_state[1] - y)
+        ut = kt*(desired_state[2] - theta)
+
+        # Rotate into the robot frame (J^T)
+        c = math.cos(theta)
+        s = math.sin(theta)
+        vx = c*ux + s*uy
+        vy = -s*ux + c*uy
+        w = ut
+
+        return float(vx), float(vy), float(w)
+
+    # Vectorized control law for many states at once.
+    # current_states and desired_states have shape (N, 3) (or broadcast to it); returns (N, 3) velocities
+    def calculate_velocities(self, current_states, desired_states, kp=0.4):
+        current_states = np.asarray(current_states, dtype='float')
+        desired_states = np.asarray(desired_states, dtype='float')
+
+        u = np.asarray(kp, dtype='float')*(desired_states - current_states)
+        c = np.cos(current_states[..., 2])
+        s = np.sin(current_states[..., 2])
+
+        return np.stack([c*u[..., 0] + s*u[..., 1],
+                         -s*u[..., 0] + c*u[..., 1],
+                         u[..., 2]], axis=-1)
@@ -1,98 +1,160 @@
 # Import libraries
+from Trajectory import make_trajectory
+from PathProjector import PathProjector
+import math
+import os
 import numpy as np
+from functools import lru_cache
+
+# Path labels and colors used when drawing each figure
+PATH_STYLES = {"lemniscata": ("Lemniscata path", 'green'),
+               "circle": ("Circle path", 'orange')}
+
+# Precomputed table of one lap of the path sampled every dt seconds (up to the end point
+# for open paths). Tables are shared between runs (and between batch scenarios in the
+# same process) through a bounded LRU cache; the returned arrays are read-only.
+# For a route file the cache key includes its modification time and size, so a file
+# edited and loaded again is read again instead of reusing the old table
+def path_table(figure, period, center=(10, 10), r=8.0, dt=0.01):
+    source = None
+    if isinstance(figure, str) and os.path.isfile(figure):
+        stat = os.stat(figure)
+        source = (stat.st_mtime_ns, stat.st_size)
+    return cached_path_table(figure, source, period, center, r, dt)
+
+@lru_cache(maxsize=32)
+def cached_path_table(figure, source, period, center, r, dt):
+    trajectory = make_trajectory(figure, period, center, r)
+    n = int(round(trajectory.period/dt)) + (0 if trajectory.closed else 1)
+    t = np.arange(n)*dt
+    desired_state, desired_state_d = trajectory.evaluate(t)
+    for array in (t, desired_state, desired_state_d):
+        array.flags.writeable = False
+    return t, desired_state, desired_state_d
 
 class RobotControlP: 
     def __init__(self,):
         self.draw = None
 
-    # Draw the path based on the selected figure (lemniscata or circle)
-    def draw_path(self, ax, figure="lemniscata", period=40):
-        self.ax = ax
-        self.figure = figure
-        T = period
-
+    # Set the path parameters without drawing anything (used by the headless engine).
+    # figure is a built-in name, a CSV file of points or a Trajectory (see Trajectory.py).
+    # If dt is given, desired states at multiples of dt are read from a cached table.
+    # tracking is "time" (reference at the current time) or "progress" (see calculate_progress_state)
+    def set_path(self, figure="lemniscata", period=40, dt=None, tracking="time"):
         self.center_x = 10
         self.center_y = 10
         self.r = 8.0
-        self.w = 2*np.pi /T
-        t = np.linspace(0, T, int(T*100)) # star, finish, steps
+        self.trajectory = make_trajectory(figure, period, (self.center_x, self.center_y), self.r)
+        self.figure = figure
+        self.period = self.trajectory.period
+        self.w = 2*np.pi /self.period
+
+        self.table_dt = dt
+        self.table = None
+        if dt is not None:
+            self.table = path_table(self.figure, self.period, (self.center_x, self.center_y), self.r, dt)
+            # The table can be wrapped around only if it covers an integer number of steps per lap
+            self.table_periodic = self.trajectory.closed and abs(len(self.table[0])*dt - self.period) <= 1e-9*self.period
+
+        self.tracking = tracking
+        self.projector = None
+        if tracking == "progress":
+            self.vertex_times, points = self.trajectory.vertices()
+            self.projector = PathProjector(points, self.trajectory.closed)
+            self.path_s = None # Arc length of the last projection, within one lap (m)
+            self.laps = 0
+            self.progress = 0.0 # Arc length travelled along the path, counting laps (m)
+            self.contour_error = 0.0 # Signed distance to the path, positive on its left (m)
+        elif tracking != "time":
+            raise ValueError(f"Unknown tracking mode: {tracking}")
+
+    # Draw the path based on the selected figure (lemniscata, circle or an imported path)
+    def draw_path(self, ax, figure="lemniscata", period=40):
+        self.ax = ax
+        self.set_path(figure, period)
 
         # Remove the previous path if it exists
         if self.draw is not None:
             self.draw.remove()
 
-        # Plot path
-        if (self.figure=="lemniscata"):
-            x = self.r * np.sin(self.w*t) + self.center_x
-            y = 0.8*self.r*np.sin(2*self.w*t) + self.center_y
-            self.draw, = self.ax.plot(x, y, label='Lemniscata path', color='green')
-            self.ax.legend()
-            self.ax.set_aspect('equal', 'box')
-
-        elif (self.figure=="circle"):
-            x = self.r*np.cos(self.w*t) + self.center_x
-            y = self.r*np.sin(self.w * t) + self.center_y
-            self.draw, = self.ax.plot(x, y, label='Circle path', color='orange')  
-            self.ax.legend()
-            self.ax.set_aspect('equal', 'box')   
+        # Plot one lap of the path
+        points = self.trajectory.draw_points()
+        label, color = PATH_STYLES.get(self.figure, ("Imported path", 'purple'))
+        self.draw, = self.ax.plot(points[:, 0], points[:, 1], label=label, color=color)
+        self.ax.legend()
+        self.ax.set_aspect('equal', 'box')
 
     # Calculate desired state (position and velocity) based on the selected figure
     def calculate_desired_state(self, t):
-        if (self.figure=="lemniscata"):
-            # Calculate desired position
-            xd = self.r*np.sin(self.w*t) + self.center_x
-            yd = 0.8*self.r*np.sin(2*self.w*t) + self.center_y
-            wd = 0
-            desired_state = [xd, yd, wd]
-
-            # Calculate desired velocity
-            dxdt = self.r*self.w*np.cos(self.w*t)
-            dydt = 1.6*self.r*self.w*np.cos(2*self.w*t)
-            wdt = 0
-            desired_state_d = [dxdt, dydt, wdt]
-
-            return desired_state, desired_state_d 
-
-        elif (self.figure=="circle"):
-            # Calculate Position
-            xd = self.r*np.cos(self.w*t) + self.center_x
-            yd = self.r*np.sin(self.w*t) + self.center_y
-            wd = 0
-            desired_state = [xd, yd, wd]
-
-            # Derivatives with respect to t
-            dxdt = -self.r*self.w*np.sin(self.w*t)
-            dydt = self.r*self.w*np.cos(self.w * t)
-            wdt = 0
-            desired_state_d = [dxdt, dydt, wdt]
-
-            return desired_state, desired_state_d
-
+        if self.table is not None:
+            i = int(round(t/self.table_dt))
+            if abs(t - i*self.table_dt) <= 1e-9*max(t, 1.0):
+                if self.table_periodic:
+                    i %= len(self.table[0])
+                if i < len(self.table[0]):
+                    return self.table[1][i], self.table[2][i]
+
+        return self.trajectory.evaluate(t)
+
+    # Path progress tracking: the reference is the point of the path nearest to the robot,
+    # with the path velocity at that point as feedforward, so only the contour error is
+    # corrected and a robot that falls behind (e.g. saturated) is not pulled across a chord
+    # towards where the clock says it should be. The first projection searches the whole
+    # path; later ones follow the previous projection (see PathProjector.project)
+    def calculate_progress_state(self, current_state):
+        projector = self.projector
+        s, self.contour_error, segment, fraction = projector.project(current_state, self.path_s)
+
+        # Count laps when the projection wraps around the end of a closed path
+        if self.path_s is not None and projector.closed:
+            if s - self.path_s < -0.5*projector.length():
+                self.laps += 1
+            elif s - self.path_s > 0.5*projector.length():
+                self.laps -= 1
+        self.path_s = s
+        self.progress = self.laps*projector.length() + s
+
+        # Path time at the projection
+        t0 = self.vertex_times[segment]
+        path_time = t0 + fraction*(self.vertex_times[segment + 1] - t0)
+
+        # The end of an open path is held (zero feedforward) once the robot reaches it
+        if not projector.closed and segment == len(projector.lengths) - 1 and fraction >= 1.0:
+            path_time = np.inf
+        return self.trajectory.evaluate(path_time)
+
+    # Control law for a single state: qd = J^-1 (desired_state_d + K error).
+    # J is a pure rotation, so J^-1 = J^T and no pseudo-inverse is needed.
+    # kp can be a scalar or one gain per axis (diagonal K)
     def calculate_velocity(self,current_state, desired_state,desired_state_d,kp=0.4):
-        # Convert current_state, desired_state, desired_state_d to NumPy arrays
-        current_state = np.asarray(current_state, dtype='float')
-        desired_state = np.asarray(desired_state, dtype='float')
-        desired_state_d = np.asarray(desired_state_d, dtype='float')
-
-        # Jacobian matrix
-        J = np.array([[np.cos(current_state[2]), -np.sin(current_state[2]), 0],
-                      [np.sin(current_state[2]),  np.cos(current_state[2]), 0],
-                      [ 0                      ,  0                       , 1]])
-
-        # Control gain matrix 
-        K = kp*np.array([[1, 0, 0],
-                           [0,  1, 0],
-                           [0,  0, 1]])
-        
-        # Calculate error between desired_state and current_state
-        error = desired_state - current_state
-        
-        # Control Law
-        qd = np.linalg.pinv(J)@(desired_state_d+K@error) 
-
-        # Extract velocity components
-        vx = qd[0]
-        vy = qd[1]
-        w  = qd[2]
-
-        return vx, vy, w
\ No newline at end of file
+        x, y, theta = current_state
+        kx, ky, kt = (kp, kp, kp) if np.ndim(kp) == 0 else kp
+
+        # Feedforward plus K times the error between desired_state and current_state
+        ux = desired_state_d[0] + kx*(desired_state[0] - x)
+        uy = desired_state_d[1] + ky*(desired_state[1] - y)
+        ut = desired_state_d[2] + kt*(desired_state[2] - theta)
+
+        # Rotate into the robot frame (J^T)
+        c = math.cos(theta)
+        s = math.sin(theta)
+        vx = c*ux + s*uy
+        vy = -s*ux + c*uy
+        w  = ut
+
+        return float(vx), float(vy), float(w)
+
+    # Vectorized control law for many states (robots or time samples) at once.
+    # All state arrays have shape (N, 3) (or broadcast to it); returns (N, 3) velocities
+    def calculate_velocities(self, current_states, desired_states, desired_states_d, kp=0.4):
+        current_states = np.asarray(current_states, dtype='float')
+        desired_states = np.asarray(desired_states, dtype='float')
+        desired_states_d = np.asarray(desired_states_d, dtype='float')
+
+        u = desired_states_d + np.asarray(kp, dtype='float')*(desired_states - current_states)
+        c = np.cos(current_states[..., 2])
+        s = np.sin(current_states[..., 2])
+
+        return np.stack([c*u[..., 0] + s*u[..., 1],
+                         -s*u[..., 0] + c*u[..., 1],
+                         u[..., 2]], axis=-1)
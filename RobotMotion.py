@@ -1,10 +1,19 @@
+from Integrators import make_integrator, exact_arc
+import math
+import time
 import numpy as np
-import scipy.integrate as integrate
 
 class RobotMotion:
-    def __init__(self):
-        self.params = ()
+    # integrator: "exact" (closed-form arc), "euler", "rk4", "rk45" (adaptive) or "odeint" (see Integrators.py);
+    # tolerance: error allowed per step of the adaptive ones (m)
+    def __init__(self, integrator="exact", tolerance=None):
         self.time_elapsed = 0
+        self.integrator = integrator
+        self.solver = make_integrator(integrator, tolerance)
+
+        # With track_error every step is also compared with the exact arc and timed (see integration_report)
+        self.track_error = False
+        self.clear_report()
 
     def get_init_state(self, init_state=[0.0, 0.0, 0.0], dt=0.1): # init_stat 0:x, 1:y, 2:w in rad/s; dt in seconds
         self.init_state = np.asarray(init_state, dtype='float')
@@ -14,22 +23,47 @@ class RobotMotion:
     # Reset the state and time elapsed
     def reset(self):
         self.time_elapsed = 0
+        self.clear_report()
 
     # Return current position (x, y, theta in rad)
     def position(self):
         x, y, theta = self.state
         return x, y, theta
 
-    # Define the differential equations for the motion model
-    def dstate_dt(self, state, t):
-        (vx, vy, w) = self.params
-        dxdt = vx * np.cos(state[2]) - vy * np.sin(state[2])
-        dydt = vx * np.sin(state[2]) + vy * np.cos(state[2])
-        dthetadt = w
-        return [dxdt, dydt, dthetadt]
-
     # Perform one integration step based on the provided velocities
     def step(self, vx, vy, w): # w in rad/s
-        self.params = (vx, vy, w)
-        self.state = integrate.odeint(self.dstate_dt, self.state, [0, self.dt])[1]
-        self.time_elapsed += self.dt
\ No newline at end of file
+        if self.track_error:
+            start = time.perf_counter()
+            state = self.solver.step(self.state, vx, vy, w, self.dt)
+            self.step_time += time.perf_counter() - start
+            exact = exact_arc(self.state, vx, vy, w, self.dt)
+            error = math.hypot(state[0] - exact[0], state[1] - exact[1])
+            self.error_sum += error
+            self.error_max = max(self.error_max, error)
+            self.tracked_steps += 1
+            self.state = state
+        else:
+            self.state = self.solver.step(self.state, vx, vy, w, self.dt)
+        self.time_elapsed += self.dt
+
+    # Restart the statistics of integration_report
+    def clear_report(self):
+        self.solver.evaluations = 0
+        self.solver.steps = 0
+        self.tracked_steps = 0
+        self.step_time = 0.0
+        self.error_sum = 0.0
+        self.error_max = 0.0
+
+    # Cost per step (model evaluations) and, if track_error is on, the achieved local position
+    # error against the exact arc (m) and the time per step of the integrator
+    def integration_report(self):
+        steps = max(self.solver.steps, 1)
+        report = {"integrator": self.integrator,
+                  "steps": self.solver.steps,
+                  "evaluations_per_step": self.solver.evaluations / steps}
+        if self.tracked_steps:
+            report["mean_error"] = self.error_sum / self.tracked_steps
+            report["max_error"] = self.error_max
+            report["us_per_step"] = self.step_time / self.tracked_steps * 1e6
+        return report
@@ -2,6 +2,7 @@
 import numpy as np
 from matplotlib.patches import Rectangle, Circle
 from matplotlib.lines import Line2D
+from matplotlib.transforms import Affine2D
 
 class RobotSimulation:
     def __init__(self, ax, delta, escala):
@@ -15,6 +16,7 @@ class RobotSimulation:
         self.ancho_rueda = 0.25 * self.escala # Width of the wheel scaled
         self.posicion_vertice = np.array([self.L, - self.r_rueda]) # Position of the wheel vertex in local coordinates
         self.artists = [] # List to store graphical objects for plot the robot
+        self.pose_transform = Affine2D() # Local robot frame -> global frame, updated on every frame
         
         # Positions of the wheels in local coordinates
         self.posiciones_ruedas = np.array([
@@ -23,41 +25,54 @@ class RobotSimulation:
             [self.L * np.cos(2 * self.phi), self.L * np.sin(2 * self.phi)]
         ])
 
+        self.build_robot()
+
     # Rotate a point by a given angle around the origin
     def rotate_point(self, point, angle):
         rotation_matrix = np.array([[np.cos(angle), -np.sin(angle)],
                                     [np.sin(angle), np.cos(angle)]])
         return np.dot(point, rotation_matrix.T)
 
-    # Draw the robot at the given global position and orientation
-    def draw_robot(self, P):
-        x_global, y_global, theta = P
-        self.clear_robot() # Clear previous robot drawings
+    # Create the robot artists once, in local coordinates. They are placed in the
+    # global frame through self.pose_transform and start hidden until the first draw
+    def build_robot(self):
+        transform = self.pose_transform + self.ax.transData
 
-        # plot the point
-        posiciones_absolutas_ruedas = self.rotate_point(self.posiciones_ruedas, P[2]) + np.array([x_global, y_global])
-        circle = Circle((x_global, y_global), radius=2.0*self.escala, color='black', fill=False) 
+        circle = Circle((0, 0), radius=2.0*self.escala, color='black', fill=False, transform=transform)
         self.ax.add_patch(circle)
         self.artists.append(circle)
 
-        # Plot each wheel and their connections with the point 
+        # Each wheel and its connection with the center
         for i in range(0, 3):
-            angulo_rotacion_vertice = theta + self.phi * i
-            posicion_absoluta_vertice = self.rotate_point(self.posicion_vertice, angulo_rotacion_vertice) + np.array([x_global, y_global])
-            rect = Rectangle((posicion_absoluta_vertice[0], posicion_absoluta_vertice[1]), self.ancho_rueda, 2 * self.r_rueda, angle=(angulo_rotacion_vertice) * (180 / np.pi), edgecolor='black', facecolor='none')
+            angulo_rotacion_vertice = self.phi * i
+            posicion_vertice = self.rotate_point(self.posicion_vertice, angulo_rotacion_vertice)
+            rect = Rectangle((posicion_vertice[0], posicion_vertice[1]), self.ancho_rueda, 2 * self.r_rueda, angle=(angulo_rotacion_vertice) * (180 / np.pi), edgecolor='black', facecolor='none', transform=transform)
             self.ax.add_patch(rect)
             self.artists.append(rect)
 
-            line = Line2D([x_global, posiciones_absolutas_ruedas[i][0]],
-                          [y_global, posiciones_absolutas_ruedas[i][1]], color='black')
+            line = Line2D([0, self.posiciones_ruedas[i][0]],
+                          [0, self.posiciones_ruedas[i][1]], color='black', transform=transform)
             self.ax.add_line(line)
             self.artists.append(line)
 
-            point = self.ax.plot(x_global, y_global, 'ko', markersize=8 * self.escala)
-            self.artists.append(point[0])
+        # Center point
+        point = Line2D([0], [0], color='black', marker='o', linestyle='None', markersize=8 * self.escala, transform=transform)
+        self.ax.add_line(point)
+        self.artists.append(point)
+
+        for artist in self.artists:
+            artist.set_visible(False)
+
+    # Draw the robot at the given global position and orientation
+    def draw_robot(self, P):
+        x_global, y_global, theta = P
+        self.pose_transform.clear().rotate(theta).translate(x_global, y_global)
+
+        if not self.artists[0].get_visible():
+            for artist in self.artists:
+                artist.set_visible(True)
 
-    # Remove all previously drawn elements of the robot
+    # Hide the robot (the artists are kept and reused by the next draw_robot)
     def clear_robot(self):
         for artist in self.artists:
-            artist.remove()
-        self.artists = []
\ No newline at end of file
+            artist.set_visible(False)
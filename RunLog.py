@@ -0,0 +1,255 @@
+# Import libraries
+import numpy as np
+import threading
+import struct
+import json
+import zlib
+import csv
+
+# Binary run log streamed to disk while a simulation runs.
+#
+# File layout (little endian):
+#   b"OMNILOG1", uint32 header length, UTF-8 JSON header (fields, metadata, compression)
+#   chunks:  b"CHNK", uint32 records, uint8 compressed, 3 pad bytes, float64 first time,
+#            uint64 payload bytes, payload
+# The payload is an array of records with one float64 per field, zlib-compressed when
+# the log is written with compression. Uncompressed chunks are read straight from a
+# memory map, so large logs can be sliced without loading them.
+
+MAGIC = b"OMNILOG1"
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sIB3xdQ")
+
+# Fields of every logged step
+LOG_FIELDS = ["t", "x", "y", "theta", "xd", "yd", "thetad", "vx", "vy", "w", "xerror", "yerror", "terror", "w1", "w2", "w3"]
+
+# Column names used when exporting to CSV
+CSV_NAMES = {"t": "Time", "x": "X", "y": "Y", "theta": "Theta",
+             "xd": "X Desired", "yd": "Y Desired", "thetad": "Theta Desired",
+             "vx": "Vx", "vy": "Vy", "w": "W",
+             "xerror": "X Error", "yerror": "Y Error", "terror": "Theta Error",
+             "w1": "Wheel 1", "w2": "Wheel 2", "w3": "Wheel 3"}
+
+# Writes records in chunks of chunk_size; compress can be False, True or a zlib level (1-9)
+class RunLogWriter:
+    def __init__(self, file_path, fields=LOG_FIELDS, chunk_size=4096, compress=False, metadata=None):
+        self.fields = list(fields)
+        self.dtype = np.dtype([(name, '<f8') for name in self.fields])
+        self.chunk_size = chunk_size
+        self.level = 0 if compress is False else (6 if compress is True else int(compress))
+        self.buffer = np.empty(chunk_size, dtype=self.dtype)
+        self.size = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+        header = json.dumps({"fields": self.fields,
+                             "compression": "zlib" if self.level else None,
+                             "metadata": metadata or {}}).encode()
+        self.file = open(file_path, 'wb')
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    # Add one record (one value per field, in order)
+    def write(self, values):
+        with self.lock:
+            self.buffer[self.size] = values
+            self.size += 1
+            self.count += 1
+            if self.size == self.chunk_size:
+                self.write_chunk()
+
+    # Add one simulation step; signature of a SimulationEngine listener
+    def record(self, t, state, desired_state, velocities, wheel_speeds=(np.nan, np.nan, np.nan)):
+        x, y, theta = state
+        xd, yd, thetad = desired_state
+        vx, vy, w = velocities
+        w1, w2, w3 = wheel_speeds
+        self.write((t, x, y, theta, xd, yd, thetad, vx, vy, w, xd - x, yd - y, thetad - theta, w1, w2, w3))
+
+    def write_chunk(self):
+        if self.size == 0:
+            return
+        payload = self.buffer[:self.size].tobytes()
+        if self.level:
+            payload = zlib.compress(payload, self.level)
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, self.size, bool(self.level), self.buffer[0][0], len(payload)))
+        self.file.write(payload)
+        self.size = 0
+
+    # Write the pending records so that readers can see them
+    def flush(self):
+        with self.lock:
+            self.write_chunk()
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.write_chunk()
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Reads a run log. Indexing with an int, a slice or an array of ints returns records as a structured array;
+# column(name) returns one field. Uncompressed chunks are views of a memory map
+class RunLogReader:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.mmap = np.memmap(file_path, dtype=np.uint8, mode='r')
+
+        if bytes(self.mmap[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{file_path} is not a run log")
+        header_length = struct.unpack("<I", bytes(self.mmap[8:12]))[0]
+        header = json.loads(bytes(self.mmap[12:12 + header_length]))
+        self.fields = header["fields"]
+        self.metadata = header["metadata"]
+        self.dtype = np.dtype([(name, '<f8') for name in self.fields])
+
+        # Index the chunks (a truncated last chunk, e.g. after a crash, is ignored)
+        offsets, counts, compressed, sizes, first_times = [], [], [], [], []
+        offset = 12 + header_length
+        while offset + CHUNK_HEADER.size <= len(self.mmap):
+            magic, n, is_compressed, t_first, nbytes = CHUNK_HEADER.unpack(bytes(self.mmap[offset:offset + CHUNK_HEADER.size]))
+            offset += CHUNK_HEADER.size
+            if magic != CHUNK_MAGIC or offset + nbytes > len(self.mmap):
+                break
+            offsets.append(offset)
+            counts.append(n)
+            compressed.append(bool(is_compressed))
+            sizes.append(nbytes)
+            first_times.append(t_first)
+            offset += nbytes
+
+        self.offsets = offsets
+        self.compressed = compressed
+        self.sizes = sizes
+        self.first_times = np.array(first_times)
+        self.starts = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        self.cache = {} # Last decompressed chunk
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    # Records of one chunk
+    def chunk(self, i):
+        if not self.compressed[i]:
+            return self.mmap[self.offsets[i]:self.offsets[i] + self.sizes[i]].view(self.dtype)
+        if i not in self.cache:
+            payload = zlib.decompress(bytes(self.mmap[self.offsets[i]:self.offsets[i] + self.sizes[i]]))
+            self.cache = {i: np.frombuffer(payload, dtype=self.dtype)}
+        return self.cache[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, (list, np.ndarray)):
+            # Sparse records (e.g. a decimated overview): each chunk is read once
+            indices = np.asarray(key, dtype=np.int64)
+            indices = np.where(indices < 0, indices + len(self), indices)
+            if len(indices) and (indices.min() < 0 or indices.max() >= len(self)):
+                raise IndexError("run log index out of range")
+            chunks = np.searchsorted(self.starts, indices, side='right') - 1
+            records = np.empty(len(indices), dtype=self.dtype)
+            for i in np.unique(chunks):
+                selected = chunks == i
+                records[selected] = self.chunk(i)[indices[selected] - self.starts[i]]
+            return records
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return self[start:stop][::step] if step > 0 else self[stop + 1:start + 1][::step]
+            if start >= stop:
+                return np.empty(0, dtype=self.dtype)
+
+            # Only the chunks overlapping [start, stop) are touched
+            first = int(np.searchsorted(self.starts, start, side='right')) - 1
+            last = int(np.searchsorted(self.starts, stop, side='left')) - 1
+            parts = [self.chunk(i)[max(start - self.starts[i], 0):stop - self.starts[i]] for i in range(first, last + 1)]
+            return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+        index = int(key)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("run log index out of range")
+        i = int(np.searchsorted(self.starts, index, side='right')) - 1
+        return self.chunk(i)[index - self.starts[i]]
+
+    # One field over the whole log (or the slice start:stop)
+    def column(self, name, start=None, stop=None):
+        return np.ascontiguousarray(self[start:stop][name])
+
+    # Index of the last record with time <= t (used for seeking)
+    def time_index(self, t):
+        if len(self) == 0:
+            return 0
+        i = max(int(np.searchsorted(self.first_times, t, side='right')) - 1, 0)
+        j = int(np.searchsorted(self.chunk(i)["t"], t, side='right')) - 1
+        return int(min(max(self.starts[i] + j, 0), len(self) - 1))
+
+    # Export the log (or a slice of it) to CSV, chunk by chunk
+    def to_csv(self, file_path, start=None, stop=None):
+        start, stop, _ = slice(start, stop).indices(len(self))
+        with open(file_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow([CSV_NAMES.get(name, name) for name in self.fields])
+            for i in range(len(self.offsets)):
+                lo = max(start, self.starts[i])
+                hi = min(stop, self.starts[i + 1])
+                if lo < hi:
+                    writer.writerows(self[lo:hi].tolist())
+
+    def close(self):
+        self.cache = {}
+        self.mmap = None
+
+# Run log held in memory (e.g. read from a CSV export), with the reading interface of RunLogReader
+class RunLogArray:
+    def __init__(self, records, metadata=None):
+        self.records = records
+        self.fields = list(records.dtype.names)
+        self.dtype = records.dtype
+        self.metadata = metadata or {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    def column(self, name, start=None, stop=None):
+        return np.ascontiguousarray(self.records[name][start:stop])
+
+    def time_index(self, t):
+        if len(self) == 0:
+            return 0
+        return int(min(max(np.searchsorted(self.records["t"], t, side='right') - 1, 0), len(self) - 1))
+
+    def close(self):
+        pass
+
+# Read a CSV export (headers from CSV_NAMES or field names) into a RunLogArray.
+# Only the columns present in the file become fields; a time column is required
+def read_csv(file_path):
+    names = {header: name for name, header in CSV_NAMES.items()}
+    with open(file_path, newline='') as csvfile:
+        header = next(csv.reader(csvfile))
+    fields = [names.get(column.strip(), column.strip()) for column in header]
+    if "t" not in fields:
+        raise ValueError(f"{file_path} has no time column")
+
+    data = np.loadtxt(file_path, delimiter=',', skiprows=1, ndmin=2)
+    if data.size == 0:
+        data = np.empty((0, len(fields)))
+    records = np.empty(len(data), dtype=[(name, '<f8') for name in fields])
+    for i, name in enumerate(fields):
+        records[name] = data[:, i]
+    return RunLogArray(records, {"source": "csv"})
+
+# Open a binary run log or a CSV export
+def open_run_log(file_path):
+    with open(file_path, 'rb') as f:
+        is_binary = f.read(len(MAGIC)) == MAGIC
+    return RunLogReader(file_path) if is_binary else read_csv(file_path)
@@ -0,0 +1,278 @@
+# Import libraries
+import numpy as np
+import time
+from RobotMotion import RobotMotion
+from RobotControl import RobotControl
+from RobotControlP import RobotControlP
+from WheelKinematics import WheelKinematics
+from RunLog import RunLogWriter
+
+# GUI-free simulation loop shared by the Tk windows and the headless tools.
+# Only numpy/scipy are imported here, never tkinter or matplotlib.
+class SimulationEngine:
+    # mode: "path_following" or "inverse_kinematics"; integrator and tolerance: see RobotMotion
+    def __init__(self, mode="path_following", integrator="exact", tolerance=None):
+        self.mode = mode
+        self.robot_motion = RobotMotion(integrator, tolerance)
+        self.wheel_kinematics = WheelKinematics()
+        self.wheel_speeds = (0.0, 0.0, 0.0) # Wheel speeds (rad/s) of the last step
+
+        if self.mode == "path_following":
+            self.robot_control = RobotControlP()
+        elif self.mode == "inverse_kinematics":
+            self.robot_control = RobotControl()
+        else:
+            raise ValueError(f"Unknown simulation mode: {self.mode}")
+
+        # Optional FrameTimer that receives the reference/control/integration time of every step
+        self.timer = None
+
+        # Callables notified after every step as listener(t, state, desired_state, (vx, vy, w), wheel_speeds),
+        # e.g. RunLogWriter.record
+        self.listeners = []
+
+    # Set the initial conditions and controller parameters of a run
+    def setup(self,
+              init_pos=[2.0, 2.0, 0.0],
+              steps=0.1,
+              kp_value=0.4,
+              figure="lemniscata",
+              sample_time=40.0,
+              final_pose=[0.0, 0.0, 0.0],
+              saturate=False,
+              vx_max=None,
+              vy_max=None,
+              w_max=None,
+              tracking="time", # tracking: "time" or "progress" (path following only, see RobotControlP)
+              wheel_max=None, # wheel_max: wheel speed limit (rad/s), applied after the body limits
+              substeps=1,
+              log_every=1):
+
+        # Multi-rate loop: steps is the control period. The commanded velocities are held
+        # over it (zero-order hold) while the plant is integrated in `substeps` steps of
+        # steps/substeps, and listeners and run() record one control step in every log_every
+        self.steps = steps
+        self.substeps = max(int(substeps), 1)
+        self.log_every = max(int(log_every), 1)
+        self.control_steps = 0
+        self.logged = False # The last step was passed to the listeners
+        self.kp_value = kp_value
+        self.figure = figure
+        self.sample_time = sample_time
+        self.final_pose = np.asarray(final_pose, dtype='float')
+        self.saturate = saturate
+        self.vx_max = vx_max
+        self.vy_max = vy_max
+        self.w_max = w_max
+        self.wheel_max = wheel_max
+        self.tracking = tracking if self.mode == "path_following" else "time"
+
+        if self.mode == "path_following":
+            self.robot_control.set_path(self.figure, self.sample_time, self.steps, self.tracking)
+
+        self.robot_motion.reset()
+        self.robot_motion.get_init_state(init_pos, self.steps / self.substeps)
+
+    # Perform one control + integration step and return the commanded velocities and the reference used
+    def step(self):
+        timer = self.timer
+        if timer is not None:
+            t0 = time.perf_counter()
+
+        current_state = self.robot_motion.state
+
+        if self.tracking == "progress":
+            desired_state, desired_state_d = self.robot_control.calculate_progress_state(current_state)
+            if timer is not None:
+                t1 = time.perf_counter()
+            vx, vy, w = self.robot_control.calculate_velocity(current_state, desired_state, desired_state_d, self.kp_value)
+        elif self.mode == "path_following":
+            desired_state, desired_state_d = self.robot_control.calculate_desired_state(self.robot_motion.time_elapsed)
+            if timer is not None:
+                t1 = time.perf_counter()
+            vx, vy, w = self.robot_control.calculate_velocity(current_state, desired_state, desired_state_d, self.kp_value)
+        else:
+            desired_state = self.final_pose
+            if timer is not None:
+                t1 = time.perf_counter()
+            vx, vy, w = self.robot_control.calculate_velocity(current_state, desired_state, self.kp_value)
+
+        # Saturate velocities if required
+        if self.saturate:
+            vx = max(-self.vx_max, min(vx, self.vx_max))
+            vy = max(-self.vy_max, min(vy, self.vy_max))
+            w = max(-self.w_max, min(w, self.w_max))
+
+        # Motors saturate per wheel: scale the whole twist down (see WheelKinematics.saturate)
+        if self.wheel_max is not None:
+            (vx, vy, w), wheel_speeds = self.wheel_kinematics.saturate(vx, vy, w, self.wheel_max)
+        else:
+            wheel_speeds = self.wheel_kinematics.wheel_speed(vx, vy, w)
+        self.wheel_speeds = wheel_speeds
+
+        if timer is not None:
+            t2 = time.perf_counter()
+
+        for _ in range(self.substeps):
+            self.robot_motion.step(vx, vy, w)
+
+        if timer is not None:
+            t3 = time.perf_counter()
+            timer.add("reference", t1 - t0)
+            timer.add("control", t2 - t1)
+            timer.add("integration", t3 - t2)
+
+        self.control_steps += 1
+        self.logged = False
+        if self.control_steps % self.log_every == 0:
+            self.notify(desired_state, (vx, vy, w))
+
+        return vx, vy, w, desired_state
+
+    # Pass the last step to the listeners (also used by run() for the final step, so that a
+    # run log holds the same samples as the result of run())
+    def notify(self, desired_state, velocities):
+        self.logged = True
+        for listener in self.listeners:
+            listener(self.robot_motion.time_elapsed, self.robot_motion.state, desired_state, velocities, self.wheel_speeds)
+
+    # Run the loop to completion and return the logged time series as NumPy arrays (every
+    # log_every control steps, plus the last one). If stop_tolerance is given, the run ends
+    # as soon as every error component is below it.
+    # With progress tracking the result also holds the path progress and the contour error.
+    # result["integration"] is the cost (and error, if robot_motion.track_error) of the integrator
+    def run(self, total_time, stop_tolerance=None):
+        n = int(round(total_time / self.steps))
+        size = n // self.log_every + 1
+        times = np.empty(size)
+        pose = np.empty((size, 3))
+        desired = np.empty((size, 3))
+        velocities = np.empty((size, 3))
+        wheel_speeds = np.empty((size, 3))
+        progress_tracking = self.tracking == "progress"
+        if progress_tracking:
+            progress = np.empty(size)
+            contour_error = np.empty(size)
+
+        count = 0
+        for i in range(n):
+            vx, vy, w, desired_state = self.step()
+            stop = stop_tolerance is not None and np.all(np.abs(desired_state - self.robot_motion.state) < stop_tolerance)
+            if not (self.logged or stop or i == n - 1):
+                continue
+            if not self.logged:
+                self.notify(desired_state, (vx, vy, w)) # Final or stopping step, off the log_every grid
+
+            times[count] = self.robot_motion.time_elapsed
+            pose[count] = self.robot_motion.state
+            desired[count] = desired_state
+            velocities[count] = (vx, vy, w)
+            wheel_speeds[count] = self.wheel_speeds
+            if progress_tracking:
+                progress[count] = self.robot_control.progress
+                contour_error[count] = self.robot_control.contour_error
+            count += 1
+
+            if stop:
+                break
+
+        result = {"time": times[:count],
+                  "pose": pose[:count],
+                  "desired": desired[:count],
+                  "velocities": velocities[:count],
+                  "wheel_speeds": wheel_speeds[:count],
+                  "errors": desired[:count] - pose[:count],
+                  "integration": self.robot_motion.integration_report()}
+        if progress_tracking:
+            result["progress"] = progress[:count]
+            result["contour_error"] = contour_error[:count]
+        return result
+
+# Run a headless path following simulation (same parameters as PathFollowing.main)
+def run_path_following(init_pos=[2.0, 2.0, 0.0],
+                       kp_value=0.4,
+                       sample_time=40.0,
+                       steps=0.1,
+                       saturate=False,
+                       vx_max=None,
+                       vy_max=None,
+                       w_max=None,
+                       figure="lemniscata",
+                       total_time=None,
+                       integrator="exact",
+                       log_path=None,
+                       compress=False,
+                       tracking="time",
+                       wheel_max=None,
+                       tolerance=None,
+                       substeps=1,
+                       log_every=1):
+
+    engine = SimulationEngine("path_following", integrator, tolerance)
+    engine.setup(init_pos, steps, kp_value, figure, sample_time,
+                 saturate=saturate, vx_max=vx_max, vy_max=vy_max, w_max=w_max, tracking=tracking, wheel_max=wheel_max,
+                 substeps=substeps, log_every=log_every)
+
+    # By default simulate one lap of the path
+    if total_time is None:
+        total_time = sample_time
+    metadata = {"mode": "path_following", "figure": figure, "sample_time": sample_time, "steps": steps, "kp_value": kp_value,
+                "tracking": tracking, "wheel_max": wheel_max, "integrator": integrator, "substeps": substeps, "log_every": log_every}
+    return run_logged(engine, total_time, None, log_path, compress, metadata)
+
+# Run a headless inverse kinematics simulation (same parameters as InverseKinematics.main)
+def run_inverse_kinematics(steps,
+                           init_pos=[2.0, 2.0, 0.0],
+                           final_pose=[0.0, 0.0, 0.0],
+                           kp_value=0.4,
+                           total_time=60.0,
+                           stop_tolerance=1e-3,
+                           integrator="exact",
+                           log_path=None,
+                           compress=False,
+                           tolerance=None,
+                           substeps=1,
+                           log_every=1):
+
+    engine = SimulationEngine("inverse_kinematics", integrator, tolerance)
+    engine.setup(init_pos, steps, kp_value, final_pose=final_pose, substeps=substeps, log_every=log_every)
+    metadata = {"mode": "inverse_kinematics", "final_pose": list(final_pose), "steps": steps, "kp_value": kp_value,
+                "integrator": integrator, "substeps": substeps, "log_every": log_every}
+    return run_logged(engine, total_time, stop_tolerance, log_path, compress, metadata)
+
+# Run the engine, streaming every step to a run log (see RunLog.py) if log_path is given
+def run_logged(engine, total_time, stop_tolerance=None, log_path=None, compress=False, metadata=None):
+    if log_path is None:
+        return engine.run(total_time, stop_tolerance)
+
+    with RunLogWriter(log_path, compress=compress, metadata=metadata) as run_log:
+        engine.listeners.append(run_log.record)
+        try:
+            return engine.run(total_time, stop_tolerance)
+        finally:
+            engine.listeners.remove(run_log.record)
+
+# Summarize the tracking quality of a run returned by SimulationEngine.run
+def tracking_metrics(result):
+    time = result["time"]
+    errors = result["errors"]
+    position_error = np.hypot(errors[:, 0], errors[:, 1])
+    dt = np.diff(time, prepend=0.0)
+
+    metrics = {"samples": len(time),
+               "rms_x": float(np.sqrt(np.mean(errors[:, 0]**2))),
+               "rms_y": float(np.sqrt(np.mean(errors[:, 1]**2))),
+               "rms_theta": float(np.sqrt(np.mean(errors[:, 2]**2))),
+               "rms_position": float(np.sqrt(np.mean(position_error**2))),
+               "max_position": float(position_error.max()),
+               "final_position": float(position_error[-1]),
+               "iae_position": float(np.sum(position_error * dt))}
+
+    if "wheel_speeds" in result:
+        metrics["max_wheel_speed"] = float(np.abs(result["wheel_speeds"]).max())
+
+    # Distance to the path itself (progress tracking only)
+    if "contour_error" in result:
+        metrics["rms_contour"] = float(np.sqrt(np.mean(result["contour_error"]**2)))
+        metrics["max_contour"] = float(np.abs(result["contour_error"]).max())
+    return metrics
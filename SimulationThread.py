@@ -0,0 +1,74 @@
+# Import libraries
+import threading
+import time
+
+# Runs a SimulationEngine on a worker thread with its own fixed timestep (engine.steps).
+# Simulated time follows wall-clock time multiplied by time_scale, independently of how
+# fast the GUI draws. Samples are published through a double buffer: the worker appends
+# to the back buffer and take() swaps it for an empty one, so the GUI gets every sample
+# produced since the previous frame without blocking the simulation.
+# Each sample is (t, x, y, theta, vx, vy, w, desired_state)
+class SimulationThread:
+    def __init__(self, engine, time_scale=1.0, batch_size=1000):
+        if time_scale <= 0:
+            raise ValueError("time_scale must be positive")
+        self.engine = engine
+        self.time_scale = time_scale
+        self.batch_size = batch_size # Max steps simulated before publishing when running behind
+        self.lock = threading.Lock()
+        self.back_buffer = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Start simulating from the engine's current state
+    def start(self):
+        if self.time_scale <= 0: # time_scale may have been changed since __init__
+            raise ValueError("time_scale must be positive")
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Stop the worker and wait for it to finish
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    # Return the samples produced since the last call (swap the buffers)
+    def take(self):
+        with self.lock:
+            samples = self.back_buffer
+            self.back_buffer = []
+        return samples
+
+    # Worker loop
+    def run(self):
+        robot_motion = self.engine.robot_motion
+        dt = self.engine.steps
+        start_time = time.perf_counter() - robot_motion.time_elapsed / self.time_scale
+
+        while not self.stop_event.is_set():
+            target_time = (time.perf_counter() - start_time) * self.time_scale
+
+            # Catch up with wall-clock time, publishing at least every batch_size steps
+            produced = []
+            while robot_motion.time_elapsed + dt <= target_time and len(produced) < self.batch_size:
+                vx, vy, w, desired_state = self.engine.step()
+                x, y, theta = robot_motion.position()
+                produced.append((robot_motion.time_elapsed, x, y, theta, vx, vy, w, desired_state))
+
+            if produced:
+                with self.lock:
+                    self.back_buffer.extend(produced)
+            else:
+                # Sleep until the next step is due
+                wait = (robot_motion.time_elapsed + dt) / self.time_scale - (time.perf_counter() - start_time)
+                self.stop_event.wait(min(max(wait, 0.0), 0.01))
+
+# Keep at most max_samples evenly spaced samples, always including the most recent one
+def decimate(samples, max_samples):
+    stride = -(-len(samples) // max_samples) # ceil division
+    if stride <= 1:
+        return samples
+    return samples[len(samples) - 1::-stride][::-1]
@@ -0,0 +1,255 @@
+# Import libraries
+from RunLog import LOG_FIELDS
+import numpy as np
+import collections
+import threading
+import argparse
+import asyncio
+import socket
+import struct
+import json
+import time
+
+# Live telemetry of the simulation over a local TCP socket.
+#
+# Every frame is a uint32 payload length followed by the payload (little endian). The
+# payload starts with a uint8 frame type:
+#   HELLO_FRAME: UTF-8 JSON {"fields": [...], "metadata": {...}}; sent on connection and
+#                when a new run starts
+#   STATE_FRAME: uint64 sequence number and one float64 per field (the fields of a run log:
+#                pose, desired pose, commanded velocities, errors and wheel speeds)
+# Sequence numbers grow by one per simulation step, so a subscriber can count the frames
+# it missed.
+
+HELLO_FRAME = 0
+STATE_FRAME = 1
+LENGTH = struct.Struct("<I")
+STATE_PAYLOAD = struct.Struct(f"<BQ{len(LOG_FIELDS)}d")
+STATE = struct.Struct(f"<IBQ{len(LOG_FIELDS)}d") # Length prefix and payload, packed at once
+SEND_BUFFER = 65536 # Bytes buffered in each subscriber's socket (about 480 state frames)
+
+# Length-prefixed hello frame with the current metadata
+def hello_frame(metadata):
+    payload = bytes([HELLO_FRAME]) + json.dumps({"fields": LOG_FIELDS, "metadata": metadata}).encode("utf-8")
+    return LENGTH.pack(len(payload)) + payload
+
+# Decode a payload: ("hello", header dict) or ("state", sequence, values)
+def decode_frame(payload):
+    if payload[0] == HELLO_FRAME:
+        return "hello", json.loads(payload[1:].decode("utf-8"))
+    if payload[0] == STATE_FRAME:
+        values = STATE_PAYLOAD.unpack(payload)
+        return "state", values[1], values[2:]
+    raise ValueError(f"Unknown frame type: {payload[0]}")
+
+# One connected client: frames waiting to be written, bounded so that a slow client drops
+# its oldest frames instead of holding memory or slowing anybody else
+class Subscriber:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = collections.deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, frames):
+        overflow = len(self.queue) + len(frames) - self.queue.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.queue.extend(frames)
+        self.ready.set()
+
+# Telemetry server: an asyncio server on its own thread that streams every simulation step
+# to any number of subscribers. record() has the signature of a SimulationEngine listener and
+# never blocks on the network: it packs the frame, appends it to a bounded pending queue and
+# wakes the event loop (once per batch, not per frame). The loop copies pending frames to
+# each subscriber's queue, and each subscriber has a writer task that sends its queue in
+# one write and waits for the socket to drain. A slow subscriber only falls behind on its
+# own queue, losing its oldest frames. If the event loop itself falls behind, the oldest
+# pending frames are lost for every subscriber and counted in their dropped frames.
+class TelemetryServer:
+    def __init__(self, host="127.0.0.1", port=0, queue_size=1000):
+        self.host = host
+        self.port = port # 0 picks a free port (set once started)
+        self.queue_size = queue_size
+        self.metadata = {}
+        self.sequence = 0
+        self.subscribers = set() # Changed only on the event loop thread
+        self.lock = threading.Lock()
+        self.pending = collections.deque(maxlen=queue_size)
+        self.pending_dropped = 0 # Frames pushed out of pending before a dispatch
+        self.wakeup = False # A dispatch is already scheduled
+        self.loop = None
+        self.thread = None
+        self.error = None
+        self.ready = threading.Event()
+
+    # Start serving on a background thread; raises OSError if the port cannot be bound
+    def start(self):
+        self.ready.clear()
+        self.error = None
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            self.thread.join()
+            self.thread = None
+            raise self.error
+
+    # Stop the server and disconnect the subscribers
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    def running(self):
+        return self.thread is not None
+
+    # Event loop thread
+    def serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            server = self.loop.run_until_complete(asyncio.start_server(self.handle, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self.loop.close()
+            self.ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Close the server and cancel the writer tasks
+            server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    # Writer task of one subscriber
+    async def handle(self, reader, writer):
+        # A small kernel send buffer keeps the backlog of a slow subscriber in its queue, where
+        # the oldest frames are dropped, instead of megabytes of stale frames in the socket
+        writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writer.transport.set_write_buffer_limits(high=SEND_BUFFER)
+        subscriber = Subscriber(writer, self.queue_size)
+        subscriber.put([hello_frame(self.metadata)])
+        self.subscribers.add(subscriber)
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.queue:
+                    frames = list(subscriber.queue)
+                    subscriber.queue.clear()
+                    writer.write(b"".join(frames))
+                    await writer.drain() # Only this subscriber waits for its socket
+                    subscriber.sent += len(frames)
+        except (ConnectionError, asyncio.CancelledError): # Subscriber gone or server stopping
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+    # Hand frames to the subscribers (event loop thread)
+    def dispatch(self):
+        with self.lock:
+            frames = list(self.pending)
+            self.pending.clear()
+            dropped = self.pending_dropped
+            self.pending_dropped = 0
+            self.wakeup = False
+        for subscriber in self.subscribers:
+            subscriber.dropped += dropped # Lost for everybody while the loop fell behind
+            subscriber.put(frames)
+
+    # Queue a frame for every subscriber (any thread)
+    def send(self, frame):
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.pending_dropped += 1
+            self.pending.append(frame)
+            if self.wakeup:
+                return
+            self.wakeup = True
+        try:
+            self.loop.call_soon_threadsafe(self.dispatch)
+        except RuntimeError: # The loop was closed
+            pass
+
+    # Describe a new run; the subscribers get it as a hello frame
+    def set_metadata(self, metadata):
+        self.metadata = dict(metadata)
+        if self.subscribers:
+            self.send(hello_frame(self.metadata))
+
+    # Publish one simulation step; signature of a SimulationEngine listener
+    def record(self, t, state, desired_state, velocities, wheel_speeds=(np.nan, np.nan, np.nan)):
+        sequence = self.sequence
+        self.sequence += 1
+        if not self.subscribers: # Nobody listening: nothing to pack
+            return
+        x, y, theta = state
+        xd, yd, thetad = desired_state
+        vx, vy, w = velocities
+        w1, w2, w3 = wheel_speeds
+        self.send(STATE.pack(STATE.size - LENGTH.size, STATE_FRAME, sequence,
+                             t, x, y, theta, xd, yd, thetad, vx, vy, w, xd - x, yd - y, thetad - theta, w1, w2, w3))
+
+    # Frames sent and dropped per connected subscriber
+    def statistics(self):
+        return [{"sent": subscriber.sent, "dropped": subscriber.dropped} for subscriber in list(self.subscribers)]
+
+# Serve a live headless simulation, paced at time_scale times real time
+def main(argv=None):
+    from SimulationEngine import SimulationEngine
+    from SimulationThread import SimulationThread
+
+    parser = argparse.ArgumentParser(description="Simulate a run in real time and publish every step to telemetry subscribers.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=5555, help="TCP port")
+    parser.add_argument("--queue-size", type=int, default=1000, help="frames kept per subscriber before dropping the oldest")
+    parser.add_argument("--mode", choices=["path_following", "inverse_kinematics"], default="path_following")
+    parser.add_argument("--figure", default="lemniscata", help="built-in path or CSV route file")
+    parser.add_argument("--init-pos", type=float, nargs=3, default=[2.0, 2.0, 0.0], metavar=("X", "Y", "THETA"))
+    parser.add_argument("--final-pose", type=float, nargs=3, default=[0.0, 0.0, 0.0], metavar=("X", "Y", "THETA"), help="target of inverse kinematics")
+    parser.add_argument("--kp", type=float, default=0.4, help="controller gain")
+    parser.add_argument("--steps", type=float, default=0.1, help="time step (s)")
+    parser.add_argument("--sample-time", type=float, default=40.0, help="period of the path (s)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="simulated seconds per real second")
+    parser.add_argument("--total-time", type=float, default=None, help="simulated time (default: until interrupted)")
+    args = parser.parse_args(argv)
+
+    engine = SimulationEngine(args.mode)
+    if args.mode == "path_following":
+        engine.setup(args.init_pos, args.steps, args.kp, args.figure, args.sample_time)
+        metadata = {"mode": args.mode, "figure": args.figure, "sample_time": args.sample_time, "steps": args.steps, "kp_value": args.kp}
+    else:
+        engine.setup(args.init_pos, args.steps, args.kp, final_pose=args.final_pose)
+        metadata = {"mode": args.mode, "final_pose": args.final_pose, "steps": args.steps, "kp_value": args.kp}
+
+    server = TelemetryServer(args.host, args.port, args.queue_size)
+    server.start()
+    server.set_metadata(metadata)
+    engine.listeners.append(server.record)
+    print(f"Publishing telemetry on {args.host}:{server.port}")
+
+    simulation_thread = SimulationThread(engine, args.time_scale)
+    simulation_thread.start()
+    try:
+        while args.total_time is None or engine.robot_motion.time_elapsed < args.total_time:
+            time.sleep(0.1)
+            simulation_thread.take() # Nobody plots the samples here
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulation_thread.stop()
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Import libraries
+from Telemetry import LENGTH, decode_frame
+import argparse
+import socket
+import time
+import csv
+import sys
+
+# Stand-in telemetry subscriber: connects to a TelemetryServer, decodes its frames and
+# reports how many steps it received and missed (from the gaps in the sequence numbers).
+# With --delay it sleeps after every frame, like a slow dashboard or logger, which makes
+# the server drop its oldest frames for this subscriber only.
+class TelemetrySubscriber:
+    def __init__(self, host="127.0.0.1", port=5555, timeout=None):
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.socket.makefile('rb')
+        self.header = None
+        self.received = 0
+        self.missed = 0
+        self.last_sequence = None
+
+    # Next frame as decoded by Telemetry.decode_frame, or None when the server closes
+    def read(self):
+        prefix = self.stream.read(LENGTH.size)
+        if len(prefix) < LENGTH.size:
+            return None
+        (length,) = LENGTH.unpack(prefix)
+        payload = self.stream.read(length)
+        if len(payload) < length:
+            return None
+        frame = decode_frame(payload)
+        if frame[0] == "hello":
+            self.header = frame[1]
+        else:
+            sequence = frame[1]
+            if self.last_sequence is not None and sequence > self.last_sequence + 1:
+                self.missed += sequence - self.last_sequence - 1
+            self.last_sequence = sequence
+            self.received += 1
+        return frame
+
+    # Steps as dicts of field -> value, until the server closes or count steps are read
+    def states(self, count=None):
+        while count is None or self.received < count:
+            frame = self.read()
+            if frame is None:
+                return
+            if frame[0] == "state":
+                yield dict(zip(self.header["fields"], frame[2]))
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Subscribe to the simulation telemetry and report the received and missed steps.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("-n", "--count", type=int, default=None, help="stop after this many steps")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to sleep after every step (simulates a slow consumer)")
+    parser.add_argument("-o", "--output", help="CSV file with the received steps")
+    args = parser.parse_args(argv)
+
+    subscriber = TelemetrySubscriber(args.host, args.port)
+    output = open(args.output, 'w', newline='') if args.output else None
+    writer = None
+    last_report = time.perf_counter()
+    try:
+        for state in subscriber.states(args.count):
+            if output is not None:
+                if writer is None:
+                    writer = csv.writer(output)
+                    writer.writerow(["sequence"] + list(state))
+                writer.writerow([subscriber.last_sequence] + [f"{value:.6g}" for value in state.values()])
+            if time.perf_counter() - last_report >= 1.0:
+                last_report = time.perf_counter()
+                print(f"t = {state['t']:.2f} s  received {subscriber.received}  missed {subscriber.missed}", file=sys.stderr)
+            if args.delay > 0:
+                time.sleep(args.delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+        if output is not None:
+            output.close()
+    print(f"Received {subscriber.received} steps, missed {subscriber.missed}")
+
+if __name__ == "__main__":
+    main()
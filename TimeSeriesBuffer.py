@@ -0,0 +1,69 @@
+# Import libraries
+import numpy as np
+
+# Columnar time series storage backed by a preallocated NumPy array.
+# Appends are amortized O(1) (the capacity doubles when full) and the minimum and
+# maximum of every column are tracked as data arrives. time()/column() are views of
+# the stored data; plots should draw decimated(), which is bounded in size, because
+# matplotlib copies and re-caches whatever it is given on every set_data and draw
+class TimeSeriesBuffer:
+    def __init__(self, columns, capacity=1024):
+        self.columns = list(columns)
+        self.index = {name: i + 1 for i, name in enumerate(self.columns)} # Row 0 holds the time
+        self.data = np.empty((len(self.columns) + 1, capacity))
+        self.size = 0
+        self.minimum = np.full(len(self.columns), np.inf)
+        self.maximum = np.full(len(self.columns), -np.inf)
+
+    def __len__(self):
+        return self.size
+
+    # Add one sample (time followed by one value per column)
+    def append(self, t, *values):
+        if self.size == self.data.shape[1]:
+            grown = np.empty((self.data.shape[0], 2 * self.data.shape[1]))
+            grown[:, :self.size] = self.data[:, :self.size]
+            self.data = grown
+
+        self.data[0, self.size] = t
+        self.data[1:, self.size] = values
+        self.size += 1
+
+        # Update running min/max
+        np.minimum(self.minimum, values, out=self.minimum)
+        np.maximum(self.maximum, values, out=self.maximum)
+
+    # View of the stored times
+    def time(self):
+        return self.data[0, :self.size]
+
+    # View of the stored values of one column
+    def column(self, name):
+        return self.data[self.index[name], :self.size]
+
+    # Times and the given columns of at most about max_points samples, as rows of one array:
+    # every stride-th sample plus the most recent one. The stride is a power of two, so the
+    # kept samples stay the same from one call to the next until the stride doubles and the
+    # plotted line does not flicker. The cost depends on max_points, not on the history
+    def decimated(self, names, max_points):
+        stride = 1
+        while self.size > stride * max_points:
+            stride *= 2
+        rows = [0] + [self.index[name] for name in names]
+        data = self.data[rows, :self.size:stride]
+        if self.size > 0 and (self.size - 1) % stride:
+            data = np.column_stack([data, self.data[rows, self.size - 1]])
+        return data
+
+    # Minimum and maximum over all columns and all samples
+    def min_value(self):
+        return float(self.minimum.min())
+
+    def max_value(self):
+        return float(self.maximum.max())
+
+    # Remove all samples, keeping the allocated memory
+    def clear(self):
+        self.size = 0
+        self.minimum.fill(np.inf)
+        self.maximum.fill(-np.inf)
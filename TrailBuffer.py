@@ -0,0 +1,88 @@
+# Import libraries
+import math
+import numpy as np
+
+# Growable buffer with the (x, y) points of the robot trail.
+# Appends are amortized O(1) and x()/y() return views that can be handed to Line2D.set_data.
+#   max_length: if given, only the most recent max_length points are kept
+#   tolerance:  if > 0, the trail is simplified online: a new point that stays within
+#               tolerance (m) of the direction of the current segment extends that
+#               segment instead of adding a vertex
+class TrailBuffer:
+    def __init__(self, max_length=None, tolerance=0.0, capacity=1024):
+        self.max_length = max_length
+        self.tolerance = tolerance
+        if self.max_length is not None:
+            capacity = 2 * self.max_length # Room to slide the window before compacting
+        self.data = np.empty((2, capacity))
+        self.start = 0
+        self.end = 0
+        self.direction = None # Unit direction of the last segment (simplification only)
+        self.along = 0.0      # Length of the last segment along that direction
+
+    def __len__(self):
+        return self.end - self.start
+
+    # Add a point to the trail
+    def append(self, x, y):
+        if self.tolerance > 0 and len(self) >= 1:
+            last_x, last_y = self.data[:, self.end - 1]
+
+            if self.direction is None:
+                # Drop points that do not move away from the last vertex
+                if math.hypot(x - last_x, y - last_y) <= self.tolerance:
+                    return
+            else:
+                # Extend the last segment if the point stays on its line and keeps moving forward
+                anchor_x, anchor_y = self.data[:, self.end - 2]
+                dx, dy = self.direction
+                ex = x - anchor_x
+                ey = y - anchor_y
+                along = ex*dx + ey*dy
+                if along >= self.along and abs(ex*dy - ey*dx) <= self.tolerance:
+                    self.data[0, self.end - 1] = x
+                    self.data[1, self.end - 1] = y
+                    self.along = along
+                    return
+
+        if self.end == self.data.shape[1]:
+            self.make_room()
+
+        self.data[0, self.end] = x
+        self.data[1, self.end] = y
+        self.end += 1
+        if self.max_length is not None and len(self) > self.max_length:
+            self.start += 1
+
+        if self.tolerance > 0 and len(self) >= 2:
+            dx = x - self.data[0, self.end - 2]
+            dy = y - self.data[1, self.end - 2]
+            length = math.hypot(dx, dy)
+            self.direction = (dx / length, dy / length) if length > 0 else None
+            self.along = length
+
+    # Compact the bounded window to the front of the array, or grow the array
+    def make_room(self):
+        size = len(self)
+        if self.max_length is not None:
+            self.data[:, :size] = self.data[:, self.start:self.end]
+        else:
+            grown = np.empty((2, 2 * self.data.shape[1]))
+            grown[:, :size] = self.data[:, self.start:self.end]
+            self.data = grown
+        self.start = 0
+        self.end = size
+
+    # Views of the trail coordinates
+    def x(self):
+        return self.data[0, self.start:self.end]
+
+    def y(self):
+        return self.data[1, self.start:self.end]
+
+    # Remove all points
+    def clear(self):
+        self.start = 0
+        self.end = 0
+        self.direction = None
+        self.along = 0.0
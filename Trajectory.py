@@ -0,0 +1,319 @@
+# Import libraries
+from abc import ABC, abstractmethod
+import numpy as np
+import os
+
+# Reference trajectories for path following.
+# A trajectory covers one lap of `period` seconds: closed trajectories repeat every lap,
+# open ones stop at their end point. Positions, velocities and accelerations are evaluated
+# vectorized for a scalar time or an array of times and have shape (..., 2).
+# Arc length and curvature are tabulated once per trajectory on `samples` points of the
+# lap (on first use), so arc_length(), time_at() and curvature() are binary searches
+class Trajectory(ABC):
+    def __init__(self, period, closed=True, samples=4096):
+        self.period = float(period)
+        self.closed = closed
+        self.samples = samples
+        self.tables = None
+
+    # Time within the lap: wrapped for closed trajectories, clipped for open ones
+    def lap_time(self, t):
+        t = np.asarray(t, dtype='float')
+        if self.closed:
+            return np.mod(t, self.period)
+        return np.clip(t, 0.0, self.period)
+
+    # Subclasses implement _position and _velocity for lap times u in [0, period]
+    @abstractmethod
+    def _position(self, u):
+        pass
+
+    @abstractmethod
+    def _velocity(self, u):
+        pass
+
+    # Central differences of the velocity, unless a subclass knows the acceleration
+    def _acceleration(self, u):
+        h = 1e-5*self.period
+        return (self._velocity(u + h) - self._velocity(u - h)) / (2*h)
+
+    # Signed curvature (vx*ay - vy*ax) / |v|^3 (0 where the trajectory stands still)
+    def _curvature(self, u):
+        v = self._velocity(u)
+        a = self._acceleration(u)
+        speed = np.hypot(v[..., 0], v[..., 1])
+        cross = v[..., 0]*a[..., 1] - v[..., 1]*a[..., 0]
+        return np.divide(cross, speed**3, out=np.zeros_like(cross), where=speed > 1e-12)
+
+    # Arc length from the start of the lap (chords of the tabulated points, unless known exactly)
+    def _arc_length(self, u):
+        points = self._position(u)
+        return np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+
+    def position(self, t):
+        return self._position(self.lap_time(t))
+
+    # Open trajectories stand still before their start and after their end
+    def velocity(self, t):
+        return self.hold(t, self._velocity(self.lap_time(t)))
+
+    def acceleration(self, t):
+        return self.hold(t, self._acceleration(self.lap_time(t)))
+
+    def hold(self, t, values):
+        if self.closed:
+            return values
+        t = np.asarray(t, dtype='float')
+        return np.where(((t >= 0) & (t <= self.period))[..., None], values, 0.0)
+
+    # Direction of motion (rad)
+    def heading(self, t):
+        v = self.velocity(t)
+        return np.arctan2(v[..., 1], v[..., 0])
+
+    # Desired states and their time derivatives in the (..., 3) layout of the controller; theta is kept at 0
+    def evaluate(self, t):
+        position = self.position(t)
+        velocity = self.velocity(t)
+        zeros = np.zeros(position.shape[:-1] + (1,))
+        return np.concatenate([position, zeros], axis=-1), np.concatenate([velocity, zeros], axis=-1)
+
+    # Time, arc length and curvature on samples + 1 points of the lap (built on first use)
+    def build_tables(self):
+        if self.tables is None:
+            t = np.linspace(0.0, self.period, self.samples + 1)
+            self.tables = (t, self._arc_length(t), self._curvature(t))
+        return self.tables
+
+    # Length of one lap (m)
+    def length(self):
+        return float(self.build_tables()[1][-1])
+
+    # Distance travelled along the path at time t (previous laps included when closed)
+    def arc_length(self, t):
+        table_t, table_s, _ = self.build_tables()
+        t = np.asarray(t, dtype='float')
+        s = np.interp(self.lap_time(t), table_t, table_s)
+        if self.closed:
+            s = s + np.floor(t/self.period)*table_s[-1]
+        return s
+
+    # Time at which the distance s has been travelled (inverse of arc_length)
+    def time_at(self, s):
+        table_t, table_s, _ = self.build_tables()
+        s = np.asarray(s, dtype='float')
+        if self.closed:
+            laps = np.floor(s/table_s[-1])
+            return np.interp(s - laps*table_s[-1], table_s, table_t) + laps*self.period
+        return np.interp(s, table_s, table_t)
+
+    # Signed curvature (1/m) at time t
+    def curvature(self, t):
+        table_t, _, table_k = self.build_tables()
+        return np.interp(self.lap_time(t), table_t, table_k)
+
+    # Points of one lap to draw the path (closed trajectories end at their start)
+    def draw_points(self, n=None):
+        return self._position(np.linspace(0.0, self.period, (n or self.samples) + 1))
+
+    # Polyline approximating one lap and the time of each of its vertices (used for projections)
+    def vertices(self):
+        t = np.linspace(0.0, self.period, self.samples + 1)
+        return t, self._position(t)
+
+# Central difference of a vectorized function
+def derivative(function, x, h=1e-6):
+    return (function(x + h) - function(x - h)) / (2*h)
+
+# Curve given by vectorized functions of the phase (0 to 2*pi over one lap).
+# The derivatives with respect to the phase are optional; missing ones are taken numerically
+class ParametricTrajectory(Trajectory):
+    def __init__(self, period, x, y, dx=None, dy=None, ddx=None, ddy=None, closed=True, samples=4096):
+        super().__init__(period, closed, samples)
+        self.x, self.y = x, y
+        self.dx = dx if dx is not None else (lambda phase: derivative(x, phase))
+        self.dy = dy if dy is not None else (lambda phase: derivative(y, phase))
+        self.ddx = ddx if ddx is not None else (lambda phase: derivative(self.dx, phase))
+        self.ddy = ddy if ddy is not None else (lambda phase: derivative(self.dy, phase))
+        self.w = 2*np.pi/self.period
+
+    def _position(self, u):
+        phase = self.w*np.asarray(u)
+        return np.stack(np.broadcast_arrays(self.x(phase), self.y(phase)), axis=-1)
+
+    def _velocity(self, u):
+        phase = self.w*np.asarray(u)
+        return self.w*np.stack(np.broadcast_arrays(self.dx(phase), self.dy(phase)), axis=-1)
+
+    def _acceleration(self, u):
+        phase = self.w*np.asarray(u)
+        return self.w**2*np.stack(np.broadcast_arrays(self.ddx(phase), self.ddy(phase)), axis=-1)
+
+# Built-in figures
+def lemniscate(period, center=(10, 10), r=8.0):
+    center_x, center_y = center
+    return ParametricTrajectory(period,
+                                lambda phase: r*np.sin(phase) + center_x,
+                                lambda phase: 0.8*r*np.sin(2*phase) + center_y,
+                                lambda phase: r*np.cos(phase),
+                                lambda phase: 1.6*r*np.cos(2*phase),
+                                lambda phase: -r*np.sin(phase),
+                                lambda phase: -3.2*r*np.sin(2*phase))
+
+def circle(period, center=(10, 10), r=8.0):
+    center_x, center_y = center
+    return ParametricTrajectory(period,
+                                lambda phase: r*np.cos(phase) + center_x,
+                                lambda phase: r*np.sin(phase) + center_y,
+                                lambda phase: -r*np.sin(phase),
+                                lambda phase: r*np.cos(phase),
+                                lambda phase: -r*np.cos(phase),
+                                lambda phase: -r*np.sin(phase))
+
+# Remove repeated consecutive points; closed paths get their first point appended at the end
+def prepare_points(points, closed):
+    points = np.asarray(points, dtype='float')[:, :2]
+    keep = np.concatenate([[True], np.any(np.diff(points, axis=0) != 0, axis=1)])
+    points = points[keep]
+    if closed and np.any(points[0] != points[-1]):
+        points = np.vstack([points, points[:1]])
+    if len(points) < 2:
+        raise ValueError("A path needs at least two distinct points")
+    return points
+
+# Smooth curve through waypoints (cubic spline, periodic when closed) travelled at constant speed
+class WaypointSpline(Trajectory):
+    def __init__(self, points, period, closed=True, samples=4096):
+        from scipy.interpolate import CubicSpline # Imported on first use: scipy is slow to load
+        super().__init__(period, closed, samples)
+        self.points = prepare_points(points, closed)
+        chord = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(self.points, axis=0).T))])
+        self.spline = CubicSpline(chord, self.points, bc_type='periodic' if closed else 'not-a-knot')
+
+        # Arc length against the spline parameter, to move at constant speed along the curve
+        self.parameter = np.linspace(0.0, chord[-1], 8*samples + 1)
+        curve = self.spline(self.parameter)
+        self.parameter_length = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(curve, axis=0).T))])
+        self.speed = self.parameter_length[-1]/self.period
+
+    # Spline parameter reached at lap time u
+    def parameter_at(self, u):
+        return np.interp(np.asarray(u)*self.speed, self.parameter_length, self.parameter)
+
+    def _position(self, u):
+        return self.spline(self.parameter_at(u))
+
+    def _velocity(self, u):
+        d1 = self.spline(self.parameter_at(u), 1)
+        return self.speed*d1/np.maximum(np.linalg.norm(d1, axis=-1, keepdims=True), 1e-12)
+
+    # Constant speed: only the normal part of the curve's second derivative remains
+    def _acceleration(self, u):
+        q = self.parameter_at(u)
+        d1 = self.spline(q, 1)
+        d2 = self.spline(q, 2)
+        norm2 = np.maximum(np.sum(d1*d1, axis=-1, keepdims=True), 1e-24)
+        normal = d2 - np.sum(d2*d1, axis=-1, keepdims=True)/norm2*d1
+        return self.speed**2*normal/norm2
+
+    def _arc_length(self, u):
+        return np.asarray(u)*self.speed
+
+# Dense polyline (e.g. an imported route) travelled at constant speed.
+# The segments are straight, so the curvature is concentrated at the vertices: each vertex
+# spreads its turning angle evenly over a short zone around it, half the shorter adjacent
+# segment on each side but at most two table spacings. Straight edges have zero curvature and
+# a corner is a spike whose integral is its turning angle, while the zones of a densely
+# sampled smooth route tile the path and give its curvature
+class SampledTrajectory(Trajectory):
+    def __init__(self, points, period, closed=True, samples=4096):
+        super().__init__(period, closed, samples)
+        self.points = prepare_points(points, closed)
+        segments = np.diff(self.points, axis=0)
+        lengths = np.hypot(segments[:, 0], segments[:, 1])
+        self.lengths = np.concatenate([[0.0], np.cumsum(lengths)])
+        self.tangents = segments/lengths[:, None]
+        self.speed = self.lengths[-1]/self.period
+
+        # Turning angle at the vertices (the ends of an open path do not turn; the start of a
+        # closed one turns from the last segment to the first, and is repeated at the end)
+        before = self.tangents[:-1]
+        after = self.tangents[1:]
+        turn = np.arctan2(before[:, 0]*after[:, 1] - before[:, 1]*after[:, 0], np.sum(before*after, axis=1))
+        half = np.minimum(0.5*np.minimum(lengths[:-1], lengths[1:]), 2*self.lengths[-1]/self.samples)
+        vertex_s = self.lengths[1:-1]
+        if closed:
+            first = self.tangents[-1]
+            last = self.tangents[0]
+            wrap = np.arctan2(first[0]*last[1] - first[1]*last[0], first @ last)
+            wrap_half = min(0.5*min(lengths[-1], lengths[0]), 2*self.lengths[-1]/self.samples)
+            vertex_s = self.lengths
+            turn = np.concatenate([[wrap], turn, [wrap]])
+            half = np.concatenate([[wrap_half], half, [wrap_half]])
+
+        # Curvature zones as sorted boundaries: s is inside zone i when it falls between
+        # boundaries 2i and 2i + 1 (the zones never overlap)
+        self.zone_bounds = np.column_stack([vertex_s - half, vertex_s + half]).ravel()
+        self.zone_curvature = turn/np.maximum(2*half, 1e-12)
+
+    def _position(self, u):
+        s = np.clip(np.asarray(u)*self.speed, 0.0, self.lengths[-1])
+        return np.stack([np.interp(s, self.lengths, self.points[:, 0]),
+                         np.interp(s, self.lengths, self.points[:, 1])], axis=-1)
+
+    def _velocity(self, u):
+        i = np.searchsorted(self.lengths, np.asarray(u)*self.speed, side='right') - 1
+        return self.speed*self.tangents[np.clip(i, 0, len(self.tangents) - 1)]
+
+    def _acceleration(self, u):
+        return np.zeros(np.shape(u) + (2,))
+
+    def _curvature(self, u):
+        i = np.searchsorted(self.zone_bounds, np.asarray(u)*self.speed, side='right')
+        inside = i % 2 == 1
+        return np.where(inside, self.zone_curvature[np.minimum(i//2, len(self.zone_curvature) - 1)], 0.0)
+
+    def _arc_length(self, u):
+        return np.asarray(u)*self.speed
+
+    # The polyline itself
+    def vertices(self):
+        return self.lengths/self.speed, self.points
+
+# Read x, y points from the first two columns of a CSV file (a header line is allowed)
+def read_points(file_path):
+    with open(file_path) as f:
+        first_line = f.readline()
+    try:
+        [float(value) for value in first_line.split(',')[:2]]
+        skip = 0
+    except ValueError:
+        skip = 1
+    return np.loadtxt(file_path, delimiter=',', skiprows=skip, usecols=(0, 1), ndmin=2)
+
+# Trajectory from a CSV file of points: a polyline, or a spline through them if spline=True.
+# The path is closed if its last point repeats the first one (unless closed is given)
+def load_path(file_path, period, spline=False, closed=None):
+    points = read_points(file_path)
+    if closed is None:
+        closed = len(points) > 2 and np.allclose(points[0], points[-1])
+    if spline:
+        return WaypointSpline(points, period, closed)
+    return SampledTrajectory(points, period, closed)
+
+# Trajectories selectable by name
+TRAJECTORIES = {"lemniscata": lemniscate,
+                "circle": circle}
+
+# Build the trajectory for a figure: a name in TRAJECTORIES, the path of a CSV file of
+# points (a polyline, or a spline through them if spline=True), or a Trajectory (used as is).
+# The engine and the interfaces pass figures by name or file path, so they load routes as
+# polylines; to follow a spline route there, pass the Trajectory from load_path(..., spline=True)
+def make_trajectory(figure, period, center=(10, 10), r=8.0, spline=False):
+    if isinstance(figure, Trajectory):
+        return figure
+    if figure in TRAJECTORIES:
+        return TRAJECTORIES[figure](period, center, r)
+    if isinstance(figure, str) and os.path.isfile(figure):
+        return load_path(figure, period, spline)
+    raise ValueError(f"Unknown path: {figure}")
@@ -0,0 +1,321 @@
+# Import libraries
+from RunLog import open_run_log, RunLogReader, RunLogArray
+from RobotSimulation import RobotSimulation
+from PlotVelocities import PlotVelocities
+from PlotErrors import PlotErrors
+from PlotWheelSpeeds import PlotWheelSpeeds
+from WheelKinematics import WheelKinematics
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+import multiprocessing
+import numpy as np
+import subprocess
+import tempfile
+import argparse
+import shutil
+import os
+
+# Columns drawn in every frame
+COLUMNS = ["t", "x", "y", "theta", "xd", "yd", "vx", "vy", "w", "xerror", "yerror", "terror", "w1", "w2", "w3"]
+
+# Name of the n-th frame in a frame directory
+FRAME_NAME = "frame_%06d.png"
+
+# Columns of some records of a run log (a structured array). Missing fields are NaN and the
+# wheel speeds of logs recorded without them are derived from vx, vy and w
+def record_columns(records):
+    fields = records.dtype.names
+    columns = {}
+    for name in COLUMNS:
+        columns[name] = records[name] if name in fields else np.full(len(records), np.nan)
+    if "w1" not in fields:
+        wheels = WheelKinematics().wheel_speeds(np.column_stack([columns["vx"], columns["vy"], columns["w"]]))
+        columns["w1"], columns["w2"], columns["w3"] = wheels.T
+    return columns
+
+# Columns of the result of a headless run (SimulationEngine.run)
+def result_columns(result):
+    columns = {"t": result["time"]}
+    for i, name in enumerate(("x", "y", "theta")):
+        columns[name] = result["pose"][:, i]
+    columns["xd"], columns["yd"] = result["desired"][:, 0], result["desired"][:, 1]
+    for i, name in enumerate(("vx", "vy", "w")):
+        columns[name] = result["velocities"][:, i]
+    for i, name in enumerate(("xerror", "yerror", "terror")):
+        columns[name] = result["errors"][:, i]
+    for i, name in enumerate(("w1", "w2", "w3")):
+        columns[name] = result["wheel_speeds"][:, i]
+    return columns
+
+# Run log of a source: the path of a binary run log (memory-mapped) or CSV export, the result
+# of a headless run, a dict of columns, or records of a run log. Compressed logs are
+# decompressed once, as every frame reads records from all over the log
+def open_source(source):
+    if isinstance(source, str):
+        log = open_run_log(source)
+        missing = [name for name in ("t", "x", "y", "theta") if name not in log.fields]
+        if missing or len(log) == 0:
+            log.close()
+            raise ValueError(f"The log has no robot pose ({', '.join(missing) or 'no records'})")
+        if isinstance(log, RunLogReader) and any(log.compressed):
+            records, metadata = log[:], log.metadata
+            log.close()
+            return RunLogArray(records, metadata)
+        return log
+    if isinstance(source, np.ndarray):
+        return RunLogArray(source)
+    columns = result_columns(source) if "pose" in source else {name: np.asarray(source[name], dtype='float') for name in COLUMNS}
+    records = np.empty(len(columns["t"]), dtype=[(name, '<f8') for name in COLUMNS])
+    for name in COLUMNS:
+        records[name] = columns[name]
+    return RunLogArray(records)
+
+# Render some frames of a source into a directory (module level so that worker processes can run it)
+def render_chunk(task):
+    source, settings, layout, numbers, directory, compress_level = task
+    renderer = VideoRenderer(source, layout=layout, **settings)
+    try:
+        renderer.write_frames(numbers, directory, compress_level)
+    finally:
+        renderer.close()
+    return len(numbers)
+
+# Offscreen renderer of a finished run: the simulation view of the GUI (robot, trail,
+# reference, velocities, errors and wheel speeds) drawn on an Agg canvas at a fixed frame
+# rate, independent of how long each frame takes to draw. Frame k shows the last record at
+# time t0 + k*speed/fps. The axes are fixed for the whole run, so the static background is
+# drawn once and every frame only rasterizes the dynamic artists over it. Frames are
+# independent of each other and are split in chunks among worker processes, each with its
+# own figure. The parent works out the layout once and hands it to the workers: the frame
+# records through the log's time index, and the axis limits and reference line from a
+# decimated overview of at most max_points records. Every worker reopens a run log source:
+# an uncompressed binary log is memory-mapped and each frame reads only the records it draws,
+# while CSV exports and compressed logs are read whole.
+class VideoRenderer:
+    def __init__(self, source, fps=30, speed=1.0, size=(10, 8), dpi=100, max_points=2000, layout=None):
+        if fps <= 0 or speed <= 0:
+            raise ValueError("The frame rate and the speed must be positive")
+        self.log = open_source(source)
+        self.metadata = dict(self.log.metadata)
+        self.source = source if isinstance(source, str) else self.log.records # What the workers open
+        self.fps = fps
+        self.speed = speed
+        self.settings = {"fps": fps, "speed": speed, "size": tuple(size), "dpi": dpi, "max_points": max_points}
+        self.max_points = max_points # Points per line and frame (older samples are decimated)
+        self.layout = layout if layout is not None else self.run_layout()
+        self.frames = self.layout["frames"]
+
+        # Figure not registered in pyplot, drawn on its own Agg canvas (same layout as the replay)
+        self.fig = Figure(figsize=size, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        (self.ax, self.ax2, self.ax3, self.ax4) = self.fig.subplots(4, 1, gridspec_kw={'height_ratios': [2, 1, 1, 1]})
+        self.ax.set_xlabel("x (m)")
+        self.ax.set_ylabel("y (m)")
+        self.ax.set_aspect('equal')
+        self.ax.grid()
+        self.text_box = self.ax.text(0.02, 0.8, '', transform=self.ax.transAxes, bbox=dict(facecolor='white', alpha=0.9))
+
+        self.robot_simulation = RobotSimulation(self.ax, delta=30, escala=0.5)
+        self.velocity_graph = PlotVelocities(self.ax2)
+        self.error_graph = PlotErrors(self.ax3)
+        self.wheel_graph = PlotWheelSpeeds(self.ax4)
+
+        self.reference, = self.ax.plot(*self.layout["reference"], 'g:', label='Reference')
+        self.line, = self.ax.plot([], [], 'b--', label='Path')
+        self.ax.legend()
+        self.set_limits()
+        self.fig.tight_layout()
+
+        # Static background, drawn while the dynamic artists are still empty or hidden
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    # Frame records, axis limits and reference line of the whole run. The limits and the
+    # reference come from a decimated overview (the records drawn in the last frame), so the
+    # layout handed to the workers stays small however long the run
+    def run_layout(self):
+        last = len(self.log) - 1
+        overview = record_columns(self.log[self.history(last)])
+        return {"frames": self.frame_indices(),
+                "limits": self.run_limits(overview),
+                "reference": (overview["xd"], overview["yd"])}
+
+    # Record shown in each frame (found through the log's time index)
+    def frame_indices(self):
+        last = len(self.log) - 1
+        t_first = float(self.log[0]["t"])
+        duration = float(self.log[last]["t"]) - t_first
+        count = int(np.floor(duration * self.fps / self.speed + 1e-9)) + 1
+        indices = np.array([self.log.time_index(t) for t in t_first + np.arange(count) * self.speed / self.fps], dtype=np.int64)
+        if indices[-1] != last:
+            indices = np.append(indices, last) # Always end on the last record
+        return indices
+
+    # Axis limits from records spread over the whole run: (low, high) of every axis; the wheel speeds by their peak
+    def run_limits(self, columns):
+        limits = {}
+        margin = 2.0
+        x = np.concatenate([columns["x"], columns["xd"]])
+        y = np.concatenate([columns["y"], columns["yd"]])
+        limits["x"] = (np.nanmin(x) - margin, np.nanmax(x) + margin)
+        limits["y"] = (np.nanmin(y) - margin, np.nanmax(y) + margin)
+
+        t = columns["t"]
+        limits["t"] = (t[0], max(t[-1], t[0] + 1e-3))
+        for key, names in (("velocities", ("vx", "vy", "w")), ("errors", ("xerror", "yerror", "terror"))):
+            values = np.concatenate([columns[name] for name in names])
+            values = values[np.isfinite(values)]
+            if len(values):
+                pad = max(0.1 * (values.max() - values.min()), 0.1)
+                limits[key] = (values.min() - pad, values.max() + pad)
+
+        wheels = np.abs(np.concatenate([columns["w1"], columns["w2"], columns["w3"]]))
+        limits["wheels"] = np.nanmax(wheels) if np.any(np.isfinite(wheels)) else 0.0
+        return limits
+
+    # Set the axis limits of the layout
+    def set_limits(self):
+        limits = self.layout["limits"]
+        self.ax.set_xlim(*limits["x"])
+        self.ax.set_ylim(*limits["y"])
+        for ax in (self.ax2, self.ax3, self.ax4):
+            ax.set_xlim(*limits["t"])
+        for ax, key in ((self.ax2, "velocities"), (self.ax3, "errors")):
+            if key in limits:
+                ax.set_ylim(*limits[key])
+
+        # Wheel speeds symmetric around 0, with the wheel speed limit of the run if it had one
+        self.wheel_graph.set_limit(self.metadata.get("wheel_max"))
+        peak = max(limits["wheels"], self.wheel_graph.limit or 0.0)
+        self.ax4.set_ylim(-(peak + 1), peak + 1)
+
+    # Artists that change on every frame
+    def dynamic_artists(self):
+        return self.robot_simulation.artists + [self.line, self.text_box] + self.velocity_graph.artists + self.error_graph.artists + self.wheel_graph.artists
+
+    # Records drawn up to record i: at most max_points evenly spaced ones, always including i
+    def history(self, i):
+        stride = -(-(i + 1) // self.max_points) # ceil division
+        if stride == 1:
+            return slice(0, i + 1)
+        return np.append(np.arange(0, i, stride), i)
+
+    # Draw frame number `number` on the canvas (only the records drawn are read from the log)
+    def draw_frame(self, number):
+        i = int(self.frames[number])
+        columns = record_columns(self.log[self.history(i)]) # The last record is i
+        t = columns["t"]
+
+        self.line.set_data(columns["x"], columns["y"])
+        for graph, names in ((self.velocity_graph, ("vx", "vy", "w")),
+                             (self.error_graph, ("xerror", "yerror", "terror")),
+                             (self.wheel_graph, ("w1", "w2", "w3"))):
+            for line, name in zip(graph.artists, names):
+                line.set_data(t, columns[name])
+
+        x, y, theta = float(columns["x"][-1]), float(columns["y"][-1]), float(columns["theta"][-1])
+        self.robot_simulation.draw_robot([x, y, theta])
+        self.text_box.set_text(f't = {t[-1]:.2f} s\nRobot Coordinates: ({x:.2f}, {y:.2f})')
+
+        self.canvas.restore_region(self.background)
+        for artist in self.dynamic_artists():
+            artist.axes.draw_artist(artist)
+
+    # Current canvas as an RGB image
+    def image(self):
+        return Image.frombuffer("RGBA", self.canvas.get_width_height(), self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+
+    # Draw the given frames and save them as PNG files in directory
+    def write_frames(self, numbers, directory, compress_level=6):
+        for number in numbers:
+            self.draw_frame(number)
+            self.image().save(os.path.join(directory, FRAME_NAME % number), compress_level=compress_level)
+
+    # Render every frame into directory as a PNG sequence, split among `workers` processes
+    # (default: all cores). Returns the number of frames
+    def render_frames(self, directory, workers=None, compress_level=6):
+        os.makedirs(directory, exist_ok=True)
+        numbers = np.arange(len(self.frames))
+        workers = max(1, min(workers or os.cpu_count(), len(numbers)))
+        if workers == 1:
+            self.write_frames(numbers, directory, compress_level)
+        else:
+            # Workers are started with spawn, which is safe from the threaded GUI processes
+            tasks = [(self.source, self.settings, self.layout, chunk, directory, compress_level) for chunk in np.array_split(numbers, workers)]
+            with multiprocessing.get_context("spawn").Pool(workers) as pool:
+                pool.map(render_chunk, tasks)
+        return len(numbers)
+
+    # Render the run to output: a directory of PNG frames (no extension), an animated .gif,
+    # or a video file (.mp4, .webm, ...) encoded with ffmpeg
+    def render(self, output, workers=None):
+        extension = os.path.splitext(output)[1].lower()
+        if extension == "":
+            return self.render_frames(output, workers)
+        if extension != ".gif" and shutil.which("ffmpeg") is None:
+            raise RuntimeError(f"ffmpeg is needed to write {extension} files; write a .gif or a frame directory instead")
+
+        # Intermediate frames are compressed lightly: they are read back once
+        with tempfile.TemporaryDirectory() as directory:
+            count = self.render_frames(directory, workers, compress_level=1)
+            if extension == ".gif":
+                write_gif(directory, count, output, self.fps)
+            else:
+                subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-framerate", str(self.fps),
+                                "-i", os.path.join(directory, FRAME_NAME),
+                                "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", output], check=True)
+        return count
+
+    def close(self):
+        self.log.close()
+
+# Join a frame directory into an animated GIF (frames are read one at a time)
+def write_gif(directory, count, output, fps):
+    frames = (Image.open(os.path.join(directory, FRAME_NAME % number)).convert("P", palette=Image.ADAPTIVE) for number in range(count))
+    first = next(frames)
+    first.save(output, save_all=True, append_images=frames, duration=round(1000 / fps), loop=0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a finished run offscreen as a frame sequence, GIF or video.")
+    parser.add_argument("log", nargs="?", help="run log (.rlog) or CSV export; without it a headless run is simulated")
+    parser.add_argument("-o", "--output", required=True, help="frame directory, .gif, or video file (.mp4, .webm, ... needs ffmpeg)")
+    parser.add_argument("--fps", type=float, default=30, help="frames per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated seconds per second of video")
+    parser.add_argument("--size", type=float, nargs=2, default=[10, 8], metavar=("W", "H"), help="figure size (inches)")
+    parser.add_argument("--dpi", type=int, default=100, help="pixels per inch")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    simulation = parser.add_argument_group("simulated run (when no log is given)")
+    simulation.add_argument("--mode", choices=["path_following", "inverse_kinematics"], default="path_following")
+    simulation.add_argument("--figure", default="lemniscata", help="built-in path or CSV route file")
+    simulation.add_argument("--init-pos", type=float, nargs=3, default=[2.0, 2.0, 0.0], metavar=("X", "Y", "THETA"))
+    simulation.add_argument("--final-pose", type=float, nargs=3, default=[0.0, 0.0, 0.0], metavar=("X", "Y", "THETA"), help="target of inverse kinematics")
+    simulation.add_argument("--kp", type=float, default=0.4, help="controller gain")
+    simulation.add_argument("--steps", type=float, default=0.1, help="time step (s)")
+    simulation.add_argument("--sample-time", type=float, default=40.0, help="period of the path (s)")
+    simulation.add_argument("--total-time", type=float, default=None, help="simulated time (default: one lap, or 60 s for inverse kinematics)")
+    simulation.add_argument("--wheel-max", type=float, default=None, help="saturate the wheel speeds (rad/s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = args.log
+        if log_path is None:
+            # The simulated run is logged so that the workers can read it from disk
+            from SimulationEngine import run_path_following, run_inverse_kinematics
+            log_path = os.path.join(directory, "run.rlog")
+            if args.mode == "path_following":
+                run_path_following(init_pos=args.init_pos, kp_value=args.kp, sample_time=args.sample_time, steps=args.steps,
+                                   figure=args.figure, total_time=args.total_time, wheel_max=args.wheel_max, log_path=log_path)
+            else:
+                run_inverse_kinematics(args.steps, init_pos=args.init_pos, final_pose=args.final_pose, kp_value=args.kp,
+                                       total_time=args.total_time or 60.0, log_path=log_path)
+
+        renderer = VideoRenderer(log_path, args.fps, args.speed, args.size, args.dpi)
+        try:
+            count = renderer.render(args.output, args.workers)
+        finally:
+            renderer.close()
+    print(f"{count} frames written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Import libraries
+import numpy as np
+
+# Wheel kinematics of the three-wheeled omnidirectional robot.
+# Wheel i sits at angle alpha_i = offset + i*phi from the body x axis, at distance L from
+# the center, and rolls perpendicular to its arm, so its angular speed is
+#   omega_i = (-sin(alpha_i) vx + cos(alpha_i) vy + L w) / r
+# for the body twist (vx, vy, w). The default geometry is the one drawn by RobotSimulation
+# (phi = 120 degrees, L = 1.5 and r = 0.25 times the drawing scale of 0.5).
+class WheelKinematics:
+    def __init__(self, L=0.75, r=0.125, phi=120*(np.pi/180), offset=0.0):
+        self.L = L
+        self.r = r
+        self.alphas = offset + phi*np.arange(3)
+
+        # Body twist -> wheel speeds and back
+        self.matrix = np.column_stack([-np.sin(self.alphas), np.cos(self.alphas), np.full(3, L)]) / r
+        self.inverse = np.linalg.inv(self.matrix)
+        self.rows = [tuple(float(value) for value in row) for row in self.matrix] # Plain floats for single samples
+
+    # Wheel speeds (rad/s) of a single body twist
+    def wheel_speed(self, vx, vy, w):
+        return tuple(a*vx + b*vy + c*w for a, b, c in self.rows)
+
+    # Wheel speeds of many body twists: twists has shape (..., 3); returns (..., 3)
+    def wheel_speeds(self, twists):
+        return np.asarray(twists, dtype='float') @ self.matrix.T
+
+    # Body twists (vx, vy, w) of wheel speeds with shape (..., 3)
+    def body_twists(self, wheel_speeds):
+        return np.asarray(wheel_speeds, dtype='float') @ self.inverse.T
+
+    # Limit a single body twist so that no wheel exceeds wheel_max (rad/s). The whole twist
+    # is scaled down by the same factor, which keeps the direction of motion and the ratio
+    # between translation and rotation (clipping each wheel would bend the path).
+    # Returns the saturated twist and its wheel speeds
+    def saturate(self, vx, vy, w, wheel_max):
+        wheels = self.wheel_speed(vx, vy, w)
+        peak = max(abs(wheels[0]), abs(wheels[1]), abs(wheels[2]))
+        if peak <= wheel_max:
+            return (vx, vy, w), wheels
+        scale = wheel_max / peak
+        return (vx*scale, vy*scale, w*scale), tuple(wheel*scale for wheel in wheels)
+
+    # saturate for many body twists at once; returns (twists, wheel speeds), both (..., 3)
+    def saturate_many(self, twists, wheel_max):
+        twists = np.asarray(twists, dtype='float')
+        wheels = self.wheel_speeds(twists)
+        peak = np.max(np.abs(wheels), axis=-1, keepdims=True)
+        scale = np.minimum(1.0, wheel_max / np.maximum(peak, 1e-300))
+        return twists*scale, wheels*scale
@@ -1,23 +1,23 @@
-from ForwardKinematics import ForwardKinematics
-from InverseKinematics import InverseKinematics
-from PathFollowing import PathFollowing
 import tkinter as tk
 from PIL import Image, ImageTk, ImageDraw
+import importlib
 import signal
 import sys
 
+TITLE = "Simulation of a 3-Wheel Omnidirectional Robot"
+
 class RobotSimGUI:
     def __init__(self):
-        # Initialize instances of ForwardKinematics, InverseKinematics, and PathFollowing classes
-        self.forward_kinematics_class = ForwardKinematics()
-        self.inverse_knimatics_class = InverseKinematics()
-        self.path_following_class = PathFollowing()
+        # Simulation classes are imported on first use (they load matplotlib and scipy),
+        # so the menu appears without waiting for them
+        self.simulations = {}
 
         self.init() # Initialize the GUI
     
+    # Build the main window once; simulations are shown in frames of this same window
     def init(self):
         self.root = tk.Tk() # Create the main window
-        self.root.title("Simulation of a 3-Wheel Omnidirectional Robot") # Set window title
+        self.root.title(TITLE) # Set window title
         self.root.attributes('-zoomed', True) # Maximize the window
         
         # Main frame to hold everything
@@ -55,6 +55,12 @@ class RobotSimGUI:
         self.path_following_button.bind("<Leave>", lambda e: self.path_following_button.config(image=self.button_image))
         self.path_following_button.pack(pady=30)
 
+        self.replay_button = tk.Label(self.center_frame, image=self.button_image, text="Replay", compound="center", fg="white", font=('Helvetica', 24))
+        self.replay_button.bind("<Button-1>", lambda e: self.replay())
+        self.replay_button.bind("<Enter>", lambda e: self.replay_button.config(image=self.button_image_hover))
+        self.replay_button.bind("<Leave>", lambda e: self.replay_button.config(image=self.button_image))
+        self.replay_button.pack(pady=30)
+
         # Add bottom frame for name and logo
         self.left_frame = tk.Frame(self.main_frame)
         self.left_frame.pack(side=tk.LEFT, fill=tk.X)
@@ -81,8 +87,6 @@ class RobotSimGUI:
         # Set up handling of window close event
         self.root.protocol("WM_DELETE_WINDOW", self.exit_handler)
         signal.signal(signal.SIGINT, self.signal_handler)
-
-        self.root.mainloop() # Start the GUI event loop
                 
     def create_rounded_rectangle_image(self, width, height, radius, color):
         image = Image.new("RGBA", (width, height))
@@ -90,25 +94,34 @@ class RobotSimGUI:
         draw.rounded_rectangle((0, 0, width, height), radius, fill=color)
         return ImageTk.PhotoImage(image)
      
-    # Destroy the current window and start Forward Kinematics simulation
+    # Start Forward Kinematics simulation
     def forward_kinematics(self):
-        self.root.destroy()
-        self.forward_kinematics_class.init_simulation(self.show_main_window)
+        self.open_simulation("ForwardKinematics")
         
-    # Destroy current window and start Inverse Kinematics simulation
+    # Start Inverse Kinematics simulation
     def inverse_kinematics(self):
-        self.root.destroy() 
-        self.inverse_knimatics_class.init_simulation(self.show_main_window)
+        self.open_simulation("InverseKinematics")
         
-    # Destroy current window and start Path Following simulation
+    # Start Path Following simulation
     def path_following(self):
-        self.root.destroy() 
-        self.path_following_class.init_simulation(self.show_main_window)
+        self.open_simulation("PathFollowing")
 
-    # Function to show the main window after a simulation ends 
+    # Start the replay of a recorded run
+    def replay(self):
+        self.open_simulation("Replay")
+
+    # Hide the menu and build the simulation (module and class share the name) in the main window
+    def open_simulation(self, name):
+        if name not in self.simulations:
+            module = importlib.import_module(name)
+            self.simulations[name] = getattr(module, name)()
+        self.main_frame.pack_forget()
+        self.simulations[name].init_simulation(self.show_main_window, master=self.root)
+
+    # Function to show the menu again after a simulation ends (its frame is already destroyed)
     def show_main_window(self):
-        del self.root # Delete current window instance and initialize a new one
-        self.init()
+        self.root.title(TITLE)
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
     
     # Function to handle Ctrl+C signal
     def signal_handler(self, sig, frame):
@@ -122,4 +135,5 @@ class RobotSimGUI:
         sys.exit()
             
 if __name__ == "__main__":
-    gui = RobotSimGUI()
\ No newline at end of file
+    gui = RobotSimGUI()
+    gui.root.mainloop() # Start the GUI event loop
\ No newline at end of file
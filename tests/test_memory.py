@@ -0,0 +1,72 @@
+# Memory regression check of the menu: opens and closes every simulation mode many times
+# in the same window and verifies that the resident set size (RSS) stays flat and no
+# matplotlib figure is left behind. Needs a display (e.g. run under xvfb-run on a headless
+# machine); skipped without one. MEMORY_CYCLES sets the number of checked cycles.
+#   MEMORY_CYCLES=100 xvfb-run python -m pytest tests/test_memory.py    (400 mode switches)
+import pytest
+import time
+import sys
+import gc
+import os
+
+MODES = ["ForwardKinematics", "InverseKinematics", "PathFollowing", "Replay"]
+WARMUP = 30 # Cycles ignored while caches and imports settle
+FRAMES = 5 # Tk event rounds while each mode is open
+LIMIT = 5.0 # Allowed RSS growth after the warm-up (MB)
+
+# Resident set size in MB
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource # Peak RSS only (KB on Linux, bytes on macOS), still catches steady growth
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+# Process pending Tk events for a few frames so that every window is drawn
+def pump(root, frames, frame_time=0.01):
+    for _ in range(frames):
+        root.update()
+        time.sleep(frame_time)
+
+# Open and close every mode `cycles` times; returns the RSS (MB) after each cycle
+def switch_modes(gui, cycles, frames):
+    samples = []
+    for _ in range(cycles):
+        for name in MODES:
+            gui.open_simulation(name)
+            pump(gui.root, frames)
+            gui.simulations[name].back()
+            gui.root.update()
+        gc.collect()
+        samples.append(rss())
+    return samples
+
+# Number of live matplotlib figures (each mode keeps at most its last, cleared, figure)
+def live_figures():
+    from matplotlib.figure import Figure
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, Figure))
+
+@pytest.fixture
+def gui():
+    import tkinter as tk
+    from main import RobotSimGUI
+    try:
+        gui = RobotSimGUI()
+    except tk.TclError as e:
+        pytest.skip(f"no display: {e}")
+    gui.root.update()
+    yield gui
+    gui.root.destroy()
+
+def test_mode_switches_keep_memory_flat(gui):
+    cycles = int(os.environ.get("MEMORY_CYCLES", 50))
+    samples = switch_modes(gui, WARMUP, FRAMES)
+    baseline = samples[-1]
+    baseline_figures = live_figures()
+    samples = switch_modes(gui, cycles, FRAMES)
+    growth = samples[-1] - baseline
+    assert growth <= LIMIT, f"RSS grew {growth:+.2f} MB over {len(MODES) * cycles} mode switches"
+    assert live_figures() <= baseline_figures
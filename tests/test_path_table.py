@@ -0,0 +1,41 @@
+# Import libraries
+from RobotControlP import path_table, cached_path_table
+import numpy as np
+import os
+
+def write_route(path, points):
+    path.write_text("x,y\n" + "".join(f"{x},{y}\n" for x, y in points))
+
+# A route file is read once while it does not change
+def test_route_table_is_cached(tmp_path):
+    route = tmp_path / "route.csv"
+    write_route(route, [(0, 0), (10, 0), (10, 10), (0, 0)])
+    first = path_table(str(route), 40.0, dt=0.1)
+    assert path_table(str(route), 40.0, dt=0.1) is first
+    assert not first[1].flags.writeable
+
+# An edited route file gives a new table, even with the same modification time
+def test_route_table_follows_file_changes(tmp_path):
+    route = tmp_path / "route.csv"
+    write_route(route, [(0, 0), (10, 0), (10, 10), (0, 0)])
+    old = path_table(str(route), 40.0, dt=0.1)
+    stat = os.stat(route)
+
+    write_route(route, [(0, 0), (20.5, 0), (20.5, 20.5), (0, 0)])
+    os.utime(route, ns=(stat.st_atime_ns, stat.st_mtime_ns)) # Only the size tells them apart
+    new = path_table(str(route), 40.0, dt=0.1)
+    assert new is not old
+    assert np.isclose(new[1][:, 0].max(), 20.5, atol=0.5)
+
+    # Same size, new modification time
+    write_route(route, [(0, 0), (30.5, 0), (30.5, 30.5), (0, 0)])
+    os.utime(route, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    newer = path_table(str(route), 40.0, dt=0.1)
+    assert np.isclose(newer[1][:, 0].max(), 30.5, atol=0.5)
+
+# Built-in figures are keyed on their name only
+def test_builtin_table_is_cached():
+    cached_path_table.cache_clear()
+    path_table("circle", 40.0, dt=0.01)
+    path_table("circle", 40.0, dt=0.01)
+    assert cached_path_table.cache_info().hits == 1
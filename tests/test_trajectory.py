@@ -0,0 +1,82 @@
+# Import libraries
+from Trajectory import Trajectory, SampledTrajectory, WaypointSpline, load_path, make_trajectory, circle
+import numpy as np
+import pytest
+import os
+
+SQUARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sq.csv")
+
+# 10 m square, one lap in 40 s: the corners are at t = 0, 10, 20 and 30
+def square():
+    return load_path(SQUARE, 40.0)
+
+# The edges are straight
+def test_square_edges_have_no_curvature():
+    path = square()
+    t = np.array([1.0, 5.0, 9.0, 11.0, 15.0, 25.0, 35.0, 45.0])
+    assert np.all(path.curvature(t) == 0.0)
+
+# Every corner turns left, with a spike much larger than the curvature of the lap as a whole
+def test_square_corners_are_spikes():
+    path = square()
+    k = path.curvature(np.array([0.0, 10.0, 20.0, 30.0, 40.0, 39.9999]))
+    assert np.all(k > 10.0)
+
+# The curvature integrates to the turning angle: a quarter turn per corner
+def test_square_total_turn():
+    path = square()
+    t, s, k = path.build_tables()
+    assert abs(np.trapz(k, s) - 2*np.pi) < 1e-9
+
+# The ends of an open path do not turn
+def test_open_path(tmp_path):
+    route = tmp_path / "l.csv"
+    route.write_text("0,0\n10,0\n10,10\n")
+    path = load_path(str(route), 20.0)
+    assert not path.closed
+    assert np.all(path.curvature(np.array([0.0, 5.0, 15.0, 20.0])) == 0.0)
+    t, s, k = path.build_tables()
+    assert abs(np.trapz(k, s) - np.pi/2) < 1e-9
+
+# A densely sampled circle gets the curvature of the circle everywhere
+def test_dense_circle():
+    points = circle(40.0, (10.0, 10.0), 8.0).draw_points(2000)[:-1]
+    path = SampledTrajectory(points, 40.0, True)
+    k = path.curvature(np.linspace(0.0, 40.0, 1001))
+    assert np.allclose(k, 1/8.0, rtol=1e-5)
+
+# A spline route passes through its waypoints and turns smoothly at the corners
+def test_spline_route():
+    path = load_path(SQUARE, 40.0, spline=True)
+    assert isinstance(path, WaypointSpline)
+    assert path.closed
+    start = path.position(0.0)
+    assert np.allclose(start, (0.0, 0.0), atol=1e-9)
+    corners = path.position(path.time_at(np.array([0.25, 0.5, 0.75])*path.length()))
+    assert np.allclose(np.linalg.norm(corners - [[10.0, 0.0], [10.0, 10.0], [0.0, 10.0]], axis=1), 0.0, atol=0.5)
+    k = path.curvature(np.linspace(0.0, 40.0, 401))
+    assert np.all(np.isfinite(k)) and k.max() < 10.0
+    t, s, k = path.build_tables()
+    assert abs(np.trapz(k, s) - 2*np.pi) < 1e-2
+
+# make_trajectory loads a route file as a polyline unless asked for a spline
+def test_make_trajectory_route():
+    assert isinstance(make_trajectory(SQUARE, 40.0), SampledTrajectory)
+    assert isinstance(make_trajectory(SQUARE, 40.0, spline=True), WaypointSpline)
+    assert make_trajectory("circle", 40.0).closed
+    with pytest.raises(ValueError):
+        make_trajectory("no such path", 40.0)
+
+# Trajectory is abstract: a subclass must implement _position and _velocity
+def test_trajectory_is_abstract():
+    with pytest.raises(TypeError):
+        Trajectory(40.0)
+
+# The built-in figures start where the GUI draws them and repeat every lap
+def test_builtin_figures():
+    lemniscate = make_trajectory("lemniscata", 40.0)
+    circle_path = make_trajectory("circle", 40.0)
+    assert np.allclose(lemniscate.position(0.0), (10.0, 10.0))
+    assert np.allclose(circle_path.position(0.0), (18.0, 10.0))
+    assert np.allclose(circle_path.position(50.0), circle_path.position(10.0))
+    assert abs(circle_path.length() - 2*np.pi*8.0) < 1e-3